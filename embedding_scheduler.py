@@ -0,0 +1,93 @@
+import logging
+from typing import List, Sequence
+
+import numpy as np
+
+
+# Fallback jika model tidak punya tokenizer yang bisa dipanggil (estimasi kasar)
+CHARS_PER_TOKEN = 4
+
+
+def token_lengths(model, texts: Sequence[str]) -> np.ndarray:
+    """
+    Panjang token setiap teks setelah truncation ke max_seq_length model
+    (termasuk special token), yaitu panjang yang benar-benar masuk forward pass.
+    """
+    max_length = getattr(model, "max_seq_length", None) or 512
+    if hasattr(model, "token_lengths"):
+        lengths = model.token_lengths(texts)
+    elif getattr(model, "tokenizer", None) is not None:
+        encoded = model.tokenizer(list(texts), truncation=True, max_length=max_length)
+        lengths = [len(ids) for ids in encoded["input_ids"]]
+    else:
+        lengths = [len(text) // CHARS_PER_TOKEN + 2 for text in texts]
+    return np.minimum(np.asarray(lengths, dtype=np.int64).reshape(len(texts)), max_length)
+
+
+def embedding_dimension(model) -> int:
+    """Dimensi embedding (sentence-transformers baru mengganti nama method-nya)"""
+    getter = getattr(model, "get_embedding_dimension", None) or model.get_sentence_embedding_dimension
+    return int(getter())
+
+
+def plan_batches(lengths: np.ndarray, token_budget: int, max_batch_size: int) -> List[np.ndarray]:
+    """
+    Urutkan teks dari token terpanjang lalu bentuk batch secara greedy:
+    batch ditutup jika (jumlah teks x panjang terpanjang di batch) melebihi
+    token_budget atau jumlah teks mencapai max_batch_size. Karena urut menurun,
+    teks pertama batch menentukan panjang padding seluruh batch.
+
+    Hasilnya list index (ke urutan input) per batch; setiap batch minimal 1 teks.
+    """
+    order = np.argsort(-np.asarray(lengths), kind="stable")
+    batches = []
+    start = 0
+    while start < len(order):
+        padded_length = max(int(lengths[order[start]]), 1)
+        size = max(1, min(max_batch_size, token_budget // padded_length, len(order) - start))
+        batches.append(order[start:start + size])
+        start += size
+    return batches
+
+
+def padding_efficiency(lengths: np.ndarray, batches: List[np.ndarray]) -> float:
+    """Token asli / token setelah padding (1.0 = tanpa padding)"""
+    padded = sum(len(batch) * int(lengths[batch].max()) for batch in batches if len(batch))
+    return float(np.sum(lengths)) / padded if padded else 1.0
+
+
+def encode_bucketed(model, texts: Sequence[str], token_budget: int, max_batch_size: int,
+                    **encode_kwargs) -> np.ndarray:
+    """
+    Encode teks dengan batch per panjang token (lihat plan_batches); setiap
+    batch satu forward pass. Hasil dikembalikan ke urutan input sebagai
+    matrix float32 (len(texts), dim).
+    """
+    embeddings = np.zeros((len(texts), embedding_dimension(model)), dtype=np.float32)
+    if not len(texts):
+        return embeddings
+
+    lengths = token_lengths(model, texts)
+    batches = plan_batches(lengths, token_budget, max_batch_size)
+    logging.debug(
+        f"Embedding {len(texts)} teks dalam {len(batches)} batch "
+        f"(padding efficiency {padding_efficiency(lengths, batches):.2f})"
+    )
+
+    encode_kwargs = {"convert_to_numpy": True, "show_progress_bar": False, **encode_kwargs}
+    for batch in batches:
+        embeddings[batch] = model.encode([texts[i] for i in batch], batch_size=len(batch), **encode_kwargs)
+    return embeddings
+
+
+def encode_groups(model, groups: Sequence[Sequence[str]], token_budget: int, max_batch_size: int,
+                  **encode_kwargs) -> List[np.ndarray]:
+    """
+    Encode beberapa kelompok teks (misalnya chunk beberapa dokumen) sekaligus:
+    semua teks dijadwalkan bersama sehingga satu forward pass bisa berisi
+    chunk dari dokumen berbeda, lalu hasil dipecah kembali per kelompok.
+    """
+    flat = [text for group in groups for text in group]
+    embeddings = encode_bucketed(model, flat, token_budget, max_batch_size, **encode_kwargs)
+    bounds = np.cumsum([0] + [len(group) for group in groups])
+    return [embeddings[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
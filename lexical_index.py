@@ -0,0 +1,127 @@
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase + split per kata; underscore/angka ikut sehingga nama variabel tetap utuh"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    Inverted index BM25 in-memory untuk chunk satu dokumen (atau cohort).
+
+    Posting list disimpan dalam format CSR: untuk term t, posting-nya adalah
+    doc_ids[offsets[t]:offsets[t+1]] dengan bobot BM25 (idf * tf saturasi)
+    yang sudah dihitung saat build. Skor query = jumlah bobot posting semua
+    term query, dihitung dengan satu np.bincount tanpa loop per dokumen.
+    """
+
+    def __init__(self, texts: Sequence[str], k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.num_docs = len(texts)
+        self.vocab: Dict[str, int] = {}
+
+        term_ids, doc_ids, tfs = [], [], []
+        doc_lengths = np.zeros(self.num_docs, dtype=np.float32)
+        for doc_id, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            doc_lengths[doc_id] = sum(counts.values())
+            for term, tf in counts.items():
+                term_ids.append(self.vocab.setdefault(term, len(self.vocab)))
+                doc_ids.append(doc_id)
+                tfs.append(tf)
+
+        term_ids = np.asarray(term_ids, dtype=np.int32)
+        order = np.argsort(term_ids, kind='stable')
+        self.doc_ids = np.asarray(doc_ids, dtype=np.int32)[order]
+        tfs = np.asarray(tfs, dtype=np.float32)[order]
+
+        doc_freq = np.bincount(term_ids, minlength=len(self.vocab))
+        self.offsets = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(doc_freq, out=self.offsets[1:])
+
+        # idf versi Lucene (selalu positif), diulang per posting sesuai term-nya
+        idf = np.log1p((self.num_docs - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        avg_length = float(doc_lengths.mean()) if self.num_docs else 0.0
+        norm = k1 * (1.0 - b + b * doc_lengths[self.doc_ids] / max(avg_length, 1e-9))
+        self.weights = np.repeat(idf, doc_freq) * tfs * (k1 + 1.0) / (tfs + norm)
+
+    def __len__(self) -> int:
+        return self.num_docs
+
+    def _query_terms(self, query: str) -> List[int]:
+        return sorted({self.vocab[t] for t in tokenize(query) if t in self.vocab})
+
+    def score(self, query: str) -> np.ndarray:
+        """Skor BM25 query terhadap semua dokumen (0 untuk dokumen tanpa term query)"""
+        return self.score_batch([query])[0]
+
+    def score_batch(self, queries: Sequence[str]) -> np.ndarray:
+        """
+        Matrix skor BM25 shape (len(queries), jumlah dokumen). Posting semua
+        term dari semua query dikumpulkan sekali lalu dijumlahkan dengan satu
+        np.bincount pada index gabungan (baris query, dokumen).
+        """
+        rows, terms = [], []
+        for row, query in enumerate(queries):
+            term_ids = self._query_terms(query)
+            terms.extend(term_ids)
+            rows.extend([row] * len(term_ids))
+
+        n_cells = len(queries) * self.num_docs
+        if not terms:
+            return np.zeros((len(queries), self.num_docs), dtype=np.float32)
+
+        terms = np.asarray(terms, dtype=np.int64)
+        starts = self.offsets[terms]
+        lengths = self.offsets[terms + 1] - starts
+        # Index posting untuk semua rentang [start, start + length) tanpa loop Python
+        range_starts = np.cumsum(lengths) - lengths
+        postings = np.arange(int(lengths.sum()), dtype=np.int64) + np.repeat(starts - range_starts, lengths)
+        cells = np.repeat(np.asarray(rows, dtype=np.int64), lengths) * self.num_docs + self.doc_ids[postings]
+
+        scores = np.bincount(cells, weights=self.weights[postings], minlength=n_cells)
+        return scores.astype(np.float32).reshape(len(queries), self.num_docs)
+
+    def search_batch(self, queries: Sequence[str], k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k per query dengan format seperti faiss index.search: (skor, id),
+        masing-masing shape (len(queries), k). Dokumen tanpa term query tidak
+        ikut; slotnya berisi id -1.
+        """
+        k = min(k, self.num_docs)
+        if k == 0 or not len(queries):
+            return np.zeros((len(queries), k), dtype=np.float32), np.full((len(queries), k), -1, dtype=np.int64)
+
+        scores = self.score_batch(queries)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        I = np.take_along_axis(top, order, axis=1).astype(np.int64)
+        S = np.take_along_axis(top_scores, order, axis=1)
+        I[S <= 0] = -1
+        return S, I
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60,
+                           limit: Optional[int] = None) -> List[Tuple[int, float]]:
+    """
+    Gabungkan beberapa ranking (list id, terbaik di depan) dengan RRF:
+    skor(id) = sum 1 / (k + rank). Hasil urut skor menurun, seri dipecah
+    oleh urutan kemunculan pertama.
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+
+    ranked = sorted(fused.items(), key=lambda x: -x[1])
+    return ranked[:limit] if limit is not None else ranked
@@ -0,0 +1,462 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+# httpx baru di-import saat request pertama (subcommand report/stats tidak butuh)
+if TYPE_CHECKING:
+    import httpx
+
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMRequestError(Exception):
+    """Dilempar jika request LLM tetap gagal setelah semua retry"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, partial_content: str = ""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.partial_content = partial_content
+
+
+class TokenBucket:
+    """Token bucket untuk membatasi jumlah request per detik"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Tunggu sampai ada token, lalu ambil satu"""
+        if self.rate <= 0:
+            return
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class OpenRouterClient:
+    """
+    Async client OpenRouter dengan connection pool keep-alive,
+    rate limiting token bucket, batas concurrency global, dan retry
+    exponential backoff (dengan jitter) yang menghormati Retry-After.
+    """
+
+    def __init__(self, url: str, api_key: str, max_concurrency: int = 4,
+                 rate_limit_rps: float = 2.0, rate_limit_burst: int = 4,
+                 max_retries: int = 4, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, timeout: float = 120.0):
+        self.url = url
+        self.api_key = api_key
+        self.max_concurrency = max_concurrency
+        self.rate_limit_rps = rate_limit_rps
+        self.rate_limit_burst = rate_limit_burst
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+
+        self._client: Optional["httpx.AsyncClient"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._bucket: Optional[TokenBucket] = None
+
+    def _ensure_client(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx
+            self._client = httpx.AsyncClient(
+                headers={
+                    "Authorization": f"Bearer {self.api_key}",
+                    "Content-Type": "application/json",
+                },
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._bucket = TokenBucket(self.rate_limit_rps, self.rate_limit_burst)
+        return self._client
+
+    async def chat(self, messages: List[Dict], model: str, temperature: float = 0.0,
+                   **extra) -> str:
+        """Kirim chat completion dan kembalikan isi message pertama"""
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            **extra,
+        }
+        data = await self.post_json(payload)
+
+        try:
+            return data["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMRequestError(f"Unexpected response format: {e}")
+
+    async def chat_stream(self, messages: List[Dict], model: str, temperature: float = 0.0,
+                          on_delta: Optional[Callable[[str], None]] = None, **extra) -> str:
+        """
+        Chat completion dengan streaming (SSE). on_delta dipanggil untuk setiap
+        potongan teks yang diterima.
+
+        Retry hanya dilakukan sebelum ada konten yang diterima; jika koneksi
+        putus di tengah stream, LLMRequestError membawa konten parsial
+        (partial_content).
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+            **extra,
+        }
+        import httpx
+
+        client = self._ensure_client()
+        last_error: Optional[LLMRequestError] = None
+
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+
+            retry_after = None
+            received: List[str] = []
+            try:
+                async with self._semaphore:
+                    async with client.stream("POST", self.url, json=payload) as r:
+                        if r.status_code >= 400:
+                            body = (await r.aread()).decode("utf-8", errors="replace")
+                            last_error = LLMRequestError(
+                                f"HTTP {r.status_code}: {body[:200]}", status_code=r.status_code
+                            )
+                            if r.status_code not in RETRYABLE_STATUS:
+                                raise last_error
+                            retry_after = self._parse_retry_after(r.headers.get("Retry-After"))
+                        else:
+                            async for delta in self._iter_sse_deltas(r):
+                                received.append(delta)
+                                if on_delta is not None:
+                                    on_delta(delta)
+                            return "".join(received)
+            except httpx.TransportError as e:
+                if received:
+                    raise LLMRequestError(
+                        f"Stream interrupted: {type(e).__name__}: {e}", partial_content="".join(received)
+                    )
+                last_error = LLMRequestError(f"{type(e).__name__}: {e}")
+            except LLMRequestError as e:
+                if received and not e.partial_content:
+                    e.partial_content = "".join(received)
+                raise
+
+            if attempt >= self.max_retries:
+                break
+            await self._sleep_before_retry(attempt, retry_after, last_error)
+
+        raise last_error
+
+    @staticmethod
+    async def _iter_sse_deltas(response: "httpx.Response"):
+        """Ambil potongan konten dari event SSE OpenRouter (baris 'data: {...}')"""
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                return
+
+            try:
+                chunk = json.loads(data)
+            except ValueError:
+                logging.debug(f"Skipping malformed SSE line: {data[:100]}")
+                continue
+
+            if "error" in chunk:
+                error = chunk["error"]
+                message = error.get("message", error) if isinstance(error, dict) else error
+                raise LLMRequestError(f"Stream error: {message}")
+
+            choices = chunk.get("choices") or [{}]
+            delta = (choices[0].get("delta") or {}).get("content")
+            if delta:
+                yield delta
+
+        raise LLMRequestError("Stream ended before [DONE]")
+
+    async def post_json(self, payload: Dict) -> Dict:
+        """POST payload dengan retry, rate limiting dan batas concurrency"""
+        import httpx
+
+        client = self._ensure_client()
+        last_error: Optional[LLMRequestError] = None
+
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire()
+
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    r = await client.post(self.url, json=payload)
+
+                if r.status_code < 400:
+                    return r.json()
+
+                last_error = LLMRequestError(
+                    f"HTTP {r.status_code}: {r.text[:200]}", status_code=r.status_code
+                )
+                if r.status_code not in RETRYABLE_STATUS:
+                    raise last_error
+                retry_after = self._parse_retry_after(r.headers.get("Retry-After"))
+            except httpx.TransportError as e:
+                last_error = LLMRequestError(f"{type(e).__name__}: {e}")
+            except ValueError as e:
+                raise LLMRequestError(f"Invalid JSON response: {e}")
+
+            if attempt >= self.max_retries:
+                break
+            await self._sleep_before_retry(attempt, retry_after, last_error)
+
+        raise last_error
+
+    async def _sleep_before_retry(self, attempt: int, retry_after: Optional[float], error: Exception):
+        delay = retry_after if retry_after is not None else self._backoff_delay(attempt)
+        logging.warning(
+            f"LLM request failed ({error}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s"
+        )
+        await asyncio.sleep(delay)
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _parse_retry_after(self, value: Optional[str]) -> Optional[float]:
+        if not value:
+            return None
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                seconds = parsedate_to_datetime(value).timestamp() - time.time()
+            except (TypeError, ValueError):
+                return None
+        return min(self.backoff_max, max(0.0, seconds))
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class BackgroundLoopRunner:
+    """
+    Menjalankan coroutine dari kode sync di satu event loop background.
+
+    Semua thread memakai loop (dan client) yang sama sehingga connection pool,
+    rate limiter dan batas concurrency berlaku global untuk seluruh proses.
+    """
+
+    def __init__(self):
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=self._loop.run_forever, name="llm-client-loop", daemon=True)
+                thread.start()
+        return self._loop
+
+    def run(self, coro):
+        """Jalankan coroutine dan tunggu hasilnya (blocking)"""
+        return asyncio.run_coroutine_threadsafe(coro, self._ensure_loop()).result()
+
+
+class IncrementalJSONArrayParser:
+    """
+    Parser JSON inkremental untuk response yang di-stream.
+
+    Mencari array dengan nama `key` (misalnya "grading_result") dan
+    mengembalikan setiap object di dalamnya begitu object tersebut lengkap,
+    tanpa menunggu JSON keseluruhan selesai. Teks di luar array (code fence,
+    field lain) diabaikan.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.items: List[Dict] = []
+        self._text = ""
+        self._pos = 0
+        self._state = "key"
+        self._depth = 0
+        self._obj_start = -1
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text: str) -> List[Dict]:
+        """Tambahkan potongan teks; kembalikan object yang baru lengkap"""
+        self._text += text
+        new_items = []
+
+        if self._state == "key":
+            key_pos = self._text.find(f'"{self.key}"', self._pos)
+            if key_pos < 0:
+                self._pos = max(0, len(self._text) - len(self.key) - 2)
+                return new_items
+            self._pos = key_pos + len(self.key) + 2
+            self._state = "open"
+
+        if self._state == "open":
+            bracket = self._text.find("[", self._pos)
+            if bracket < 0:
+                self._pos = len(self._text)
+                return new_items
+            self._pos = bracket + 1
+            self._state = "array"
+
+        text_ = self._text
+        i = self._pos
+        while i < len(text_) and self._state == "array":
+            ch = text_[i]
+            if self._depth == 0:
+                if ch == "{":
+                    self._obj_start = i
+                    self._depth = 1
+                elif ch == "]":
+                    self._state = "done"
+            elif self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    try:
+                        item = json.loads(text_[self._obj_start:i + 1])
+                    except ValueError:
+                        item = None
+                    if isinstance(item, dict):
+                        self.items.append(item)
+                        new_items.append(item)
+            i += 1
+
+        self._pos = i
+        return new_items
+
+
+class LLMResponseCache:
+    """
+    Cache response LLM persisten di SQLite.
+
+    Key = hash model + temperature + messages, jadi prompt identik (temperature
+    0) tidak dikirim ulang. Entry yang lebih tua dari ttl dianggap miss, dan
+    ukuran total dibatasi dengan eviction LRU berdasarkan waktu terakhir dipakai.
+    """
+
+    def __init__(self, db_path: str, ttl_seconds: float = 0, max_bytes: int = 128 * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT, size INTEGER, "
+                "created_at REAL, last_used REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: List[Dict], **extra) -> str:
+        raw = json.dumps(
+            {"model": model, "temperature": temperature, "messages": messages, **extra},
+            sort_keys=True, ensure_ascii=False, separators=(',', ':')
+        )
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and self.ttl_seconds > 0 and now - row[1] > self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, model, response, size, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, response, size, now, now)
+                )
+                self._evict(now)
+        except sqlite3.Error as e:
+            logging.warning(f"Failed to write LLM cache entry: {e}")
+
+    def _evict(self, now: float):
+        """Hapus entry kedaluwarsa, lalu entry paling lama dipakai sampai ukuran total <= max_bytes"""
+        if self.ttl_seconds > 0:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", stale)
+        logging.debug(f"Evicted {len(stale)} LLM cache entries")
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
@@ -0,0 +1,194 @@
+import importlib.util
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Dict, List, Union
+
+import numpy as np
+
+
+POOLING_MODES = ("mean", "cls", "max")
+
+
+def is_available() -> bool:
+    """onnxruntime + tokenizers terinstall (onnx & torch hanya dibutuhkan saat export)"""
+    return all(importlib.util.find_spec(module) is not None for module in ("onnxruntime", "tokenizers"))
+
+
+def export_dir_for(cache_dir: str, model_name: str, quantize: bool) -> Path:
+    """Folder hasil export untuk satu model + varian (fp32 / int8)"""
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+    return Path(cache_dir) / f"{safe_name}-{'int8' if quantize else 'fp32'}"
+
+
+def export_model(model_name: str, output_dir: Path, quantize: bool = True):
+    """
+    Export model SentenceTransformer (transformer saja) ke ONNX, opsional dengan
+    dynamic int8 quantization. Pooling & normalisasi dicatat di onnx_config.json
+    dan dijalankan di NumPy oleh OnnxEmbedder.
+
+    Hanya langkah ini yang butuh torch; hasil export di-cache di output_dir.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+
+    logging.info(f"Exporting embedding model to ONNX: {model_name} (int8={quantize})")
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling = next((module for module in model if isinstance(module, models.Pooling)), None)
+    if pooling is None:
+        raise ValueError(f"Model {model_name} tidak memiliki modul Pooling")
+    if hasattr(pooling, "get_pooling_mode_str"):
+        pooling_mode = pooling.get_pooling_mode_str()
+    else:
+        pooling_mode = pooling.pooling_mode
+    if pooling_mode not in POOLING_MODES:
+        raise ValueError(f"Pooling mode {pooling_mode} belum didukung backend ONNX (hanya {POOLING_MODES})")
+
+    tokenizer = model.tokenizer
+    # Contoh dengan padding agar cabang attention mask ikut ter-trace
+    sample = tokenizer(["contoh kalimat untuk export model", "contoh"], padding=True, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+
+    class TokenEmbeddings(torch.nn.Module):
+        def __init__(self, auto_model):
+            super().__init__()
+            self.auto_model = auto_model
+
+        def forward(self, *inputs):
+            return self.auto_model(**dict(zip(input_names, inputs)), return_dict=True).last_hidden_state
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = output_dir / "model_fp32.onnx"
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names + ["token_embeddings"]}
+    export_kwargs = {}
+    if "dynamo" in torch.onnx.export.__code__.co_varnames:
+        export_kwargs["dynamo"] = False
+
+    wrapper = TokenEmbeddings(transformer.auto_model).eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            wrapper, tuple(sample[name] for name in input_names), str(fp32_path),
+            input_names=input_names, output_names=["token_embeddings"],
+            dynamic_axes=dynamic_axes, opset_version=14, **export_kwargs
+        )
+
+    model_path = fp32_path
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        model_path = output_dir / "model_int8.onnx"
+        quantize_dynamic(str(fp32_path), str(model_path), weight_type=QuantType.QInt8)
+        fp32_path.unlink()
+
+    tokenizer.save_pretrained(str(output_dir))
+    config = {
+        "model_name": model_name,
+        "model_file": model_path.name,
+        "input_names": input_names,
+        "pooling_mode": pooling_mode,
+        "normalize": any(isinstance(module, models.Normalize) for module in model),
+        "max_seq_length": model.max_seq_length,
+        "pad_token_id": tokenizer.pad_token_id or 0,
+        "pad_token": tokenizer.pad_token or "[PAD]",
+        "dimension": int(transformer.auto_model.config.hidden_size),
+    }
+    with open(output_dir / "onnx_config.json", "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+
+
+class OnnxEmbedder:
+    """
+    Backend embedding CPU: graph transformer hasil export ONNX (opsional int8)
+    dijalankan dengan onnxruntime, tokenisasi dengan tokenizers (Rust), dan
+    pooling + normalisasi di NumPy. Interface encode sama dengan
+    SentenceTransformer.encode sejauh yang dipakai RAGEngine.
+    """
+
+    def __init__(self, model_dir: Union[str, Path], threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.model_dir = Path(model_dir)
+        with open(self.model_dir / "onnx_config.json", "r", encoding="utf-8") as f:
+            self.config: Dict = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(str(self.model_dir / "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(self.model_dir / self.config["model_file"]), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = self.config["input_names"]
+
+    @classmethod
+    def load_or_export(cls, model_name: str, cache_dir: str, quantize: bool = True,
+                       threads: int = 0) -> "OnnxEmbedder":
+        """Load hasil export dari cache, export dulu jika belum ada"""
+        model_dir = export_dir_for(cache_dir, model_name, quantize)
+        if not (model_dir / "onnx_config.json").exists():
+            export_model(model_name, model_dir, quantize)
+        return cls(model_dir, threads)
+
+    @property
+    def max_seq_length(self) -> int:
+        return self.config["max_seq_length"]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def token_lengths(self, texts: List[str]) -> List[int]:
+        """Jumlah token per teks setelah truncation (tanpa padding)"""
+        return [sum(e.attention_mask) for e in self.tokenizer.encode_batch(list(texts))]
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """
+        Encode teks menjadi matrix float32 (n, dim). Seperti SentenceTransformer,
+        teks diurutkan menurut panjang agar padding per batch minimal, lalu hasil
+        dikembalikan ke urutan input.
+        """
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.zeros((len(sentences), self.get_sentence_embedding_dimension()), dtype=np.float32)
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        for start in range(0, len(sentences), batch_size):
+            batch_ids = order[start:start + batch_size]
+            embeddings[batch_ids] = self._encode_batch([sentences[i] for i in batch_ids])
+
+        if normalize_embeddings and not self.config["normalize"]:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        features = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        token_embeddings = self.session.run(None, {name: features[name] for name in self.input_names})[0]
+        return self._pool(token_embeddings, features["attention_mask"])
+
+    def _pool(self, token_embeddings: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        mode = self.config["pooling_mode"]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        if mode == "cls":
+            pooled = token_embeddings[:, 0]
+        elif mode == "max":
+            pooled = np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+        else:
+            pooled = (token_embeddings * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+        pooled = pooled.astype(np.float32)
+        if self.config["normalize"]:
+            pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled
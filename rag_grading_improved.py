@@ -1,19 +1,40 @@
 import os
+import argparse
+import asyncio
 import json
+import math
+import gzip
+import hashlib
+import shutil
+import sys
+import importlib.util
+import time
 import numpy as np
-import faiss
-import requests
 import logging
+import threading
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Tuple
-from PyPDF2 import PdfReader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from sentence_transformers import SentenceTransformer
-import pandas as pd
-from tqdm import tqdm
+from typing import TYPE_CHECKING, List, Dict, Tuple, Optional, Iterable, Iterator, Callable, Union
 from dotenv import load_dotenv
 
+from llm_client import (
+    OpenRouterClient, BackgroundLoopRunner, LLMRequestError, LLMResponseCache, IncrementalJSONArrayParser
+)
+from embedding_scheduler import encode_bucketed, encode_groups
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from onnx_embedder import OnnxEmbedder, is_available as onnx_backend_available
+from text_splitter import IncrementalSplitter, RecursiveTextSplitter
+from vector_store import QuantizedVectors
+
+# Dependency berat (faiss, torch via sentence_transformers, pandas, PyPDF2, tqdm)
+# di-import di dalam fungsi yang memakainya, supaya import modul ini (streamlit,
+# subcommand report/stats) tidak ikut me-load semuanya
+if TYPE_CHECKING:
+    import faiss
+    from sentence_transformers import SentenceTransformer
+
 load_dotenv()
 
 class Config:
@@ -24,10 +45,55 @@ class Config:
     MODEL = os.getenv("MODEL", "z-ai/glm-4.5")
 
     EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+    EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+    ONNX_QUANTIZE = os.getenv("ONNX_QUANTIZE", "true").lower() == "true"
+    ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))
+    EMBEDDING_TOKEN_BUDGET = int(os.getenv("EMBEDDING_TOKEN_BUDGET", "8192"))
+    EMBEDDING_MAX_BATCH = int(os.getenv("EMBEDDING_MAX_BATCH", "128"))
     CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
     CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "200"))
     TOP_K_RETRIEVAL = int(os.getenv("TOP_K_RETRIEVAL", "5"))
     SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.65"))
+    INDEX_METRIC = os.getenv("INDEX_METRIC", "l2").lower()
+    INDEX_TYPE = os.getenv("INDEX_TYPE", "auto").lower()
+    ANN_MIN_VECTORS = int(os.getenv("ANN_MIN_VECTORS", "20000"))
+    INDEX_TRAIN_SAMPLE = int(os.getenv("INDEX_TRAIN_SAMPLE", "100000"))
+    IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+    PQ_M = int(os.getenv("PQ_M", "16"))
+    HNSW_M = int(os.getenv("HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "80"))
+    HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "64"))
+    VECTOR_QUANTIZATION = os.getenv("VECTOR_QUANTIZATION", "none").lower()
+    HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "false").lower() == "true"
+    BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+    BM25_B = float(os.getenv("BM25_B", "0.75"))
+    RRF_K = int(os.getenv("RRF_K", "60"))
+
+    PIPELINE_BATCH = os.getenv("PIPELINE_BATCH", "true").lower() == "true"
+    EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+    EMBEDDING_BATCH_DOCS = int(os.getenv("EMBEDDING_BATCH_DOCS", "8"))
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "4"))
+    PAGE_EXTRACTION_WORKERS = int(os.getenv("PAGE_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PARALLEL_PAGE_MIN_PAGES = int(os.getenv("PARALLEL_PAGE_MIN_PAGES", "40"))
+
+    PDF_BACKEND = os.getenv("PDF_BACKEND", "auto").lower()
+    PDF_BACKEND_PROBE_PAGES = int(os.getenv("PDF_BACKEND_PROBE_PAGES", "3"))
+    OCR_ENABLED = os.getenv("OCR_ENABLED", "true").lower() == "true"
+    OCR_LANG = os.getenv("OCR_LANG", "ind+eng")
+    COHORT_RETRIEVAL = os.getenv("COHORT_RETRIEVAL", "false").lower() == "true"
+
+    EVIDENCE_TOKEN_BUDGET = int(os.getenv("EVIDENCE_TOKEN_BUDGET", "3000"))
+    EVIDENCE_CHARS_PER_TOKEN = float(os.getenv("EVIDENCE_CHARS_PER_TOKEN", "4"))
+
+    GRADING_MODE = os.getenv("GRADING_MODE", "single").lower()
+    SUBRUBRIC_MAX_ATTEMPTS = int(os.getenv("SUBRUBRIC_MAX_ATTEMPTS", "2"))
+
+    LLM_RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "2"))
+    LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "4"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    LLM_STREAMING = os.getenv("LLM_STREAMING", "false").lower() == "true"
 
     MIN_CONFIDENCE_THRESHOLD = 0.6
     TEMPERATURE = 0.0
@@ -39,6 +105,20 @@ class Config:
     OUTPUT_FOLDER = "output"
     RUBRIC_FILE = "data/rubrik.json"
 
+    CACHE_FOLDER = os.getenv("CACHE_FOLDER", ".cache")
+    PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+    PDF_CACHE_MAX_MB = float(os.getenv("PDF_CACHE_MAX_MB", "256"))
+    INDEX_CACHE_ENABLED = os.getenv("INDEX_CACHE_ENABLED", "true").lower() == "true"
+    RUBRIC_CACHE_ENABLED = os.getenv("RUBRIC_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+    LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "720"))
+    LLM_CACHE_MAX_MB = float(os.getenv("LLM_CACHE_MAX_MB", "128"))
+
+    JOURNAL_ENABLED = os.getenv("JOURNAL_ENABLED", "true").lower() == "true"
+    JOURNAL_FOLDER = os.getenv("JOURNAL_FOLDER", "output/journal")
+    INCREMENTAL_ENABLED = os.getenv("INCREMENTAL_ENABLED", "true").lower() == "true"
+
     @classmethod
     def validate(cls):
         """Validate configuration"""
@@ -47,6 +127,20 @@ class Config:
         if not cls.OPENROUTER_KEY:
             errors.append("OPENROUTER_KEY tidak ditemukan di .env file")
 
+        if cls.EMBEDDING_BACKEND not in ("torch", "onnx"):
+            errors.append(f"EMBEDDING_BACKEND harus 'torch' atau 'onnx', got {cls.EMBEDDING_BACKEND}")
+        elif cls.EMBEDDING_BACKEND == "onnx" and not onnx_backend_available():
+            errors.append("EMBEDDING_BACKEND=onnx butuh onnxruntime dan tokenizers (pip install onnxruntime onnx)")
+
+        if cls.ONNX_THREADS < 0:
+            errors.append(f"ONNX_THREADS harus >= 0, got {cls.ONNX_THREADS}")
+
+        if cls.EMBEDDING_TOKEN_BUDGET <= 0:
+            errors.append(f"EMBEDDING_TOKEN_BUDGET harus > 0, got {cls.EMBEDDING_TOKEN_BUDGET}")
+
+        if cls.EMBEDDING_MAX_BATCH <= 0:
+            errors.append(f"EMBEDDING_MAX_BATCH harus > 0, got {cls.EMBEDDING_MAX_BATCH}")
+
         if cls.CHUNK_SIZE <= 0:
             errors.append(f"CHUNK_SIZE harus > 0, got {cls.CHUNK_SIZE}")
 
@@ -59,8 +153,83 @@ class Config:
         if not (0 <= cls.SIMILARITY_THRESHOLD <= 1):
             errors.append(f"SIMILARITY_THRESHOLD harus antara 0 dan 1")
 
+        if cls.INDEX_METRIC not in ("l2", "cosine"):
+            errors.append(f"INDEX_METRIC harus 'l2' atau 'cosine', got {cls.INDEX_METRIC}")
+
+        if cls.INDEX_TYPE not in ("auto", "flat", "ivf_flat", "ivf_pq", "hnsw"):
+            errors.append(f"INDEX_TYPE harus auto/flat/ivf_flat/ivf_pq/hnsw, got {cls.INDEX_TYPE}")
+
+        if cls.IVF_NPROBE <= 0 or cls.HNSW_EF_SEARCH <= 0:
+            errors.append("IVF_NPROBE dan HNSW_EF_SEARCH harus > 0")
+
+        if cls.VECTOR_QUANTIZATION not in QuantizedVectors.MODES:
+            errors.append(f"VECTOR_QUANTIZATION harus none/fp16/int8/pq, got {cls.VECTOR_QUANTIZATION}")
+
+        if cls.BM25_K1 < 0 or not (0 <= cls.BM25_B <= 1) or cls.RRF_K <= 0:
+            errors.append("BM25_K1 harus >= 0, BM25_B antara 0 dan 1, dan RRF_K harus > 0")
+
+        if cls.EXTRACTION_WORKERS <= 0:
+            errors.append(f"EXTRACTION_WORKERS harus > 0, got {cls.EXTRACTION_WORKERS}")
+
+        if cls.EMBEDDING_BATCH_DOCS <= 0:
+            errors.append(f"EMBEDDING_BATCH_DOCS harus > 0, got {cls.EMBEDDING_BATCH_DOCS}")
+
+        if cls.LLM_CONCURRENCY <= 0:
+            errors.append(f"LLM_CONCURRENCY harus > 0, got {cls.LLM_CONCURRENCY}")
+
+        if cls.EVIDENCE_TOKEN_BUDGET <= 0 or cls.EVIDENCE_CHARS_PER_TOKEN <= 0:
+            errors.append("EVIDENCE_TOKEN_BUDGET dan EVIDENCE_CHARS_PER_TOKEN harus > 0")
+
+        if cls.GRADING_MODE not in ("single", "per_subrubric"):
+            errors.append(f"GRADING_MODE harus 'single' atau 'per_subrubric', got {cls.GRADING_MODE}")
+
+        if cls.SUBRUBRIC_MAX_ATTEMPTS <= 0:
+            errors.append(f"SUBRUBRIC_MAX_ATTEMPTS harus > 0, got {cls.SUBRUBRIC_MAX_ATTEMPTS}")
+
+        if cls.PDF_BACKEND != "auto" and cls.PDF_BACKEND not in PDF_BACKENDS:
+            errors.append(f"PDF_BACKEND harus auto atau salah satu dari {list(PDF_BACKENDS)}, got {cls.PDF_BACKEND}")
+
+        if cls.LLM_RATE_LIMIT_RPS < 0:
+            errors.append(f"LLM_RATE_LIMIT_RPS harus >= 0, got {cls.LLM_RATE_LIMIT_RPS}")
+
+        if cls.LLM_RATE_LIMIT_BURST <= 0:
+            errors.append(f"LLM_RATE_LIMIT_BURST harus > 0, got {cls.LLM_RATE_LIMIT_BURST}")
+
+        if cls.LLM_MAX_RETRIES < 0:
+            errors.append(f"LLM_MAX_RETRIES harus >= 0, got {cls.LLM_MAX_RETRIES}")
+
+        if cls.LLM_CACHE_TTL_HOURS < 0 or cls.LLM_CACHE_MAX_MB <= 0:
+            errors.append("LLM_CACHE_TTL_HOURS harus >= 0 dan LLM_CACHE_MAX_MB harus > 0")
+
         return errors
 
+    @classmethod
+    def index_spec(cls, metric: Optional[str] = None) -> str:
+        """
+        Identitas metric + tipe index + parameter build + kuantisasi, untuk key
+        IndexStore / manifest. Hanya parameter yang dipakai tipe index itu yang
+        ikut (auto bisa memilih hnsw atau IVF, jadi keduanya ikut).
+        """
+        spec = f"{metric or cls.INDEX_METRIC}-{cls.INDEX_TYPE}"
+        if cls.INDEX_TYPE == "auto":
+            spec += f"-ann{cls.ANN_MIN_VECTORS}"
+        if cls.INDEX_TYPE in ("auto", "hnsw"):
+            spec += f"-hnsw(M={cls.HNSW_M},efC={cls.HNSW_EF_CONSTRUCTION})"
+        if cls.INDEX_TYPE in ("auto", "ivf_flat", "ivf_pq"):
+            spec += f"-ivf(nlist={cls.IVF_NLIST or 'auto'},train={cls.INDEX_TRAIN_SAMPLE})"
+        if cls.VECTOR_QUANTIZATION != "none":
+            spec += f"-{cls.VECTOR_QUANTIZATION}"
+        if cls.VECTOR_QUANTIZATION == "pq" or cls.INDEX_TYPE in ("auto", "ivf_pq"):
+            spec += f"-pq(m={cls.PQ_M})"
+        return spec
+
+    @classmethod
+    def retrieval_spec(cls) -> str:
+        """Identitas metode retrieval, untuk key journal / manifest"""
+        if not cls.HYBRID_SEARCH:
+            return "dense"
+        return f"hybrid-bm25(k1={cls.BM25_K1},b={cls.BM25_B})-rrf{cls.RRF_K}"
+
     @classmethod
     def print_config(cls):
         """Print current configuration"""
@@ -69,10 +238,41 @@ class Config:
         print("="*60)
         print(f"Model: {cls.MODEL}")
         print(f"Embedding Model: {cls.EMBEDDING_MODEL}")
+        if cls.EMBEDDING_BACKEND == "onnx":
+            print(f"Embedding Backend: onnx ({'int8' if cls.ONNX_QUANTIZE else 'fp32'}, threads={cls.ONNX_THREADS or 'auto'})")
+        else:
+            print(f"Embedding Backend: torch")
+        print(f"Embedding Batching: {cls.EMBEDDING_TOKEN_BUDGET} token/batch (max {cls.EMBEDDING_MAX_BATCH} chunk)")
         print(f"Chunk Size: {cls.CHUNK_SIZE}")
         print(f"Chunk Overlap: {cls.CHUNK_OVERLAP}")
         print(f"Top-K Retrieval: {cls.TOP_K_RETRIEVAL}")
-        print(f"Similarity Threshold: {cls.SIMILARITY_THRESHOLD}")
+        if cls.INDEX_METRIC == "cosine":
+            print(f"Similarity Threshold: {cls.SIMILARITY_THRESHOLD}")
+        else:
+            print(f"Similarity Threshold: {cls.SIMILARITY_THRESHOLD} (diabaikan, hanya untuk INDEX_METRIC=cosine)")
+        print(f"Index Metric: {cls.INDEX_METRIC}")
+        print(f"Index Type: {cls.INDEX_TYPE} (nprobe={cls.IVF_NPROBE}, efSearch={cls.HNSW_EF_SEARCH})")
+        print(f"Vector Quantization: {cls.VECTOR_QUANTIZATION}")
+        print(f"Hybrid Search: {cls.HYBRID_SEARCH} (BM25 k1={cls.BM25_K1}, b={cls.BM25_B}, RRF k={cls.RRF_K})")
+        print(f"Pipeline Batch: {cls.PIPELINE_BATCH}")
+        print(f"Extraction Workers: {cls.EXTRACTION_WORKERS}")
+        print(f"PDF Backend: {cls.PDF_BACKEND} (OCR: {cls.OCR_ENABLED}, lang={cls.OCR_LANG})")
+        print(f"Page Extraction Workers: {cls.PAGE_EXTRACTION_WORKERS} (PDF >= {cls.PARALLEL_PAGE_MIN_PAGES} halaman)")
+        print(f"Embedding Batch Docs: {cls.EMBEDDING_BATCH_DOCS}")
+        print(f"LLM Concurrency: {cls.LLM_CONCURRENCY}")
+        print(f"Cohort Retrieval: {cls.COHORT_RETRIEVAL}")
+        print(f"Grading Mode: {cls.GRADING_MODE} (max attempts per sub-rubrik: {cls.SUBRUBRIC_MAX_ATTEMPTS})")
+        print(f"Evidence Token Budget: {cls.EVIDENCE_TOKEN_BUDGET} (~{cls.EVIDENCE_CHARS_PER_TOKEN} chars/token)")
+        print(f"LLM Rate Limit: {cls.LLM_RATE_LIMIT_RPS} req/s (burst {cls.LLM_RATE_LIMIT_BURST})")
+        print(f"LLM Max Retries: {cls.LLM_MAX_RETRIES}")
+        print(f"LLM Streaming: {cls.LLM_STREAMING}")
+        print(f"Cache Folder: {cls.CACHE_FOLDER}")
+        print(f"PDF Cache: {cls.PDF_CACHE_ENABLED} (max {cls.PDF_CACHE_MAX_MB} MB)")
+        print(f"Index Cache: {cls.INDEX_CACHE_ENABLED}")
+        print(f"Rubric Cache: {cls.RUBRIC_CACHE_ENABLED}")
+        print(f"Journal: {cls.JOURNAL_ENABLED} ({cls.JOURNAL_FOLDER})")
+        print(f"Incremental Re-grading: {cls.INCREMENTAL_ENABLED}")
+        print(f"LLM Cache: {cls.LLM_CACHE_ENABLED} (bypass={cls.LLM_CACHE_BYPASS}, ttl {cls.LLM_CACHE_TTL_HOURS} jam, max {cls.LLM_CACHE_MAX_MB} MB)")
         print(f"Log Level: {cls.LOG_LEVEL}")
         print(f"Log File: {cls.LOG_FILE}")
         print("="*60)
@@ -110,50 +310,499 @@ def setup_logging():
     return logger
 
 
+def file_sha256(path: str) -> str:
+    """Hash SHA-256 dari isi file (dibaca per blok)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class PDFTextCache:
+    """
+    Cache hasil ekstraksi PDF di disk.
+
+    Key = hash isi file + versi extractor, jadi file yang sama dengan nama
+    berbeda tetap kena cache. Setiap entry disimpan sebagai JSON gzip.
+    Ukuran total dibatasi dengan eviction LRU (mtime di-update setiap hit).
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json.gz"
+
+    def get(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logging.warning(f"Corrupt PDF cache entry {path.name}, ignoring: {e}")
+            return None
+
+    def put(self, key: str, entry: Dict):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logging.warning(f"Failed to write PDF cache entry {path.name}: {e}")
+            tmp_path.unlink(missing_ok=True)
+            return
+        self._evict()
+
+    def _evict(self):
+        """Hapus entry paling lama dipakai sampai ukuran total <= max_bytes"""
+        entries = []
+        total = 0
+        for path in self.cache_dir.glob("*.json.gz"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logging.debug(f"Evicted PDF cache entry: {path.name}")
+
+
+class PDFBackend:
+    """
+    Interface backend ekstraksi teks PDF.
+
+    Subclass cukup mengimplementasikan page_count, extract_page dan close.
+    Backend dengan dependency opsional menyebutkan nama modulnya di `module`.
+    """
+
+    name = ""
+    module = ""
+
+    @classmethod
+    def is_available(cls) -> bool:
+        return not cls.module or importlib.util.find_spec(cls.module) is not None
+
+    def __init__(self, pdf_path: str):
+        self.pdf_path = pdf_path
+
+    def page_count(self) -> int:
+        raise NotImplementedError
+
+    def extract_page(self, index: int) -> str:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class PyPDF2Backend(PDFBackend):
+    name = "pypdf2"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        from PyPDF2 import PdfReader
+        self.reader = PdfReader(pdf_path)
+
+    def page_count(self) -> int:
+        return len(self.reader.pages)
+
+    def extract_page(self, index: int) -> str:
+        return self.reader.pages[index].extract_text() or ""
+
+
+class PdfPlumberBackend(PDFBackend):
+    name = "pdfplumber"
+    module = "pdfplumber"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pdfplumber
+        self.pdf = pdfplumber.open(pdf_path)
+
+    def page_count(self) -> int:
+        return len(self.pdf.pages)
+
+    def extract_page(self, index: int) -> str:
+        page = self.pdf.pages[index]
+        text = page.extract_text() or ""
+        page.flush_cache()
+        return text
+
+    def close(self):
+        self.pdf.close()
+
+
+class PyMuPDFBackend(PDFBackend):
+    name = "pymupdf"
+    module = "fitz"
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import fitz
+        self.doc = fitz.open(pdf_path)
+
+    def page_count(self) -> int:
+        return self.doc.page_count
+
+    def extract_page(self, index: int) -> str:
+        return self.doc[index].get_text() or ""
+
+    def close(self):
+        self.doc.close()
+
+
+class TesseractOCRBackend(PDFBackend):
+    """OCR untuk halaman tanpa text layer (render via pdfplumber, OCR via pytesseract)"""
+
+    name = "ocr"
+    module = "pytesseract"
+
+    @classmethod
+    def is_available(cls) -> bool:
+        if not super().is_available() or importlib.util.find_spec("pdfplumber") is None:
+            return False
+        import pytesseract
+        try:
+            pytesseract.get_tesseract_version()
+        except Exception:
+            return False
+        return True
+
+    def __init__(self, pdf_path: str):
+        super().__init__(pdf_path)
+        import pdfplumber
+        self.pdf = pdfplumber.open(pdf_path)
+
+    def page_count(self) -> int:
+        return len(self.pdf.pages)
+
+    def extract_page(self, index: int) -> str:
+        import pytesseract
+        image = self.pdf.pages[index].to_image(resolution=300).original
+        return pytesseract.image_to_string(image, lang=Config.OCR_LANG) or ""
+
+    def close(self):
+        self.pdf.close()
+
+
+# Urutan = prioritas jika waktu probe sama
+PDF_BACKENDS = {
+    PyMuPDFBackend.name: PyMuPDFBackend,
+    PyPDF2Backend.name: PyPDF2Backend,
+    PdfPlumberBackend.name: PdfPlumberBackend,
+}
+
+
+def _iter_page_range(pdf_path: str, start: int, end: int,
+                     backend_name: str = PyPDF2Backend.name) -> Iterator[Tuple[Optional[Dict], List[Dict]]]:
+    """
+    Ekstrak halaman [start, end) dengan backend tertentu; halaman tanpa teks
+    di-OCR jika OCR tersedia.
+
+    Yields:
+        (page entry atau None jika kosong, timing per backend untuk halaman itu)
+    """
+    backend = PDF_BACKENDS[backend_name](pdf_path)
+    ocr = None
+    ocr_available = None
+
+    try:
+        for i in range(start, end):
+            t0 = time.perf_counter()
+            text = backend.extract_page(i)
+            timings = [{'page_num': i + 1, 'backend': backend_name, 'seconds': time.perf_counter() - t0}]
+
+            if not text.strip() and Config.OCR_ENABLED:
+                if ocr_available is None:
+                    ocr_available = TesseractOCRBackend.is_available()
+                if ocr_available:
+                    ocr = ocr or TesseractOCRBackend(pdf_path)
+                    t0 = time.perf_counter()
+                    text = ocr.extract_page(i)
+                    timings.append({'page_num': i + 1, 'backend': ocr.name, 'seconds': time.perf_counter() - t0})
+
+            yield PDFExtractor._page_entry(i, text), timings
+    finally:
+        backend.close()
+        if ocr:
+            ocr.close()
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int,
+                        backend_name: str = PyPDF2Backend.name) -> Tuple[List[Dict], List[Dict]]:
+    """Versi list dari _iter_page_range untuk dijalankan di worker process"""
+    pages = []
+    all_timings = []
+    for entry, timings in _iter_page_range(pdf_path, start, end, backend_name):
+        all_timings.extend(timings)
+        if entry:
+            pages.append(entry)
+    return pages, all_timings
+
+
 class PDFExtractor:
     """Ekstraksi teks dari PDF dengan metadata"""
 
+    EXTRACTOR_VERSION = "multi-backend-v2"
+
+    # Backend hasil probe per producer PDF (mode auto), berlaku selama proses berjalan
+    _backend_choices: Dict[str, str] = {}
+    _backend_choices_lock = threading.Lock()
+
+    @staticmethod
+    def _get_cache() -> Optional[PDFTextCache]:
+        if not Config.PDF_CACHE_ENABLED:
+            return None
+        return PDFTextCache(
+            str(Path(Config.CACHE_FOLDER) / "pdf_text"),
+            int(Config.PDF_CACHE_MAX_MB * 1024 * 1024)
+        )
+
+    @staticmethod
+    def extractor_spec() -> str:
+        """Versi extractor + backend + OCR, untuk key cache teks PDF / manifest"""
+        ocr = f"ocr-{Config.OCR_LANG}" if Config.OCR_ENABLED else "no-ocr"
+        return f"{PDFExtractor.EXTRACTOR_VERSION}-{Config.PDF_BACKEND}-{ocr}"
+
+    @staticmethod
+    def _page_entry(page_index: int, text: Optional[str]) -> Optional[Dict]:
+        text = (text or "").strip()
+        if not text:
+            return None
+        return {'page_num': page_index + 1, 'text': text}
+
+    @staticmethod
+    def _producer_key(pdf_path: str) -> str:
+        """Producer + creator dari metadata PDF (kosong jika tidak ada)"""
+        try:
+            from PyPDF2 import PdfReader
+            metadata = PdfReader(pdf_path).metadata
+        except Exception:
+            return ""
+        if metadata is None or not (metadata.producer or metadata.creator):
+            return ""
+        return f"{metadata.producer or ''}|{metadata.creator or ''}"
+
+    @staticmethod
+    def _probe_backend(backend_cls, pdf_path: str) -> Tuple[int, int, float]:
+        """Ekstrak PDF_BACKEND_PROBE_PAGES halaman pertama; (jumlah halaman, jumlah karakter, detik per halaman)"""
+        backend = backend_cls(pdf_path)
+        try:
+            n_pages = backend.page_count()
+            n_probe = max(1, min(Config.PDF_BACKEND_PROBE_PAGES, n_pages))
+            t0 = time.perf_counter()
+            chars = sum(len(backend.extract_page(i).strip()) for i in range(n_probe))
+            return n_pages, chars, (time.perf_counter() - t0) / n_probe
+        finally:
+            backend.close()
+
+    @staticmethod
+    def select_backend(pdf_path: str, stats: Optional[Dict] = None) -> Tuple[str, int]:
+        """
+        Pilih backend untuk satu dokumen.
+
+        Pada mode auto, setiap backend yang terinstall mencoba PDF_BACKEND_PROBE_PAGES
+        halaman pertama; backend tercepat yang menghasilkan teks dipilih. Pilihan
+        diingat per producer PDF, sehingga dokumen berikutnya dari tool yang sama
+        hanya dicek dengan backend itu dan di-probe ulang jika tidak menghasilkan teks.
+        PDF tanpa metadata producer selalu di-probe.
+
+        Pilihan disimpan per proses: pada PIPELINE_BATCH setiap worker ekstraksi
+        punya memo sendiri, jadi jumlah probe yang dipakai ulang lebih kecil
+        dibanding run sekuensial.
+
+        Returns:
+            (nama backend, jumlah halaman)
+        """
+        if Config.PDF_BACKEND != "auto":
+            backend = PDF_BACKENDS[Config.PDF_BACKEND](pdf_path)
+            try:
+                return Config.PDF_BACKEND, backend.page_count()
+            finally:
+                backend.close()
+
+        producer = PDFExtractor._producer_key(pdf_path)
+        with PDFExtractor._backend_choices_lock:
+            cached_name = PDFExtractor._backend_choices.get(producer) if producer else None
+
+        if cached_name is not None:
+            try:
+                n_pages, chars, seconds_per_page = PDFExtractor._probe_backend(PDF_BACKENDS[cached_name], pdf_path)
+            except Exception as e:
+                logging.warning(f"PDF backend {cached_name} failed on {pdf_path}: {e}")
+                chars = 0
+
+            if chars > 0:
+                logging.debug(f"Reusing PDF backend '{cached_name}' for {Path(pdf_path).name} (producer {producer!r})")
+                if stats is not None:
+                    stats['probe'] = {cached_name: {'ms_per_page': seconds_per_page * 1000, 'chars': chars}}
+                    stats['probe_reused'] = True
+                return cached_name, n_pages
+            logging.info(f"PDF backend '{cached_name}' produced no text for {Path(pdf_path).name}, re-probing")
+
+        best = None
+        n_pages = 0
+        probe = {}
+
+        for name, backend_cls in PDF_BACKENDS.items():
+            if not backend_cls.is_available():
+                continue
+            try:
+                n_pages, chars, seconds_per_page = PDFExtractor._probe_backend(backend_cls, pdf_path)
+            except Exception as e:
+                logging.warning(f"PDF backend {name} failed on {pdf_path}: {e}")
+                continue
+
+            probe[name] = {'ms_per_page': seconds_per_page * 1000, 'chars': chars}
+            if chars > 0 and (best is None or seconds_per_page < best[1]):
+                best = (name, seconds_per_page)
+
+        selected = best[0] if best else PyPDF2Backend.name
+        logging.info(f"Selected PDF backend '{selected}' for {Path(pdf_path).name}: {probe}")
+        if best and producer:
+            with PDFExtractor._backend_choices_lock:
+                PDFExtractor._backend_choices[producer] = selected
+
+        if stats is not None:
+            stats['probe'] = probe
+        return selected, n_pages
+
+    @staticmethod
+    def iter_pages(pdf_path: str, parallel: bool = True, stats: Optional[Dict] = None) -> Iterator[Dict]:
+        """
+        Yield halaman PDF (yang berisi teks) satu per satu secara lazy.
+
+        PDF dengan >= PARALLEL_PAGE_MIN_PAGES halaman dipecah menjadi beberapa
+        rentang halaman yang diekstrak di worker process; hasilnya tetap di-yield
+        berurutan begitu rentang terdepan selesai.
+
+        Jika stats diberikan, backend terpilih dan waktu ekstraksi per backend dicatat di situ.
+        """
+        stats = stats if stats is not None else {}
+        backend_name, n_pages = PDFExtractor.select_backend(pdf_path, stats)
+        stats['backend'] = backend_name
+        stats.setdefault('backends', {})
+
+        def record(timings: List[Dict]):
+            for timing in timings:
+                entry = stats['backends'].setdefault(timing['backend'], {'pages': 0, 'seconds': 0.0})
+                entry['pages'] += 1
+                entry['seconds'] += timing['seconds']
+
+        workers = Config.PAGE_EXTRACTION_WORKERS
+
+        if not parallel or workers <= 1 or n_pages < Config.PARALLEL_PAGE_MIN_PAGES:
+            for entry, timings in _iter_page_range(pdf_path, 0, n_pages, backend_name):
+                record(timings)
+                if entry:
+                    yield entry
+            return
+
+        range_size = max(8, -(-n_pages // (workers * 2)))
+        ranges = [(start, min(start + range_size, n_pages)) for start in range(0, n_pages, range_size)]
+        logging.info(f"Extracting {n_pages} pages in {len(ranges)} ranges with {workers} workers")
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_extract_page_range, pdf_path, start, end, backend_name)
+                for start, end in ranges
+            ]
+            for future in futures:
+                pages, timings = future.result()
+                record(timings)
+                yield from pages
+
     @staticmethod
-    def extract_text_with_metadata(pdf_path: str) -> Dict:
+    def extract_text_with_metadata(pdf_path: str, parallel: bool = True,
+                                   page_consumer: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
         Ekstrak teks dan metadata dari PDF
 
+        Hasil di-cache berdasarkan hash isi file; jika cache hit,
+        PDF tidak di-parse ulang. page_consumer (opsional) dipanggil untuk
+        setiap halaman begitu tersedia, misalnya StreamingChunker.feed.
+
         Returns:
-            Dict dengan keys: text, filename, page_count, metadata
+            Dict dengan keys: text, filename, page_count, pages, metadata, content_hash, extraction
         """
         try:
+            filename = Path(pdf_path).stem
+            content_hash = file_sha256(pdf_path)
+            cache_key = f"{content_hash}-{PDFExtractor.extractor_spec()}"
+            cache = PDFExtractor._get_cache()
+
+            cached = cache.get(cache_key) if cache else None
+            if cached is not None:
+                logging.info(f"PDF cache hit: {pdf_path}")
+                metadata = cached['metadata'] if cached['filename'] == filename else None
+                if page_consumer:
+                    for page in cached['pages']:
+                        page_consumer(page)
+                result = PDFExtractor._build_result(cached['pages'], filename, content_hash, metadata)
+                result['extraction'] = dict(cached.get('extraction', {}), cached=True)
+                return result
+
             logging.info(f"Extracting PDF: {pdf_path}")
-            reader = PdfReader(pdf_path)
             pages = []
+            stats = {}
 
-            for i, page in enumerate(reader.pages):
-                text = page.extract_text() or ""
-                if text.strip():
-                    pages.append({
-                        'page_num': i + 1,
-                        'text': text.strip()
-                    })
-
-            full_text = "\n".join([p['text'] for p in pages])
+            for page in PDFExtractor.iter_pages(pdf_path, parallel, stats):
+                pages.append(page)
+                if page_consumer:
+                    page_consumer(page)
 
-            filename = Path(pdf_path).stem
-            metadata = PDFExtractor._extract_metadata_from_text(full_text, filename)
+            result = PDFExtractor._build_result(pages, filename, content_hash)
+            result['extraction'] = stats
 
             logging.info(f"Successfully extracted {len(pages)} pages from {filename}")
-            logging.debug(f"Total text length: {len(full_text)} characters")
+            logging.debug(f"Total text length: {len(result['text'])} characters")
+
+            if cache:
+                cache.put(cache_key, {
+                    'filename': filename,
+                    'pages': pages,
+                    'metadata': result['metadata'],
+                    'extraction': stats
+                })
 
-            return {
-                'text': full_text,
-                'filename': filename,
-                'page_count': len(pages),
-                'pages': pages,
-                'metadata': metadata
-            }
+            return result
         except Exception as e:
             logging.error(f"Error extracting {pdf_path}: {e}", exc_info=True)
             print(f"⚠️ Error extracting {pdf_path}: {e}")
             return None
 
+    @staticmethod
+    def _build_result(pages: List[Dict], filename: str, content_hash: str,
+                      metadata: Optional[Dict] = None) -> Dict:
+        full_text = "\n".join([p['text'] for p in pages])
+
+        if metadata is None:
+            metadata = PDFExtractor._extract_metadata_from_text(full_text, filename)
+
+        return {
+            'text': full_text,
+            'filename': filename,
+            'page_count': len(pages),
+            'pages': pages,
+            'metadata': metadata,
+            'content_hash': content_hash
+        }
+
     @staticmethod
     def _extract_metadata_from_text(text: str, filename: str) -> Dict:
         """Ekstrak metadata seperti nama kelompok, NIM, dll dari teks"""
@@ -176,137 +825,1591 @@ class PDFExtractor:
         return metadata
 
 
-class RAGEngine:
-    """RAG Engine dengan FAISS untuk retrieval"""
+class EmbeddingModelRegistry:
+    """
+    Registry model embedding per proses.
+
+    Setiap model hanya di-load sekali (lazy, saat pertama kali diminta) lalu
+    dipakai bersama oleh semua RAGEngine di proses yang sama.
+
+    Dengan EMBEDDING_BACKEND=onnx, model yang sama dijalankan lewat onnxruntime
+    (hasil export ONNX + int8 di CACHE_FOLDER/onnx) dengan interface encode yang sama.
+    """
+
+    _models: Dict[str, Union["SentenceTransformer", OnnxEmbedder]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def model_key(model_name: str) -> str:
+        """
+        Identitas model + backend. Embedding backend ONNX sedikit berbeda dari
+        torch, jadi key cache index / rubrik / manifest ikut membedakannya.
+        """
+        if Config.EMBEDDING_BACKEND != "onnx":
+            return model_name
+        return f"{model_name}|onnx-{'int8' if Config.ONNX_QUANTIZE else 'fp32'}"
 
-    def __init__(self, model_name: str = Config.EMBEDDING_MODEL):
-        self.embedder = SentenceTransformer(model_name)
+    @classmethod
+    def get(cls, model_name: str = Config.EMBEDDING_MODEL) -> Union["SentenceTransformer", OnnxEmbedder]:
+        """Ambil model dari registry, load jika belum ada"""
+        key = cls.model_key(model_name)
+        model = cls._models.get(key)
+        if model is not None:
+            return model
+
+        with cls._lock:
+            model = cls._models.get(key)
+            if model is None:
+                logging.info(f"Loading embedding model: {key}")
+                if Config.EMBEDDING_BACKEND == "onnx":
+                    model = OnnxEmbedder.load_or_export(
+                        model_name, str(Path(Config.CACHE_FOLDER) / "onnx"), Config.ONNX_QUANTIZE, Config.ONNX_THREADS
+                    )
+                else:
+                    from sentence_transformers import SentenceTransformer
+                    model = SentenceTransformer(model_name)
+                cls._models[key] = model
+                logging.info(f"Embedding model loaded: {key}")
+        return model
+
+    @classmethod
+    def warm_up(cls, *model_names: str):
+        """Load model lebih awal agar dokumen pertama tidak menanggung waktu load"""
+        for model_name in model_names or (Config.EMBEDDING_MODEL,):
+            cls.get(model_name)
+
+    @classmethod
+    def is_loaded(cls, model_name: str = Config.EMBEDDING_MODEL) -> bool:
+        return cls.model_key(model_name) in cls._models
+
+    @classmethod
+    def clear(cls):
+        """Lepas semua model dari registry"""
+        with cls._lock:
+            cls._models.clear()
+
+
+class ChunkMetadata:
+    """
+    Provenance chunk dalam array NumPy (bukan list dict per chunk).
+
+    start/end adalah offset karakter chunk di full_text, page_start/page_end
+    nomor halaman asli tempat chunk dimulai dan berakhir (0 jika tidak diketahui).
+    Lookup per chunk O(1) lewat index array.
+    """
+
+    FIELDS = ('start', 'end', 'page_start', 'page_end')
+
+    def __init__(self, start: np.ndarray, end: np.ndarray, page_start: np.ndarray, page_end: np.ndarray):
+        self.start = np.asarray(start, dtype=np.int64)
+        self.end = np.asarray(end, dtype=np.int64)
+        self.page_start = np.asarray(page_start, dtype=np.int32)
+        self.page_end = np.asarray(page_end, dtype=np.int32)
+
+    @classmethod
+    def empty(cls) -> "ChunkMetadata":
+        return cls(*(np.empty(0) for _ in cls.FIELDS))
+
+    @classmethod
+    def from_chunks(cls, text: str, chunks: List[str], pages: Optional[List[Dict]] = None) -> "ChunkMetadata":
+        """
+        Cari offset setiap chunk di text (chunk berurutan, jadi pencarian maju)
+        lalu petakan offset ke halaman. pages harus sama dengan yang digabung
+        menjadi text dengan "\n".join.
+        """
+        spans = []
+        cursor = 0
+        for chunk in chunks:
+            pos = text.find(chunk, cursor)
+            if pos < 0:
+                pos = text.find(chunk)
+            if pos >= 0:
+                spans.append((pos, pos + len(chunk)))
+                cursor = pos + 1
+            else:
+                spans.append((-1, -1))
+
+        return cls.from_spans(spans, pages)
+
+    @classmethod
+    def from_spans(cls, spans: List[Tuple[int, int]], pages: Optional[List[Dict]] = None) -> "ChunkMetadata":
+        """Buat metadata dari offset (start, end) chunk, misalnya hasil RecursiveTextSplitter"""
+        n = len(spans)
+        offsets = np.asarray(spans, dtype=np.int64).reshape(n, 2)
+        start = offsets[:, 0].copy()
+        end = offsets[:, 1].copy()
+
+        page_start = np.zeros(n, dtype=np.int32)
+        page_end = np.zeros(n, dtype=np.int32)
+
+        if pages:
+            page_offsets = np.cumsum([0] + [len(p['text']) + 1 for p in pages[:-1]])
+            page_nums = np.array([p['page_num'] for p in pages], dtype=np.int32)
+            found = start >= 0
+            page_start[found] = page_nums[np.searchsorted(page_offsets, start[found], side='right') - 1]
+            page_end[found] = page_nums[np.searchsorted(page_offsets, end[found] - 1, side='right') - 1]
+
+        return cls(start, end, page_start, page_end)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def get(self, i: int) -> Dict:
+        return {field: int(getattr(self, field)[i]) for field in self.FIELDS}
+
+    def page_label(self, i: int, j: Optional[int] = None) -> Optional[str]:
+        """Label halaman untuk chunk i, atau rentang chunk i..j"""
+        j = i if j is None else j
+        if max(i, j) >= len(self) or self.page_start[i] <= 0:
+            return None
+        if self.page_end[j] > self.page_start[i]:
+            return f"Halaman {self.page_start[i]}-{self.page_end[j]}"
+        return f"Halaman {self.page_start[i]}"
+
+    def save(self, path: Path):
+        with open(path, 'wb') as f:
+            np.savez(f, **{field: getattr(self, field) for field in self.FIELDS})
+
+    @classmethod
+    def load(cls, path: Path) -> "ChunkMetadata":
+        with np.load(path) as data:
+            return cls(*(data[field] for field in cls.FIELDS))
+
+
+class IndexStore:
+    """
+    Penyimpanan index per dokumen di disk.
+
+    Setiap entry berisi chunks (JSON), metadata chunk (.npz), embeddings (.npy,
+    float32 atau kode terkuantisasi sesuai VECTOR_QUANTIZATION) dan FAISS index
+    yang sudah diserialisasi. Saat load, embeddings dan index di-memory-map
+    sehingga tidak perlu encode ulang.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = Path(cache_dir)
+
+    @staticmethod
+    def make_key(content_hash: str, chunk_size: int, chunk_overlap: int, model_name: str,
+                 index_spec: str = "l2") -> str:
+        raw = f"v2|{content_hash}|{chunk_size}|{chunk_overlap}|{model_name}|{index_spec}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+    def load(self, key: str) -> Optional[Tuple[List[str], "ChunkMetadata", QuantizedVectors, "faiss.Index"]]:
+        import faiss
+
+        entry_dir = self.cache_dir / key
+        if not entry_dir.is_dir():
+            return None
+
+        try:
+            with open(entry_dir / "chunks.json", 'r', encoding='utf-8') as f:
+                chunks = json.load(f)
+            chunk_metadata = ChunkMetadata.load(entry_dir / "chunk_meta.npz")
+            vectors = QuantizedVectors.load(entry_dir, "embeddings", mmap=True)
+            mmap_flag = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+            index = faiss.read_index(str(entry_dir / "index.faiss"), mmap_flag)
+        except (OSError, ValueError, RuntimeError) as e:
+            logging.warning(f"Corrupt index store entry {key}, ignoring: {e}")
+            return None
+
+        return chunks, chunk_metadata, vectors, index
+
+    def save(self, key: str, chunks: List[str], chunk_metadata: "ChunkMetadata",
+             vectors: QuantizedVectors, index: "faiss.Index"):
+        import faiss
+
+        entry_dir = self.cache_dir / key
+        if entry_dir.is_dir():
+            return
+
+        tmp_dir = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_dir / "chunks.json", 'w', encoding='utf-8') as f:
+                json.dump(chunks, f, ensure_ascii=False, separators=(',', ':'))
+            chunk_metadata.save(tmp_dir / "chunk_meta.npz")
+            vectors.save(tmp_dir, "embeddings")
+            faiss.write_index(index, str(tmp_dir / "index.faiss"))
+            os.replace(tmp_dir, entry_dir)
+            logging.debug(f"Saved index store entry: {key}")
+        except OSError as e:
+            # Entry sudah ditulis proses lain atau disk bermasalah; cukup lewati
+            logging.debug(f"Skipped saving index store entry {key}: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def choose_index_type(n_vectors: int) -> str:
+    """Pilih tipe index otomatis berdasarkan jumlah vektor"""
+    if n_vectors < Config.ANN_MIN_VECTORS:
+        return "flat"
+    if n_vectors < 500_000:
+        return "hnsw"
+    if n_vectors < 5_000_000:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def _ivf_nlist(n_vectors: int) -> int:
+    nlist = Config.IVF_NLIST or int(4 * np.sqrt(max(n_vectors, 1)))
+    # k-means butuh kira-kira >= 39 titik per centroid
+    return max(1, min(nlist, n_vectors // 39))
+
+
+def _pq_m(dim: int) -> int:
+    """Jumlah sub-quantizer PQ terbesar <= PQ_M yang membagi habis dim"""
+    m = min(Config.PQ_M, dim)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def quantize_vectors(vectors: np.ndarray, quantization: Optional[str] = None,
+                     index: Optional["faiss.Index"] = None) -> QuantizedVectors:
+    """
+    Kuantisasi embeddings untuk disimpan (RAM / IndexStore) sesuai VECTOR_QUANTIZATION.
+
+    Jika index adalah flat SQ/PQ yang sudah di-training, codec-nya dipakai ulang
+    sehingga training (k-means PQ) tidak dijalankan dua kali.
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    quantization = quantization or Config.VECTOR_QUANTIZATION
+    if index is not None and quantization != "none" and isinstance(index, (faiss.IndexScalarQuantizer, faiss.IndexPQ)):
+        return QuantizedVectors.from_trained_codec(vectors, index)
+    return QuantizedVectors.encode(vectors, quantization, _pq_m(vectors.shape[1]), Config.INDEX_TRAIN_SAMPLE)
+
+
+def create_faiss_index(dim: int, metric: str = "l2", index_type: str = "flat",
+                       n_vectors: int = 0, quantization: str = "none") -> "faiss.Index":
+    """
+    Buat FAISS index kosong.
+
+    metric: 'l2' atau 'cosine' (inner product atas vektor ternormalisasi)
+    index_type: 'flat', 'ivf_flat', 'ivf_pq' atau 'hnsw'. Tipe IVF yang datanya
+    terlalu sedikit untuk training jatuh kembali ke 'flat'.
+    quantization: 'none', 'fp16', 'int8' atau 'pq' untuk vektor yang disimpan
+    di index (flat, hnsw, ivf_flat). PQ dengan data terlalu sedikit jatuh ke int8.
+    """
+    import faiss
+
+    faiss_metric = faiss.METRIC_INNER_PRODUCT if metric == "cosine" else faiss.METRIC_L2
+    quantization = QuantizedVectors.effective_mode(quantization, n_vectors)
+    sq_types = {"fp16": faiss.ScalarQuantizer.QT_fp16, "int8": faiss.ScalarQuantizer.QT_8bit}
+
+    if index_type in ("ivf_flat", "ivf_pq"):
+        nlist = _ivf_nlist(n_vectors)
+        min_train = 39 * nlist if index_type == "ivf_flat" else max(39 * nlist, 39 * 256)
+        if n_vectors < min_train or nlist < 2:
+            logging.warning(f"Too few vectors ({n_vectors}) to train {index_type}, using flat index")
+            index_type = "flat"
+
+    if index_type == "hnsw":
+        if quantization in sq_types:
+            index = faiss.IndexHNSWSQ(dim, sq_types[quantization], Config.HNSW_M, faiss_metric)
+        elif quantization == "pq":
+            index = faiss.IndexHNSWPQ(dim, _pq_m(dim), Config.HNSW_M, 8, faiss_metric)
+        else:
+            index = faiss.IndexHNSWFlat(dim, Config.HNSW_M, faiss_metric)
+        index.hnsw.efConstruction = Config.HNSW_EF_CONSTRUCTION
+        return index
+
+    if index_type == "ivf_flat":
+        quantizer = faiss.IndexFlat(dim, faiss_metric)
+        if quantization in sq_types:
+            return faiss.IndexIVFScalarQuantizer(quantizer, dim, nlist, sq_types[quantization], faiss_metric)
+        if quantization == "pq":
+            return faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_m(dim), 8, faiss_metric)
+        return faiss.IndexIVFFlat(quantizer, dim, nlist, faiss_metric)
+
+    if index_type == "ivf_pq":
+        quantizer = faiss.IndexFlat(dim, faiss_metric)
+        return faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_m(dim), 8, faiss_metric)
+
+    if quantization in sq_types:
+        return faiss.IndexScalarQuantizer(dim, sq_types[quantization], faiss_metric)
+    if quantization == "pq":
+        return faiss.IndexPQ(dim, _pq_m(dim), 8, faiss_metric)
+    if metric == "cosine":
+        return faiss.IndexFlatIP(dim)
+    return faiss.IndexFlatL2(dim)
+
+
+def tune_faiss_index(index: "faiss.Index", nprobe: Optional[int] = None,
+                     ef_search: Optional[int] = None) -> "faiss.Index":
+    """Set parameter search (nprobe untuk IVF, efSearch untuk HNSW)"""
+    if hasattr(index, "nprobe"):
+        index.nprobe = min(nprobe or Config.IVF_NPROBE, index.nlist)
+    if hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search or Config.HNSW_EF_SEARCH
+    return index
+
+
+def build_faiss_index(embeddings: np.ndarray, metric: str = "l2",
+                      index_type: Optional[str] = None,
+                      quantization: Optional[str] = None) -> "faiss.Index":
+    """
+    Buat, training (jika perlu), isi dan tuning FAISS index.
+
+    Training memakai sampel acak maksimal INDEX_TRAIN_SAMPLE vektor.
+    """
+    n_vectors, dim = embeddings.shape
+    index_type = index_type or Config.INDEX_TYPE
+    if index_type == "auto":
+        index_type = choose_index_type(n_vectors)
+
+    index = create_faiss_index(dim, metric, index_type, n_vectors, quantization or Config.VECTOR_QUANTIZATION)
+
+    if not index.is_trained:
+        if n_vectors > Config.INDEX_TRAIN_SAMPLE:
+            rng = np.random.default_rng(0)
+            sample = embeddings[np.sort(rng.choice(n_vectors, Config.INDEX_TRAIN_SAMPLE, replace=False))]
+        else:
+            sample = embeddings
+        logging.info(f"Training {index_type} index on {len(sample)} vectors")
+        index.train(np.ascontiguousarray(sample, dtype=np.float32))
+
+    index.add(embeddings)
+    return tune_faiss_index(index)
+
+
+class RAGEngine:
+    """
+    RAG Engine dengan FAISS untuk retrieval
+
+    Metric 'l2' memakai jarak L2 tanpa normalisasi dan tanpa batas skor
+    (SIMILARITY_THRESHOLD diabaikan). Metric 'cosine' menormalisasi
+    embeddings dan memakai inner product, sehingga skor = cosine similarity dan
+    hit di bawah Config.SIMILARITY_THRESHOLD dibuang.
+
+    Jika Config.HYBRID_SEARCH aktif dan teks query tersedia, hasil dense digabung
+    dengan BM25 atas chunk yang sama (reciprocal-rank fusion), sehingga istilah
+    literal seperti "flowchart" atau nama variabel tetap ditemukan. Hit BM25
+    tetap harus lolos SIMILARITY_THRESHOLD (cosine similarity-nya dengan query).
+    """
+
+    def __init__(self, model_name: str = Config.EMBEDDING_MODEL, metric: Optional[str] = None):
+        self.model_name = model_name
+        self.metric = metric or Config.INDEX_METRIC
         self.index = None
+        self.vectors: Optional[QuantizedVectors] = None
         self.chunks = []
-        self.chunk_metadata = []
+        self.chunk_metadata = ChunkMetadata.empty()
+        self.loaded_from_store = False
+        self._lexical_index = None
+        self._lexical_chunks = None
+
+    @property
+    def embedder(self) -> Union["SentenceTransformer", OnnxEmbedder]:
+        """Model embedding dari registry, baru di-load saat benar-benar dipakai"""
+        return EmbeddingModelRegistry.get(self.model_name)
+
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
+        """Embeddings chunk float32 (hasil dekuantisasi jika VECTOR_QUANTIZATION aktif)"""
+        return None if self.vectors is None else self.vectors.decode()
+
+    @property
+    def lexical_index(self) -> BM25Index:
+        """Index BM25 atas self.chunks, dibuat saat pertama dipakai (dan ulang jika chunks diganti)"""
+        if self._lexical_index is None or self._lexical_chunks is not self.chunks:
+            self._lexical_index = BM25Index(self.chunks, Config.BM25_K1, Config.BM25_B)
+            self._lexical_chunks = self.chunks
+        return self._lexical_index
 
     def build_index(self, text: str, chunk_size: int = Config.CHUNK_SIZE,
-                    chunk_overlap: int = Config.CHUNK_OVERLAP):
-        """Build FAISS index dari teks"""
+                    chunk_overlap: int = Config.CHUNK_OVERLAP,
+                    content_hash: Optional[str] = None,
+                    chunks: Optional[List[str]] = None,
+                    pages: Optional[List[Dict]] = None):
+        """
+        Build FAISS index dari teks
+
+        Jika content_hash diberikan, index diambil dari IndexStore bila sudah
+        pernah dibuat dengan dokumen, chunk config dan model yang sama.
+        Jika chunks diberikan (misalnya dari StreamingChunker), teks tidak di-chunk ulang.
+        Jika pages diberikan, setiap chunk dipetakan ke halaman asalnya.
+        """
+        store_key = self._store_key(content_hash, chunk_size, chunk_overlap)
+        if store_key and self._load_from_store(store_key):
+            return
+
         logging.info(f"Building FAISS index with chunk_size={chunk_size}, overlap={chunk_overlap}")
 
-        self.chunks = self._chunk_text(text, chunk_size, chunk_overlap)
+        self._set_chunks(text, chunk_size, chunk_overlap, chunks, pages)
 
         if not self.chunks:
             logging.warning("No chunks created from text")
             print("⚠️ Tidak ada chunks yang dibuat")
             return
 
-        logging.info(f"Created {len(self.chunks)} chunks from text")
+        logging.info(f"Created {len(self.chunks)} chunks from text")
+
+        print(f"📝 Membuat embeddings untuk {len(self.chunks)} chunks...")
+        logging.info(f"Generating embeddings using model: {self.model_name}")
+
+        embeddings = encode_bucketed(
+            self.embedder, self.chunks, Config.EMBEDDING_TOKEN_BUDGET, Config.EMBEDDING_MAX_BATCH
+        )
+        self._add_embeddings(embeddings)
+
+        if store_key:
+            self._save_to_store(store_key)
+
+    @classmethod
+    def build_indexes(cls, texts: List[str], model_name: str = Config.EMBEDDING_MODEL,
+                      chunk_size: int = Config.CHUNK_SIZE,
+                      chunk_overlap: int = Config.CHUNK_OVERLAP,
+                      content_hashes: Optional[List[Optional[str]]] = None,
+                      pages_list: Optional[List[Optional[List[Dict]]]] = None) -> List["RAGEngine"]:
+        """
+        Build index untuk beberapa dokumen sekaligus.
+
+        Dokumen yang sudah ada di IndexStore langsung di-load; chunk dari
+        sisanya dijadwalkan bersama per panjang token (satu forward pass bisa
+        berisi chunk dari beberapa dokumen), lalu dipecah kembali ke index
+        masing-masing dokumen.
+        """
+        engines = [cls(model_name) for _ in texts]
+        content_hashes = content_hashes or [None] * len(texts)
+        pages_list = pages_list or [None] * len(texts)
+
+        pending = []
+        for engine, text, content_hash, pages in zip(engines, texts, content_hashes, pages_list):
+            store_key = engine._store_key(content_hash, chunk_size, chunk_overlap)
+            if store_key and engine._load_from_store(store_key):
+                continue
+            engine._set_chunks(text, chunk_size, chunk_overlap, pages=pages)
+            pending.append((engine, store_key))
+
+        n_chunks = sum(len(engine.chunks) for engine, _ in pending)
+        if not n_chunks:
+            return engines
+
+        logging.info(f"Encoding {n_chunks} chunks from {len(pending)} documents in shared batches")
+        embeddings_per_doc = encode_groups(
+            EmbeddingModelRegistry.get(model_name), [engine.chunks for engine, _ in pending],
+            Config.EMBEDDING_TOKEN_BUDGET, Config.EMBEDDING_MAX_BATCH
+        )
+
+        for (engine, store_key), embeddings in zip(pending, embeddings_per_doc):
+            if len(engine.chunks):
+                engine._add_embeddings(embeddings)
+                if store_key:
+                    engine._save_to_store(store_key)
+
+        return engines
+
+    def _set_chunks(self, text: str, chunk_size: int, chunk_overlap: int,
+                    chunks: Optional[List[str]] = None, pages: Optional[List[Dict]] = None):
+        """Set chunks + metadata; offset diambil langsung dari splitter bila teks di-chunk di sini"""
+        if chunks is not None:
+            self.chunks = chunks
+            self.chunk_metadata = ChunkMetadata.from_chunks(text, chunks, pages)
+            return
+
+        spans = self._chunk_spans(text, chunk_size, chunk_overlap)
+        self.chunks = [text[start:end] for start, end in spans]
+        self.chunk_metadata = ChunkMetadata.from_spans(spans, pages)
+
+    def _add_embeddings(self, embeddings: np.ndarray):
+        """Buat FAISS index dari embeddings chunk"""
+        embeddings = self._prepare_vectors(embeddings)
+
+        dim = embeddings.shape[1]
+        self.index = build_faiss_index(embeddings, self.metric)
+        self.vectors = quantize_vectors(embeddings, index=self.index)
+
+        logging.info(f"FAISS index built successfully with {self.index.ntotal} vectors, dimension={dim}")
+        print(f"✅ Index berhasil dibuat dengan {self.index.ntotal} vectors")
+
+    @staticmethod
+    def _get_store() -> Optional[IndexStore]:
+        if not Config.INDEX_CACHE_ENABLED:
+            return None
+        return IndexStore(str(Path(Config.CACHE_FOLDER) / "index"))
+
+    def _store_key(self, content_hash: Optional[str], chunk_size: int, chunk_overlap: int) -> Optional[str]:
+        if not content_hash or not Config.INDEX_CACHE_ENABLED:
+            return None
+        return IndexStore.make_key(
+            content_hash, chunk_size, chunk_overlap, EmbeddingModelRegistry.model_key(self.model_name),
+            Config.index_spec(self.metric)
+        )
+
+    def _load_from_store(self, store_key: str) -> bool:
+        entry = self._get_store().load(store_key)
+        if entry is None:
+            return False
+
+        self.chunks, self.chunk_metadata, self.vectors, self.index = entry
+        self.loaded_from_store = True
+        tune_faiss_index(self.index)
+        logging.info(f"Loaded FAISS index from store: {store_key} ({self.index.ntotal} vectors)")
+        print(f"✅ Index dimuat dari cache ({self.index.ntotal} vectors)")
+        return True
+
+    def _save_to_store(self, store_key: str):
+        self._get_store().save(store_key, self.chunks, self.chunk_metadata, self.vectors, self.index)
+
+    def _prepare_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        """Konversi ke float32 contiguous; pada metric cosine juga dinormalisasi L2"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.metric == "cosine":
+            import faiss
+            vectors = vectors.copy()
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _min_score(self) -> Optional[float]:
+        """Threshold similarity hanya bermakna untuk metric cosine"""
+        return Config.SIMILARITY_THRESHOLD if self.metric == "cosine" else None
+
+    def _to_scores(self, D: np.ndarray) -> np.ndarray:
+        """Skor similarity (lebih besar = lebih relevan): cosine apa adanya, L2 dinegasikan"""
+        return D if self.metric == "cosine" else -D
+
+    def search(self, query: str, k: int = Config.TOP_K_RETRIEVAL) -> List[str]:
+        """Search relevant chunks"""
+        return [chunk for chunk, _ in self.search_with_scores(query, k)]
+
+    def search_with_scores(self, query: str, k: int = Config.TOP_K_RETRIEVAL) -> List[Tuple[str, float]]:
+        """Search relevant chunks beserta skor similarity-nya"""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+
+        q_emb = self.embedder.encode([query], convert_to_numpy=True)
+        return self.search_embeddings_grouped_with_scores(q_emb, [1], k, [query])[0]
+
+    def search_multi_query(self, queries: List[str], k: int = 3) -> List[str]:
+        """
+        Search dengan multiple queries dan gabungkan hasilnya
+        Berguna untuk mendapatkan evidence lebih comprehensive
+
+        Dengan HYBRID_SEARCH, ranking dense dan BM25 dari semua query digabung
+        dengan reciprocal-rank fusion (maksimal k * len(queries) chunk).
+        """
+        if not queries:
+            return []
+        return self.search_batch([queries], k)[0]
+
+    def search_batch(self, query_groups: List[List[str]], k: int = 3) -> List[List[str]]:
+        """
+        Versi batch dari search_multi_query untuk banyak grup query sekaligus.
+
+        Semua query di-encode dalam satu panggilan encode dan dicari dengan satu
+        index.search multi-row, lalu hasilnya dikembalikan per grup (urutan dan
+        dedupe sama dengan search_multi_query).
+        """
+        flat_queries = [query for group in query_groups for query in group]
+        if not flat_queries or self.index is None or self.index.ntotal == 0:
+            return [[] for _ in query_groups]
+
+        q_embs = self.embedder.encode(flat_queries, convert_to_numpy=True, show_progress_bar=False)
+        return self.search_embeddings_grouped(q_embs, [len(group) for group in query_groups], k, flat_queries)
+
+    def search_embeddings_grouped(self, q_embs: np.ndarray, group_sizes: List[int],
+                                  k: int = 3, queries: Optional[List[str]] = None) -> List[List[str]]:
+        """Search dengan query embeddings yang sudah jadi, hasil di-scatter per grup"""
+        return [
+            [chunk for chunk, _ in hits]
+            for hits in self.search_embeddings_grouped_with_scores(q_embs, group_sizes, k, queries)
+        ]
+
+    def search_embeddings_grouped_with_scores(self, q_embs: np.ndarray, group_sizes: List[int],
+                                              k: int = 3, queries: Optional[List[str]] = None
+                                              ) -> List[List[Tuple[str, float]]]:
+        """Seperti search_embeddings_grouped, tetapi setiap hit disertai skor similarity"""
+        return [
+            [(self.chunks[i], score) for i, score in hits]
+            for hits in self.search_embeddings_grouped_hits(q_embs, group_sizes, k, queries)
+        ]
+
+    def search_embeddings_grouped_hits(self, q_embs: np.ndarray, group_sizes: List[int],
+                                       k: int = 3, queries: Optional[List[str]] = None
+                                       ) -> List[List[Tuple[int, float]]]:
+        """
+        Seperti search_embeddings_grouped_with_scores, tetapi hit berupa (chunk id, skor).
+
+        queries (teks query, urutan sama dengan baris q_embs) mengaktifkan hybrid
+        search bila Config.HYBRID_SEARCH; skor hit kemudian berupa skor RRF.
+        """
+        if self.index is None or self.index.ntotal == 0:
+            return [[] for _ in group_sizes]
+
+        k = min(k, self.index.ntotal)
+        q_embs = self._prepare_vectors(q_embs)
+        D, I = self.index.search(q_embs, k)
+        min_score = self._min_score()
+
+        if queries is not None and Config.HYBRID_SEARCH:
+            _, lexical_I = self.lexical_index.search_batch(queries, k)
+            lexical_dense_S = None
+            if min_score is not None:
+                valid = lexical_I >= 0
+                rows = self.vectors.decode_rows(np.where(valid, lexical_I, 0).ravel())
+                lexical_dense_S = np.einsum('rkd,rd->rk', rows.reshape(lexical_I.shape + (-1,)), q_embs)
+                lexical_dense_S[~valid] = -np.inf
+            return self._fuse_hits(I, self._to_scores(D), lexical_I, self.chunks, group_sizes, k,
+                                   min_score, lexical_dense_S)
+        return self._group_hits(I, self._to_scores(D), self.chunks, group_sizes, min_score)
+
+    def format_evidence(self, chunk_id: int) -> str:
+        """Teks chunk dengan label halaman asalnya (jika diketahui)"""
+        label = self.chunk_metadata.page_label(chunk_id)
+        chunk = self.chunks[chunk_id]
+        return f"[{label}]\n{chunk}" if label else chunk
+
+    @staticmethod
+    def _group_hits(I: np.ndarray, S: np.ndarray, chunks: List[str], group_sizes: List[int],
+                    min_score: Optional[float] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Gabungkan hasil search per baris query menjadi list (chunk id, skor) unik per grup.
+        Hit dengan skor di bawah min_score dibuang.
+        """
+        results = []
+        row = 0
+        for size in group_sizes:
+            group_results = []
+            seen = set()
+            for ids, scores in zip(I[row:row + size], S[row:row + size]):
+                for i, score in zip(ids, scores):
+                    if not 0 <= i < len(chunks):
+                        continue
+                    if min_score is not None and score < min_score:
+                        continue
+                    chunk = chunks[i]
+                    if chunk not in seen:
+                        group_results.append((int(i), float(score)))
+                        seen.add(chunk)
+            results.append(group_results)
+            row += size
+
+        return results
+
+    @staticmethod
+    def _fuse_hits(dense_I: np.ndarray, dense_S: np.ndarray, lexical_I: np.ndarray, chunks: List[str],
+                   group_sizes: List[int], k: int, min_score: Optional[float] = None,
+                   lexical_dense_S: Optional[np.ndarray] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Reciprocal-rank fusion per grup: setiap baris query menyumbang satu ranking
+        dense dan satu ranking BM25. Hasil per grup maksimal k * ukuran grup, unik
+        per teks chunk, skor = skor RRF.
+
+        min_score berlaku untuk semua hit: hit dense memakai skornya sendiri, hit
+        BM25 memakai lexical_dense_S (similarity dense query dengan chunk hit BM25,
+        shape sama dengan lexical_I) sehingga chunk yang hanya cocok secara literal
+        tetap melewati relevance gate yang sama.
+        """
+        results = []
+        row = 0
+        for size in group_sizes:
+            rankings = []
+            for r in range(row, row + size):
+                rankings.append([
+                    int(i) for i, score in zip(dense_I[r], dense_S[r])
+                    if 0 <= i < len(chunks) and (min_score is None or score >= min_score)
+                ])
+                rankings.append([
+                    int(i) for j, i in enumerate(lexical_I[r])
+                    if 0 <= i < len(chunks)
+                    and (min_score is None or lexical_dense_S is None or lexical_dense_S[r, j] >= min_score)
+                ])
+
+            group_results = []
+            seen = set()
+            for i, score in reciprocal_rank_fusion(rankings, Config.RRF_K):
+                if chunks[i] not in seen:
+                    group_results.append((i, score))
+                    seen.add(chunks[i])
+            results.append(group_results[:k * size])
+            row += size
+
+        return results
+
+    @staticmethod
+    def _chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+        """Chunk text dengan RecursiveTextSplitter"""
+        return [text[start:end] for start, end in RAGEngine._chunk_spans(text, chunk_size, chunk_overlap)]
+
+    @staticmethod
+    def _chunk_spans(text: str, chunk_size: int, chunk_overlap: int) -> List[Tuple[int, int]]:
+        """Offset (start, end) setiap chunk di text"""
+        if not text:
+            return []
+        return RecursiveTextSplitter(chunk_size, chunk_overlap).split_offsets(text)
+
+
+class StreamingChunker:
+    """
+    Chunking inkremental untuk halaman yang datang satu per satu.
+
+    Halaman digabung dengan "\n" seperti full_text dan diteruskan ke
+    IncrementalSplitter, yang memfinalisasi chunk begitu batas potongan
+    tingkat teratas di depannya sudah pasti. Hasilnya identik dengan
+    RAGEngine._chunk_text pada teks gabungan, sehingga index yang dibuat dari
+    jalur streaming dan jalur teks penuh bisa berbagi entry IndexStore.
+    """
+
+    def __init__(self, chunk_size: int = Config.CHUNK_SIZE, chunk_overlap: int = Config.CHUNK_OVERLAP):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.splitter = IncrementalSplitter(RecursiveTextSplitter(chunk_size, chunk_overlap))
+        self._first_page = True
+
+    @property
+    def chunks(self) -> List[str]:
+        """Chunk yang sudah final sejauh ini"""
+        return self.splitter.chunks
+
+    def feed(self, page: Dict):
+        """Tambahkan satu halaman (dict dengan key 'text')"""
+        self.splitter.feed(page['text'] if self._first_page else "\n" + page['text'])
+        self._first_page = False
+
+    def finish(self) -> List[str]:
+        """Split sisa buffer dan kembalikan semua chunk"""
+        self.splitter.finish()
+        return self.splitter.chunks
+
+
+class CohortRAGEngine:
+    """
+    Satu index untuk semua chunk dari semua dokumen dalam satu batch (cohort).
+
+    Setiap chunk ditandai dengan doc id (posisi dokumen saat ditambahkan), dan
+    chunk tiap dokumen disimpan berurutan sehingga top-k per dokumen bisa
+    diambil dari satu perhitungan skor untuk seluruh cohort.
+
+    Dengan VECTOR_QUANTIZATION, vektor cohort disimpan terkuantisasi dan
+    didekode per blok dokumen (maksimal SCORE_BLOCK_VECTORS) saat scoring,
+    sehingga cohort besar tidak perlu ada di RAM sebagai float32. Codec int8/PQ
+    di-training per dokumen, jadi kode tiap dokumen dipakai apa adanya (tidak
+    dikuantisasi ulang) dan skornya sama dengan search per dokumen.
+
+    Retrieval batch (search_embeddings_grouped_*) adalah scoring exact per
+    dokumen dan tidak memakai FAISS. Index FAISS cohort (INDEX_TYPE, nprobe,
+    efSearch) hanya dibuat saat search() lintas dokumen pertama kali dipanggil.
+    """
+
+    SCORE_BLOCK_VECTORS = 65536
+
+    def __init__(self, model_name: str = Config.EMBEDDING_MODEL, metric: Optional[str] = None):
+        self.model_name = model_name
+        self.metric = metric or Config.INDEX_METRIC
+        self._index = None
+        self.segments: List[QuantizedVectors] = []
+        self.segment_offsets = np.zeros(1, dtype=np.int64)
+        self.chunks = []
+        self.doc_ids = np.empty(0, dtype=np.int32)
+        self.doc_offsets = np.zeros(1, dtype=np.int64)
+        self.lexical_indexes: List[Optional[BM25Index]] = []
+
+    @classmethod
+    def from_engines(cls, engines: List[RAGEngine]) -> "CohortRAGEngine":
+        """Gabungkan index per dokumen (hasil build_index / IndexStore) menjadi satu cohort"""
+        if engines:
+            cohort = cls(engines[0].model_name, engines[0].metric)
+        else:
+            cohort = cls()
+
+        sizes = [len(e.chunks) if e.vectors is not None else 0 for e in engines]
+        cohort.doc_offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        cohort.doc_ids = np.repeat(np.arange(len(engines), dtype=np.int32), sizes)
+        cohort.chunks = [chunk for e, n in zip(engines, sizes) if n for chunk in e.chunks]
+        # BM25 tetap per dokumen (idf dokumen itu sendiri), sama dengan RAGEngine
+        cohort.lexical_indexes = [e.lexical_index if n and Config.HYBRID_SEARCH else None
+                                  for e, n in zip(engines, sizes)]
+
+        doc_vectors = [e.vectors for e, n in zip(engines, sizes) if n]
+        modes = {vectors.mode for vectors in doc_vectors}
+        if len(modes) == 1 and modes <= {"none", "fp16"}:
+            # Kode none/fp16 tidak bergantung pada data dokumen: digabung tanpa mengubah skor
+            embeddings = np.concatenate([vectors.decode() for vectors in doc_vectors])
+            cohort.segments = [quantize_vectors(embeddings, modes.pop())]
+        else:
+            cohort.segments = doc_vectors
+        cohort.segment_offsets = np.concatenate(
+            [[0], np.cumsum([len(vectors) for vectors in cohort.segments])]
+        ).astype(np.int64)
+
+        logging.info(f"Cohort built: {len(engines)} documents, {len(cohort.chunks)} chunks")
+        return cohort
+
+    @property
+    def index(self) -> Optional["faiss.Index"]:
+        """FAISS index seluruh cohort untuk search(), dibuat saat pertama dipakai"""
+        if self._index is None and self.chunks:
+            logging.info(f"Building cohort FAISS index: {len(self.chunks)} chunks")
+            self._index = build_faiss_index(self._decode(0, len(self.chunks)), self.metric)
+        return self._index
+
+    @property
+    def num_documents(self) -> int:
+        return len(self.doc_offsets) - 1
+
+    def _prepare_vectors(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.metric == "cosine":
+            import faiss
+            vectors = vectors.copy()
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    def _min_score(self) -> Optional[float]:
+        return Config.SIMILARITY_THRESHOLD if self.metric == "cosine" else None
+
+    def _decode(self, start: int, end: int) -> np.ndarray:
+        """Vektor float32 baris cohort [start, end), didekode dengan codec segmen masing-masing"""
+        parts = []
+        for segment, seg_start in zip(self.segments, self.segment_offsets):
+            seg_end = seg_start + len(segment)
+            if seg_end > start and seg_start < end:
+                parts.append(segment.decode(max(start, seg_start) - seg_start, min(end, seg_end) - seg_start))
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else self.segments[0].decode(0, 0)
+
+    def search(self, query: str, k: int = Config.TOP_K_RETRIEVAL) -> List[Tuple[int, str, float]]:
+        """Search di seluruh cohort, hasil berupa (doc_id, chunk, skor)"""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+
+        k = min(k, self.index.ntotal)
+        q_emb = EmbeddingModelRegistry.get(self.model_name).encode([query], convert_to_numpy=True)
+        D, I = self.index.search(self._prepare_vectors(q_emb), k)
+        scores = D[0] if self.metric == "cosine" else -D[0]
+        min_score = self._min_score()
+
+        return [
+            (int(self.doc_ids[i]), self.chunks[i], float(score))
+            for i, score in zip(I[0], scores)
+            if 0 <= i < len(self.chunks) and (min_score is None or score >= min_score)
+        ]
+
+    def search_embeddings_grouped(self, q_embs: np.ndarray, group_sizes: List[int],
+                                  k: int = 3) -> List[List[List[str]]]:
+        """
+        Search semua query rubrik sekali untuk seluruh cohort.
+
+        Returns:
+            Per dokumen, list chunk per grup query (format sama dengan
+            RAGEngine.search_embeddings_grouped)
+        """
+        return [
+            [[chunk for chunk, _ in hits] for hits in doc_hits]
+            for doc_hits in self.search_embeddings_grouped_with_scores(q_embs, group_sizes, k)
+        ]
+
+    def search_embeddings_grouped_with_scores(self, q_embs: np.ndarray, group_sizes: List[int],
+                                              k: int = 3) -> List[List[List[Tuple[str, float]]]]:
+        """Seperti search_embeddings_grouped, tetapi setiap hit disertai skor similarity"""
+        return [
+            [[(self.chunks[self.doc_offsets[doc_id] + i], score) for i, score in hits] for hits in doc_hits]
+            for doc_id, doc_hits in enumerate(self.search_embeddings_grouped_hits(q_embs, group_sizes, k))
+        ]
+
+    def search_embeddings_grouped_hits(self, q_embs: np.ndarray, group_sizes: List[int],
+                                       k: int = 3, queries: Optional[List[str]] = None
+                                       ) -> List[List[List[Tuple[int, float]]]]:
+        """
+        Hit per dokumen berupa (chunk id lokal dokumen, skor). Chunk id lokal sama
+        dengan index chunk di RAGEngine dokumen tersebut. Dengan queries dan
+        HYBRID_SEARCH, hit dense digabung dengan BM25 dokumen tersebut (RRF).
+        """
+        if not self.chunks:
+            return [[[] for _ in group_sizes] for _ in range(self.num_documents)]
+
+        q_embs = self._prepare_vectors(q_embs)
+        min_score = self._min_score()
+        results = []
+        for doc_id, segment in self._iter_doc_scores(q_embs):
+            start, end = int(self.doc_offsets[doc_id]), int(self.doc_offsets[doc_id + 1])
+            if start == end:
+                results.append([[] for _ in group_sizes])
+                continue
+
+            kk = min(k, end - start)
+            top = np.argpartition(-segment, kk - 1, axis=1)[:, :kk]
+            top_scores = np.take_along_axis(segment, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind='stable')
+            ids = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            lexical_index = self.lexical_indexes[doc_id] if self.lexical_indexes else None
+            if queries is not None and lexical_index is not None:
+                _, lexical_ids = lexical_index.search_batch(queries, kk)
+                lexical_dense_S = None
+                if min_score is not None:
+                    lexical_dense_S = np.take_along_axis(segment, np.maximum(lexical_ids, 0), axis=1)
+                    lexical_dense_S[lexical_ids < 0] = -np.inf
+                results.append(RAGEngine._fuse_hits(
+                    ids, top_scores, lexical_ids, self.chunks[start:end], group_sizes, kk, min_score,
+                    lexical_dense_S
+                ))
+                continue
+
+            results.append(RAGEngine._group_hits(
+                ids, top_scores, self.chunks[start:end], group_sizes, min_score
+            ))
+
+        return results
+
+    def _iter_doc_scores(self, q_embs: np.ndarray) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Skor similarity (doc_id, matrix query x chunk dokumen) untuk setiap dokumen.
+        Vektor didekode per blok dokumen berurutan, satu perkalian matrix per blok.
+        """
+        q_sq_norms = np.einsum('ij,ij->i', q_embs, q_embs) if self.metric != "cosine" else None
+        doc_id = 0
+        while doc_id < self.num_documents:
+            block_start = int(self.doc_offsets[doc_id])
+            block_end_doc = doc_id + 1
+            while (block_end_doc < self.num_documents
+                   and self.doc_offsets[block_end_doc + 1] - block_start <= self.SCORE_BLOCK_VECTORS):
+                block_end_doc += 1
+
+            block = self._decode(block_start, int(self.doc_offsets[block_end_doc]))
+            if self.metric == "cosine":
+                scores = q_embs @ block.T
+            else:
+                sq_norms = np.einsum('ij,ij->i', block, block)
+                scores = 2.0 * (q_embs @ block.T) - sq_norms[None, :] - q_sq_norms[:, None]
+
+            for d in range(doc_id, block_end_doc):
+                start, end = int(self.doc_offsets[d]) - block_start, int(self.doc_offsets[d + 1]) - block_start
+                yield d, scores[:, start:end]
+            doc_id = block_end_doc
+
+
+class CompiledRubric:
+    """
+    Rubrik yang query retrieval-nya sudah di-embed.
+
+    Query hanya bergantung pada rubrik, jadi embeddings-nya (matrix float32
+    contiguous) cukup dibuat sekali dan dipakai untuk semua dokumen. Hasilnya
+    juga disimpan di disk dengan key hash rubrik JSON + nama model.
+    """
+
+    def __init__(self, rubric_data: Dict, model_name: str, query_groups: List[List[str]],
+                 query_embeddings: np.ndarray, rubric_hash: str):
+        self.rubric_data = rubric_data
+        self.model_name = model_name
+        self.query_groups = query_groups
+        self.group_sizes = [len(group) for group in query_groups]
+        self.flat_queries = [query for group in query_groups for query in group]
+        self.query_embeddings = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+        self.rubric_hash = rubric_hash
+
+    @staticmethod
+    def compute_hash(rubric_data: Dict, model_name: str) -> str:
+        rubric_json = json.dumps(rubric_data, sort_keys=True, ensure_ascii=False)
+        model_key = EmbeddingModelRegistry.model_key(model_name)
+        return hashlib.sha256(f"{rubric_json}|{model_key}".encode('utf-8')).hexdigest()[:32]
+
+    @classmethod
+    def build(cls, rubric_data: Dict, query_groups: List[List[str]],
+              model_name: str = Config.EMBEDDING_MODEL) -> "CompiledRubric":
+        """Embed semua query rubrik, atau load dari cache disk jika ada"""
+        rubric_hash = cls.compute_hash(rubric_data, model_name)
+        cache_dir = Path(Config.CACHE_FOLDER) / "rubric"
+        embeddings_path = cache_dir / f"{rubric_hash}.npy"
+        queries_path = cache_dir / f"{rubric_hash}.json"
+
+        if Config.RUBRIC_CACHE_ENABLED and embeddings_path.exists() and queries_path.exists():
+            try:
+                with open(queries_path, 'r', encoding='utf-8') as f:
+                    cached_groups = json.load(f)
+                if cached_groups == query_groups:
+                    embeddings = np.load(embeddings_path)
+                    logging.info(f"Loaded rubric query embeddings from cache: {rubric_hash}")
+                    return cls(rubric_data, model_name, query_groups, embeddings, rubric_hash)
+            except (OSError, ValueError) as e:
+                logging.warning(f"Corrupt rubric cache entry {rubric_hash}, ignoring: {e}")
+
+        flat_queries = [query for group in query_groups for query in group]
+        logging.info(f"Encoding {len(flat_queries)} rubric queries with model: {model_name}")
+        embeddings = EmbeddingModelRegistry.get(model_name).encode(
+            flat_queries,
+            convert_to_numpy=True,
+            show_progress_bar=False
+        )
+        compiled = cls(rubric_data, model_name, query_groups, embeddings, rubric_hash)
+
+        if Config.RUBRIC_CACHE_ENABLED:
+            try:
+                cache_dir.mkdir(parents=True, exist_ok=True)
+                np.save(embeddings_path, compiled.query_embeddings)
+                with open(queries_path, 'w', encoding='utf-8') as f:
+                    json.dump(query_groups, f, ensure_ascii=False)
+            except OSError as e:
+                logging.warning(f"Failed to write rubric cache entry {rubric_hash}: {e}")
+
+        return compiled
+
+
+class EvidencePacker:
+    """
+    Pilih evidence untuk prompt dalam batas token, bukan sekadar 10 chunk pertama.
+
+    Setiap sub-rubrik mendapat jatah budget yang sama dan diisi bergiliran
+    menurut peringkat retrieval; sisa budget dibagikan ke hit dengan skor
+    tertinggi dari sub-rubrik mana pun. Chunk terpilih yang bertetangga dan
+    overlap di dokumen digabung agar teks overlap tidak dikirim dua kali.
+    Jumlah token diestimasi dari jumlah karakter (EVIDENCE_CHARS_PER_TOKEN).
+    """
+
+    SEPARATOR = "\n\n---\n\n"
+
+    def __init__(self, token_budget: int = Config.EVIDENCE_TOKEN_BUDGET,
+                 chars_per_token: float = Config.EVIDENCE_CHARS_PER_TOKEN):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+
+    def estimate_tokens(self, text: str) -> int:
+        return int(math.ceil(len(text) / self.chars_per_token))
+
+    def select(self, groups: List[List[Tuple]], costs: Dict, token_budget: Optional[int] = None) -> List:
+        """
+        Args:
+            groups: Hit per sub-rubrik berupa (key, skor), urut skor menurun
+            costs: Estimasi token per key
+            token_budget: Override budget (default: self.token_budget)
+
+        Returns:
+            Key terpilih (unik), urut saat dipilih
+        """
+        budget = token_budget or self.token_budget
+        selected = []
+        chosen = set()
+        used = 0
+        share = budget // max(1, sum(1 for hits in groups if hits))
+        spent = [0] * len(groups)
+
+        # Tahap 1: jatah adil per sub-rubrik, round-robin per peringkat.
+        # Hit pertama tiap sub-rubrik selalu boleh masuk selama budget total cukup.
+        max_rank = max((len(hits) for hits in groups), default=0)
+        for rank in range(max_rank):
+            for group_idx, hits in enumerate(groups):
+                if rank >= len(hits):
+                    continue
+                key = hits[rank][0]
+                if key in chosen:
+                    continue
+                cost = costs[key]
+                if used + cost > budget:
+                    continue
+                if spent[group_idx] > 0 and spent[group_idx] + cost > share:
+                    continue
+                chosen.add(key)
+                selected.append(key)
+                spent[group_idx] += cost
+                used += cost
+
+        # Tahap 2: sisa budget untuk hit dengan skor tertinggi
+        remaining = sorted(
+            ((score, key) for hits in groups for key, score in hits if key not in chosen),
+            key=lambda item: -item[0]
+        )
+        for _, key in remaining:
+            cost = costs[key]
+            if key in chosen or used + cost > budget:
+                continue
+            chosen.add(key)
+            selected.append(key)
+            used += cost
+
+        return selected
+
+    def pack_hits(self, rag_engine: "RAGEngine", hit_groups: List[List[Tuple[int, float]]],
+                  token_budget: Optional[int] = None) -> List[str]:
+        """Pack hit (chunk id, skor) per sub-rubrik menjadi blok evidence berlabel halaman"""
+        costs = {
+            chunk_id: self.estimate_tokens(rag_engine.format_evidence(chunk_id))
+            for hits in hit_groups for chunk_id, _ in hits
+        }
+        selected = self.select(hit_groups, costs, token_budget)
+        return self._merge_neighbours(rag_engine, sorted(selected))
+
+    def pack_texts(self, evidence_groups: List[List[str]], token_budget: Optional[int] = None) -> List[str]:
+        """Pack evidence berupa teks (tanpa skor; peringkat dipakai sebagai skor)"""
+        groups = [[(text, -rank) for rank, text in enumerate(group)] for group in evidence_groups]
+        costs = {text: self.estimate_tokens(text) for group in evidence_groups for text in group}
+        return self.select(groups, costs, token_budget)
+
+    @staticmethod
+    def _merge_neighbours(rag_engine: "RAGEngine", chunk_ids: List[int]) -> List[str]:
+        """Gabungkan chunk berurutan yang overlap (berdasarkan offset di ChunkMetadata)"""
+        meta = rag_engine.chunk_metadata
+        has_offsets = len(meta) == len(rag_engine.chunks)
+        runs = []
+        for chunk_id in chunk_ids:
+            if runs and has_offsets:
+                first, last, text = runs[-1]
+                start, prev_end = meta.start[chunk_id], meta.end[last]
+                if meta.start[last] >= 0 and meta.start[last] <= start <= prev_end:
+                    runs[-1] = (first, chunk_id, text + rag_engine.chunks[chunk_id][prev_end - start:])
+                    continue
+            runs.append((chunk_id, chunk_id, rag_engine.chunks[chunk_id]))
+
+        blocks = []
+        for first, last, text in runs:
+            label = meta.page_label(first, last) if has_offsets else None
+            blocks.append(f"[{label}]\n{text}" if label else text)
+        return blocks
+
+
+class GradingEngine:
+    """Engine untuk grading menggunakan LLM"""
+
+    _llm_runner = BackgroundLoopRunner()
+    _llm_clients: Dict[Tuple, OpenRouterClient] = {}
+    _llm_clients_lock = threading.Lock()
+
+    _compiled_rubrics: Dict[str, CompiledRubric] = {}
+    _compiled_rubrics_lock = threading.Lock()
+
+    _llm_caches: Dict[str, LLMResponseCache] = {}
+    _llm_caches_lock = threading.Lock()
+
+    # Hit per query saat mengumpulkan evidence; ukuran prompt dibatasi EvidencePacker
+    EVIDENCE_K = 3
+
+    def __init__(self, config: Config = Config()):
+        self.config = config
+        self.evidence_packer = EvidencePacker(config.EVIDENCE_TOKEN_BUDGET, config.EVIDENCE_CHARS_PER_TOKEN)
+
+    def compile_rubric(self, rubric_data: Dict, model_name: Optional[str] = None) -> CompiledRubric:
+        """Ambil CompiledRubric untuk rubrik ini (di-memo per proses)"""
+        model_name = model_name or self.config.EMBEDDING_MODEL
+        rubric_hash = CompiledRubric.compute_hash(rubric_data, model_name)
+
+        with GradingEngine._compiled_rubrics_lock:
+            compiled = GradingEngine._compiled_rubrics.get(rubric_hash)
+            if compiled is None:
+                query_groups = [
+                    self._build_queries_for_subrubric(sub_rubric)
+                    for sub_rubric in rubric_data.get('sub_rubrics', [])
+                ]
+                compiled = CompiledRubric.build(rubric_data, query_groups, model_name)
+                GradingEngine._compiled_rubrics[rubric_hash] = compiled
+        return compiled
+
+    def _get_llm_client(self) -> OpenRouterClient:
+        """Client OpenRouter bersama (satu connection pool & rate limiter per proses)"""
+        key = (
+            self.config.OPENROUTER_URL, self.config.OPENROUTER_KEY, self.config.LLM_CONCURRENCY,
+            self.config.LLM_RATE_LIMIT_RPS, self.config.LLM_RATE_LIMIT_BURST,
+            self.config.LLM_MAX_RETRIES, self.config.LLM_TIMEOUT,
+        )
+        with GradingEngine._llm_clients_lock:
+            client = GradingEngine._llm_clients.get(key)
+            if client is None:
+                client = OpenRouterClient(
+                    url=self.config.OPENROUTER_URL,
+                    api_key=self.config.OPENROUTER_KEY,
+                    max_concurrency=self.config.LLM_CONCURRENCY,
+                    rate_limit_rps=self.config.LLM_RATE_LIMIT_RPS,
+                    rate_limit_burst=self.config.LLM_RATE_LIMIT_BURST,
+                    max_retries=self.config.LLM_MAX_RETRIES,
+                    timeout=self.config.LLM_TIMEOUT,
+                )
+                GradingEngine._llm_clients[key] = client
+        return client
+
+    def _get_llm_cache(self) -> Optional[LLMResponseCache]:
+        """Cache response LLM bersama per path database (None jika dinonaktifkan)"""
+        if not self.config.LLM_CACHE_ENABLED:
+            return None
+
+        db_path = str(Path(self.config.CACHE_FOLDER) / "llm_responses.sqlite3")
+        with GradingEngine._llm_caches_lock:
+            cache = GradingEngine._llm_caches.get(db_path)
+            if cache is None:
+                cache = LLMResponseCache(
+                    db_path,
+                    ttl_seconds=self.config.LLM_CACHE_TTL_HOURS * 3600,
+                    max_bytes=int(self.config.LLM_CACHE_MAX_MB * 1024 * 1024),
+                )
+                GradingEngine._llm_caches[db_path] = cache
+        return cache
+
+    def _llm_cache_key(self, prompt: str) -> Optional[str]:
+        if self._get_llm_cache() is None:
+            return None
+        return LLMResponseCache.make_key(self.config.MODEL, self.config.TEMPERATURE, self._build_messages(prompt))
+
+    def _cached_response(self, cache_key: Optional[str]) -> Optional[str]:
+        """Response dari cache; selalu None jika LLM_CACHE_BYPASS (hasil baru tetap disimpan)"""
+        if cache_key is None or self.config.LLM_CACHE_BYPASS:
+            return None
+        return self._get_llm_cache().get(cache_key)
+
+    def _store_response(self, cache_key: Optional[str], response: str):
+        if cache_key is not None:
+            self._get_llm_cache().put(cache_key, self.config.MODEL, response)
+
+    def grade_document(self, rag_engine: RAGEngine, rubric_data: Dict) -> Dict:
+        """
+        Grade satu dokumen berdasarkan rubrik
+
+        Returns:
+            Dict berisi hasil grading
+        """
+        print("\n🎯 Mulai proses grading...")
+        logging.info("Starting grading process")
+
+        prompt = self.prepare_prompt(rag_engine, rubric_data)
+        return self.grade_prompt(prompt, rubric_data)
+
+    def prepare_prompt(self, rag_engine: RAGEngine, rubric_data: Dict) -> Union[str, List[str]]:
+        """
+        Retrieval evidence untuk semua sub-rubrik lalu build prompt grading.
+
+        Pada GRADING_MODE=per_subrubric hasilnya list prompt, satu per sub-rubrik
+        (urutan sama dengan sub_rubrics); grade_prompt menerima kedua bentuk.
+        """
+        compiled = self.compile_rubric(rubric_data, rag_engine.model_name)
+        hit_groups = rag_engine.search_embeddings_grouped_hits(
+            compiled.query_embeddings, compiled.group_sizes, k=self.EVIDENCE_K,
+            queries=compiled.flat_queries
+        )
+        return self.prepare_prompt_from_hits(rag_engine, hit_groups, rubric_data)
+
+    def prepare_prompt_from_hits(self, rag_engine: RAGEngine, hit_groups: List[List[Tuple[int, float]]],
+                                 rubric_data: Dict) -> Union[str, List[str]]:
+        """Build prompt grading dari hit (chunk id, skor) per sub-rubrik milik rag_engine"""
+        self._log_evidence_groups(hit_groups, rubric_data)
+        return self._build_prompts(
+            hit_groups, rubric_data,
+            lambda groups, budget: self.evidence_packer.pack_hits(rag_engine, groups, budget)
+        )
+
+    def prepare_prompt_from_evidence(self, evidence_groups: List[List[str]],
+                                     rubric_data: Dict) -> Union[str, List[str]]:
+        """Build prompt grading dari evidence teks per sub-rubrik (urutan sama dengan sub_rubrics)"""
+        self._log_evidence_groups(evidence_groups, rubric_data)
+        return self._build_prompts(evidence_groups, rubric_data, self.evidence_packer.pack_texts)
+
+    def _build_prompts(self, groups: List[List], rubric_data: Dict,
+                       pack: Callable[[List[List], Optional[int]], List[str]]) -> Union[str, List[str]]:
+        """Satu prompt untuk seluruh rubrik, atau satu prompt per sub-rubrik (budget dibagi rata)"""
+        if self.config.GRADING_MODE != "per_subrubric":
+            return self._build_prompt_from_blocks(pack(groups, None), rubric_data)
+
+        sub_rubrics = rubric_data.get('sub_rubrics', [])
+        budget = max(1, self.evidence_packer.token_budget // max(1, len(sub_rubrics)))
+        return [
+            self._build_prompt_from_blocks(pack([group], budget), rubric_data, sub_rubric)
+            for sub_rubric, group in zip(sub_rubrics, groups)
+        ]
+
+    @staticmethod
+    def _log_evidence_groups(groups: List[List], rubric_data: Dict):
+        sub_rubrics = rubric_data.get('sub_rubrics', [])
+        logging.info(f"Processing {len(sub_rubrics)} sub-rubrics")
+        for sub_rubric, evidence in zip(sub_rubrics, groups):
+            logging.debug(f"Found {len(evidence)} evidence chunks for {sub_rubric['name']}")
+
+    def _build_prompt_from_blocks(self, blocks: List[str], rubric_data: Dict,
+                                  sub_rubric: Optional[Dict] = None) -> str:
+        evidence_text = EvidencePacker.SEPARATOR.join(blocks)
+        logging.info(
+            f"Packed {len(blocks)} evidence blocks "
+            f"(~{self.evidence_packer.estimate_tokens(evidence_text)} tokens)"
+            + (f" for {sub_rubric['name']}" if sub_rubric else "")
+        )
 
-        print(f"📝 Membuat embeddings untuk {len(self.chunks)} chunks...")
-        logging.info(f"Generating embeddings using model: {self.embedder}")
+        if sub_rubric is not None:
+            prompt = self._build_subrubric_prompt(rubric_data, sub_rubric, evidence_text)
+        else:
+            prompt = self._build_grading_prompt(rubric_data, evidence_text)
+        logging.debug(f"Prompt length: {len(prompt)} characters")
 
-        embeddings = self.embedder.encode(
-            self.chunks,
-            convert_to_numpy=True,
-            show_progress_bar=False
-        )
-        embeddings = np.asarray(embeddings, dtype=np.float32)
+        return prompt
 
-        dim = embeddings.shape[1]
-        self.index = faiss.IndexFlatL2(dim)
-        self.index.add(embeddings)
+    def grade_prompt(self, prompt: Union[str, List[str]], rubric_data: Dict,
+                     on_grade: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        Kirim prompt ke LLM dan parse hasil grading
 
-        logging.info(f"FAISS index built successfully with {self.index.ntotal} vectors, dimension={dim}")
-        print(f"✅ Index berhasil dibuat dengan {self.index.ntotal} vectors")
+        Args:
+            on_grade: Callback yang dipanggil untuk setiap entry grading_result
+                begitu tersedia (per kriteria saat LLM_STREAMING aktif)
+        """
+        if isinstance(prompt, list):
+            return self._grade_per_subrubric(prompt, rubric_data, on_grade)
+
+        cache_key = self._llm_cache_key(prompt)
+        cached = self._cached_response(cache_key)
+        if cached is not None:
+            print("♻️ Menggunakan response LLM dari cache")
+            logging.info("LLM response cache hit")
+            result = self._parse_grading_response(cached, rubric_data)
+            if 'error' not in result:
+                result['llm_cached'] = True
+                self._emit_grades(result, on_grade)
+                return result
 
-    def search(self, query: str, k: int = Config.TOP_K_RETRIEVAL) -> List[str]:
-        """Search relevant chunks"""
-        if self.index is None or self.index.ntotal == 0:
-            return []
+        print("🤖 Mengirim ke LLM untuk penilaian...")
+        streaming = self.config.LLM_STREAMING
+        try:
+            if streaming:
+                response = self._call_llm_stream(prompt, rubric_data, on_grade)
+            else:
+                response = self._call_llm(prompt)
+        except LLMRequestError as e:
+            logging.error(f"LLM grading failed: {e}")
+            print(f"⚠️ Gagal memanggil LLM: {e}")
+            if e.partial_content:
+                return self._partial_result(e.partial_content, rubric_data, f"LLM request failed: {e}")
+            return {
+                "grading_result": [],
+                "final_score": 0,
+                "overall_confidence": 0.0,
+                "error": f"LLM request failed: {e}"
+            }
 
-        k = min(k, self.index.ntotal)
-        q_emb = self.embedder.encode([query], convert_to_numpy=True)
-        q_emb = np.asarray(q_emb, dtype=np.float32)
+        result = self._parse_grading_response(response, rubric_data)
+        if 'error' not in result:
+            self._store_response(cache_key, response)
+            if not streaming:
+                self._emit_grades(result, on_grade)
+        logging.info(f"Grading completed. Final score: {result.get('final_score', 0)}")
 
-        D, I = self.index.search(q_emb, k)
-        return [self.chunks[i] for i in I[0] if i < len(self.chunks)]
+        return result
 
-    def search_multi_query(self, queries: List[str], k: int = 3) -> List[str]:
+    def iter_grade_prompt(self, prompt: Union[str, List[str]], rubric_data: Dict) -> Iterator[Tuple[str, Dict]]:
         """
-        Search dengan multiple queries dan gabungkan hasilnya
-        Berguna untuk mendapatkan evidence lebih comprehensive
+        Grade di thread background; yield ("grade", entry) setiap kriteria
+        selesai, lalu ("result", hasil akhir). Untuk UI yang harus di-update
+        dari thread pemanggil (misalnya Streamlit).
         """
-        all_results = []
-        seen = set()
+        events = queue.Queue()
 
-        for query in queries:
-            results = self.search(query, k)
-            for result in results:
-                if result not in seen:
-                    all_results.append(result)
-                    seen.add(result)
+        def worker():
+            try:
+                result = self.grade_prompt(prompt, rubric_data, on_grade=lambda grade: events.put(("grade", grade)))
+                events.put(("result", result))
+            except BaseException as e:
+                events.put(("exception", e))
 
-        return all_results
+        threading.Thread(target=worker, name="grading-stream", daemon=True).start()
 
-    def _chunk_text(self, text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
-        """Chunk text dengan RecursiveCharacterTextSplitter"""
-        if not text or not text.strip():
-            return []
-
-        splitter = RecursiveCharacterTextSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
-        chunks = splitter.split_text(text)
-        return [c.strip() for c in chunks if c and c.strip()]
+        while True:
+            event, payload = events.get()
+            if event == "exception":
+                raise payload
+            yield event, payload
+            if event == "result":
+                return
 
+    @staticmethod
+    def _emit_grades(result: Dict, on_grade: Optional[Callable[[Dict], None]]):
+        if on_grade is not None:
+            for grade in result.get('grading_result', []):
+                on_grade(grade)
 
-class GradingEngine:
-    """Engine untuk grading menggunakan LLM"""
+    def _partial_result(self, partial_content: str, rubric_data: Dict, error: str) -> Dict:
+        """Hasil dari response yang terputus: kriteria yang sudah lengkap dipakai, sisanya gagal"""
+        parser = IncrementalJSONArrayParser("grading_result")
+        parser.feed(partial_content)
+        self._apply_weights(parser.items, rubric_data)
 
-    def __init__(self, config: Config = Config()):
-        self.config = config
+        by_name = {grade.get('sub_rubric'): grade for grade in parser.items}
+        sub_rubrics = rubric_data.get('sub_rubrics', [])
+        grades = []
+        for sub_rubric in sub_rubrics:
+            grade = by_name.get(sub_rubric['name'])
+            try:
+                grade['score_awarded'] = float(grade.get('score_awarded', 0))
+                grade['confidence'] = float(grade.get('confidence', 0.0))
+            except (AttributeError, TypeError, ValueError):
+                grade = None
+            grades.append(grade)
+
+        print(f"⚠️ Response terputus; {sum(g is not None for g in grades)}/{len(sub_rubrics)} kriteria sudah diterima")
+        result = self._merge_subrubric_grades(grades, {i: error for i in range(len(sub_rubrics))}, rubric_data)
+        result['partial'] = True
+        result['error'] = error
+        return result
 
-    def grade_document(self, rag_engine: RAGEngine, rubric_data: Dict) -> Dict:
+    def _grade_per_subrubric(self, prompts: List[str], rubric_data: Dict,
+                             on_grade: Optional[Callable[[Dict], None]] = None) -> Dict:
         """
-        Grade satu dokumen berdasarkan rubrik
+        Kirim prompt per sub-rubrik secara paralel; hanya sub-rubrik yang gagal
+        (error LLM atau jawaban tidak valid) yang dikirim ulang.
+        """
+        sub_rubrics = rubric_data.get('sub_rubrics', [])
+        print(f"🤖 Mengirim {len(prompts)} sub-rubrik ke LLM secara paralel...")
+
+        grades: List[Optional[Dict]] = [None] * len(prompts)
+        errors = {}
+        cache_keys = [self._llm_cache_key(prompt) for prompt in prompts]
+
+        pending = []
+        for i, cache_key in enumerate(cache_keys):
+            cached = self._cached_response(cache_key)
+            if cached is not None:
+                grades[i] = self._parse_subrubric_response(cached, sub_rubrics[i], rubric_data)
+            if grades[i] is None:
+                pending.append(i)
+            elif on_grade is not None:
+                on_grade(grades[i])
+        if len(pending) < len(prompts):
+            print(f"♻️ {len(prompts) - len(pending)} sub-rubrik menggunakan response LLM dari cache")
+        all_cached = not pending
+
+        for attempt in range(self.config.SUBRUBRIC_MAX_ATTEMPTS):
+            if not pending:
+                break
+            if attempt > 0:
+                logging.warning(f"Retrying {len(pending)} failed sub-rubrics (attempt {attempt + 1})")
+
+            batch = pending
+            failed = []
+
+            def handle_response(j: int, response):
+                # Dipanggil di event loop LLM begitu satu sub-rubrik selesai
+                i = batch[j]
+                if isinstance(response, LLMRequestError):
+                    grade = self._parse_partial_subrubric(response.partial_content, sub_rubrics[i], rubric_data)
+                    if grade is None:
+                        errors[i] = f"LLM request failed: {response}"
+                        failed.append(i)
+                        return
+                    # Stream putus setelah entry grading_result lengkap: pakai tanpa cache
+                    logging.warning(f"Using grade from interrupted stream for sub-rubric {sub_rubrics[i]['name']}")
+                    grades[i] = grade
+                    errors.pop(i, None)
+                    if on_grade is not None:
+                        on_grade(grade)
+                    return
+                if isinstance(response, BaseException):
+                    return
+
+                grade = self._parse_subrubric_response(response, sub_rubrics[i], rubric_data)
+                if grade is None:
+                    errors[i] = "Invalid sub-rubric response"
+                    failed.append(i)
+                    return
+
+                grades[i] = grade
+                errors.pop(i, None)
+                self._store_response(cache_keys[i], response)
+                if on_grade is not None:
+                    on_grade(grade)
+
+            responses = self._llm_runner.run(self._chat_many([prompts[i] for i in batch], handle_response))
+            for response in responses:
+                if isinstance(response, BaseException) and not isinstance(response, LLMRequestError):
+                    raise response
+            pending = sorted(failed)
+
+        result = self._merge_subrubric_grades(grades, errors, rubric_data)
+        if all_cached:
+            result['llm_cached'] = True
+        logging.info(f"Grading completed. Final score: {result.get('final_score', 0)}")
+        return result
 
-        Returns:
-            Dict berisi hasil grading
+    async def _chat_many(self, prompts: List[str],
+                         on_response: Optional[Callable[[int, object], None]] = None) -> List:
         """
-        print("\n🎯 Mulai proses grading...")
-        logging.info("Starting grading process")
+        Panggil LLM untuk beberapa prompt sekaligus (exception dikembalikan, bukan
+        dilempar). on_response(index, response) dipanggil begitu tiap call selesai.
+        Dengan LLM_STREAMING setiap call memakai SSE sehingga LLMRequestError
+        membawa partial_content jika stream terputus.
+        """
+        client = self._get_llm_client()
+        send = client.chat_stream if self.config.LLM_STREAMING else client.chat
+
+        async def chat(index: int, prompt: str):
+            try:
+                response = await send(
+                    self._build_messages(prompt), model=self.config.MODEL, temperature=self.config.TEMPERATURE
+                )
+            except Exception as e:
+                response = e
+            if on_response is not None:
+                on_response(index, response)
+            return response
 
-        sub_rubrics = rubric_data.get('sub_rubrics', [])
-        logging.info(f"Processing {len(sub_rubrics)} sub-rubrics")
+        return await asyncio.gather(*(chat(i, prompt) for i, prompt in enumerate(prompts)))
 
-        evidence_map = {}
-        for sub_rubric in sub_rubrics:
-            queries = self._build_queries_for_subrubric(sub_rubric)
-            logging.debug(f"Searching evidence for sub-rubric: {sub_rubric['name']}")
-            evidence = rag_engine.search_multi_query(queries, k=3)
-            evidence_map[sub_rubric['name']] = evidence
-            logging.debug(f"Found {len(evidence)} evidence chunks for {sub_rubric['name']}")
+    def _parse_subrubric_response(self, response: str, sub_rubric: Dict, rubric_data: Dict) -> Optional[Dict]:
+        """Ambil satu entry grading_result dari jawaban per sub-rubrik; None jika tidak valid"""
+        result = self._parse_grading_response(response, rubric_data)
+        entries = result.get('grading_result') or []
+        if 'error' in result or not entries or not isinstance(entries[0], dict):
+            return None
 
-        all_evidence = []
-        for name, chunks in evidence_map.items():
-            all_evidence.extend(chunks)
+        return self._normalize_subrubric_grade(entries[0], sub_rubric, rubric_data)
 
-        seen = set()
-        unique_evidence = []
-        for item in all_evidence:
-            if item not in seen:
-                unique_evidence.append(item)
-                seen.add(item)
+    def _parse_partial_subrubric(self, partial_content: str, sub_rubric: Dict, rubric_data: Dict) -> Optional[Dict]:
+        """Entry grading_result yang sudah lengkap dari response stream yang terputus; None jika belum ada"""
+        if not partial_content:
+            return None
+        parser = IncrementalJSONArrayParser("grading_result")
+        parser.feed(partial_content)
+        if not parser.items:
+            return None
+        return self._normalize_subrubric_grade(parser.items[0], sub_rubric, rubric_data)
 
-        evidence_text = "\n\n---\n\n".join(unique_evidence[:10])
-        logging.info(f"Collected {len(unique_evidence)} unique evidence chunks")
+    @staticmethod
+    def _normalize_subrubric_grade(grade: Dict, sub_rubric: Dict, rubric_data: Dict) -> Optional[Dict]:
+        try:
+            grade['score_awarded'] = float(grade.get('score_awarded', 0))
+            grade['confidence'] = float(grade.get('confidence', 0.0))
+        except (TypeError, ValueError):
+            return None
 
-        prompt = self._build_grading_prompt(rubric_data, evidence_text)
-        logging.debug(f"Prompt length: {len(prompt)} characters")
+        weights = {sr['sub_rubric_id']: sr['weight'] for sr in rubric_data.get('assignment_sub_rubrics', [])}
+        grade['sub_rubric'] = sub_rubric['name']
+        grade['weight'] = weights.get(sub_rubric['id'], 0)
+        return grade
 
-        print("🤖 Mengirim ke LLM untuk penilaian...")
-        response = self._call_llm(prompt)
+    @staticmethod
+    def _merge_subrubric_grades(grades: List[Optional[Dict]], errors: Dict[int, str], rubric_data: Dict) -> Dict:
+        """Gabungkan hasil per sub-rubrik ke format yang sama dengan _parse_grading_response"""
+        sub_rubrics = rubric_data.get('sub_rubrics', [])
+        weights = {sr['sub_rubric_id']: sr['weight'] for sr in rubric_data.get('assignment_sub_rubrics', [])}
+
+        grading_result = []
+        for i, (sub_rubric, grade) in enumerate(zip(sub_rubrics, grades)):
+            if grade is None:
+                error = errors.get(i, "Not graded")
+                grade = {
+                    "sub_rubric": sub_rubric['name'],
+                    "selected_level": "",
+                    "score_awarded": 0,
+                    "weight": weights.get(sub_rubric['id'], 0),
+                    "reason": f"Gagal dinilai: {error}",
+                    "evidence_quote": "",
+                    "confidence": 0.0,
+                    "error": error,
+                }
+            grading_result.append(grade)
+
+        total_weight = sum(g['weight'] for g in grading_result)
+        if total_weight > 0:
+            final_score = sum(g['score_awarded'] * g['weight'] for g in grading_result) / total_weight
+        else:
+            final_score = float(np.mean([g['score_awarded'] for g in grading_result])) if grading_result else 0
+
+        graded = [g for g in grading_result if 'error' not in g]
+        result = {
+            "grading_result": grading_result,
+            "final_score": round(final_score, 2),
+            "overall_confidence": float(np.mean([g['confidence'] for g in graded])) if graded else 0.0,
+        }
 
-        result = self._parse_grading_response(response, rubric_data)
-        logging.info(f"Grading completed. Final score: {result.get('final_score', 0)}")
+        failed = [g['sub_rubric'] for g in grading_result if 'error' in g]
+        if failed:
+            result['failed_sub_rubrics'] = failed
+            print(f"⚠️ {len(failed)} sub-rubrik gagal dinilai: {', '.join(failed)}")
+        if grading_result and len(failed) == len(grading_result):
+            result['error'] = "All sub-rubrics failed: " + "; ".join(sorted(set(errors.values())))
 
         return result
 
@@ -354,6 +2457,7 @@ Gunakan bagian-bagian teks berikut untuk mendukung setiap penilaian:
    - Jika isi tidak mencukupi, tetap tampilkan sub-rubrik tersebut dengan level terendah dan beri alasan.
 3. Gunakan bukti dari bagian *Evidence* di atas untuk setiap keputusan penilaian.
    - Jika ada kalimat pendukung, sebutkan ringkas potongan teks evidence yang relevan.
+   - Setiap evidence diawali label halaman (misalnya `[Halaman 3]`); cantumkan halaman tersebut di `evidence_page`.
 4. Sertakan alasan singkat (1–3 kalimat) yang berdasarkan evidence.
 5. Cantumkan bobot (`assignment_sub_rubrics.weight`).
 6. Hitung nilai total berdasarkan skor × bobot.
@@ -373,6 +2477,7 @@ Jawaban akhir **HARUS** mengikuti struktur JSON berikut:
       "weight": 0-100,
       "reason": "alasan singkat berdasarkan evidence",
       "evidence_quote": "potongan teks relevan dari evidence",
+      "evidence_page": "halaman asal evidence, misalnya 3 atau 3-4",
       "confidence": 0.0-1.0
     }}
   ],
@@ -383,49 +2488,127 @@ Jawaban akhir **HARUS** mengikuti struktur JSON berikut:
 Output tidak boleh berisi penjelasan tambahan di luar struktur JSON.
 """
 
+    def _build_subrubric_prompt(self, rubric_data: Dict, sub_rubric: Dict, evidence: str) -> str:
+        """Build prompt untuk menilai satu sub-rubrik saja"""
+        weights = {sr['sub_rubric_id']: sr['weight'] for sr in rubric_data.get('assignment_sub_rubrics', [])}
+        rubric_json = json.dumps({
+            "rubric": rubric_data.get('rubric', {}),
+            "sub_rubric": sub_rubric,
+            "weight": weights.get(sub_rubric['id'], 0),
+        }, indent=2, ensure_ascii=False)
+
+        return f"""
+Anda adalah sistem auto-grading untuk Learning Management System (LMS).
+Tugas Anda adalah menilai **satu sub-rubrik** dari laporan mahasiswa berdasarkan **rubrik penilaian (JSON)** dan **evidence dari hasil pencarian dokumen (RAG)**.
+
+Gunakan *hanya informasi dari evidence di bawah ini* sebagai dasar penilaian.
+JANGAN mengarang isi di luar evidence.
+
+---
+
+### 📘 SUB-RUBRIK YANG DINILAI (JSON)
+{rubric_json}
+
+---
+
+### 📄 EVIDENCE DARI LAPORAN (hasil pencarian RAG)
+{evidence}
+
+---
+
+### 📋 INSTRUKSI PENILAIAN
+1. Pilih level yang paling sesuai dan beri **nilai numerik** dalam `score_range` level tersebut.
+   - Jika isi tidak mencukupi, pilih level terendah dan beri alasan.
+2. Sebutkan ringkas potongan teks evidence yang mendukung penilaian.
+   - Setiap evidence diawali label halaman (misalnya `[Halaman 3]`); cantumkan halaman tersebut di `evidence_page`.
+3. Sertakan alasan singkat (1–3 kalimat) dan confidence score.
+
+---
+
+### 📤 FORMAT OUTPUT WAJIB (JSON)
+
+{{
+  "grading_result": [
+    {{
+      "sub_rubric": "{sub_rubric['name']}",
+      "selected_level": "A/B/C/...",
+      "score_awarded": 0-100,
+      "reason": "alasan singkat berdasarkan evidence",
+      "evidence_quote": "potongan teks relevan dari evidence",
+      "evidence_page": "halaman asal evidence, misalnya 3 atau 3-4",
+      "confidence": 0.0-1.0
+    }}
+  ]
+}}
+
+Output tidak boleh berisi penjelasan tambahan di luar struktur JSON.
+"""
+
+    @staticmethod
+    def _build_messages(prompt: str) -> List[Dict]:
+        return [
+            {"role": "system", "content": "Kamu adalah sistem penilai otomatis. Jawab hanya dalam format JSON."},
+            {"role": "user", "content": prompt},
+        ]
+
     def _call_llm(self, prompt: str) -> str:
-        """Call LLM via OpenRouter"""
+        """
+        Call LLM via OpenRouter
+
+        Raises:
+            LLMRequestError jika request tetap gagal setelah semua retry
+        """
         logging.info(f"Calling LLM API: {self.config.MODEL}")
         logging.debug(f"API URL: {self.config.OPENROUTER_URL}")
 
-        headers = {
-            "Authorization": f"Bearer {self.config.OPENROUTER_KEY}",
-            "Content-Type": "application/json",
-        }
+        messages = self._build_messages(prompt)
 
-        payload = {
-            "model": self.config.MODEL,
-            "messages": [
-                {"role": "system", "content": "Kamu adalah sistem penilai otomatis. Jawab hanya dalam format JSON."},
-                {"role": "user", "content": prompt},
-            ],
-            "temperature": self.config.TEMPERATURE,
-        }
+        client = self._get_llm_client()
+        response = self._llm_runner.run(
+            client.chat(messages, model=self.config.MODEL, temperature=self.config.TEMPERATURE)
+        )
 
-        try:
-            logging.debug("Sending request to OpenRouter API...")
-            r = requests.post(
-                self.config.OPENROUTER_URL,
-                headers=headers,
-                json=payload,
-                timeout=120
-            )
-            r.raise_for_status()
-            data = r.json()
+        logging.info(f"Received LLM response, length: {len(response)} characters")
+        logging.debug(f"Response preview: {response[:200]}...")
 
-            response = data["choices"][0]["message"]["content"]
-            logging.info(f"Received LLM response, length: {len(response)} characters")
-            logging.debug(f"Response preview: {response[:200]}...")
+        return response
 
-            return response
-        except requests.exceptions.RequestException as e:
-            logging.error(f"API request failed: {e}", exc_info=True)
-            print(f"⚠️ Gagal memanggil LLM: {e}")
-            return "{}"
-        except Exception as e:
-            logging.error(f"Unexpected error calling LLM: {e}", exc_info=True)
-            print(f"⚠️ Gagal memanggil LLM: {e}")
-            return "{}"
+    def _call_llm_stream(self, prompt: str, rubric_data: Dict,
+                         on_grade: Optional[Callable[[Dict], None]] = None) -> str:
+        """
+        Call LLM dengan streaming; setiap entry grading_result diteruskan ke
+        on_grade begitu JSON-nya lengkap.
+
+        Raises:
+            LLMRequestError (dengan partial_content jika stream terputus)
+        """
+        logging.info(f"Calling LLM API (streaming): {self.config.MODEL}")
+        parser = IncrementalJSONArrayParser("grading_result")
+
+        def on_delta(delta: str):
+            grades = parser.feed(delta)
+            self._apply_weights(grades, rubric_data)
+            if on_grade is not None:
+                for grade in grades:
+                    on_grade(grade)
+
+        client = self._get_llm_client()
+        response = self._llm_runner.run(
+            client.chat_stream(self._build_messages(prompt), model=self.config.MODEL,
+                               temperature=self.config.TEMPERATURE, on_delta=on_delta)
+        )
+
+        logging.info(f"Received streamed LLM response, length: {len(response)} characters")
+        return response
+
+    @staticmethod
+    def _apply_weights(grades: List[Dict], rubric_data: Dict):
+        """Isi weight setiap entry dari assignment_sub_rubrics (berdasarkan nama sub-rubrik)"""
+        weights = {sr['sub_rubric_id']: sr['weight'] for sr in rubric_data.get('assignment_sub_rubrics', [])}
+        weights_by_name = {sr['name']: weights.get(sr['id'], 0) for sr in rubric_data.get('sub_rubrics', [])}
+        for grade in grades:
+            if grade.get('sub_rubric') in weights_by_name:
+                grade['weight'] = weights_by_name[grade['sub_rubric']]
 
     def _parse_grading_response(self, response: str, rubric_data: Dict) -> Dict:
         """Parse response dari LLM"""
@@ -436,24 +2619,7 @@ Output tidak boleh berisi penjelasan tambahan di luar struktur JSON.
                 response = response.split("```")[1].split("```")[0]
 
             result = json.loads(response.strip())
-
-            assignment_sub_rubrics = {
-                sr['sub_rubric_id']: sr['weight']
-                for sr in rubric_data.get('assignment_sub_rubrics', [])
-            }
-
-            sub_rubrics = {
-                sr['id']: sr
-                for sr in rubric_data.get('sub_rubrics', [])
-            }
-
-            for grade in result.get('grading_result', []):
-                sub_name = grade['sub_rubric']
-                for sr_id, sr in sub_rubrics.items():
-                    if sr['name'] == sub_name:
-                        weight = assignment_sub_rubrics.get(sr_id, 0)
-                        grade['weight'] = weight
-                        break
+            self._apply_weights(result.get('grading_result', []), rubric_data)
 
             return result
         except Exception as e:
@@ -467,6 +2633,161 @@ Output tidak boleh berisi penjelasan tambahan di luar struktur JSON.
             }
 
 
+def run_settings(rubric_data: Dict, config: Config) -> Dict:
+    """
+    Rubrik + konfigurasi yang memengaruhi hasil grading. Dipakai bersama oleh
+    key RunJournal dan input RunManifest supaya keduanya tidak bisa berbeda.
+    """
+    rubric_json = json.dumps(rubric_data, sort_keys=True, ensure_ascii=False)
+    return {
+        'extractor': PDFExtractor.extractor_spec(),
+        'chunk_size': config.CHUNK_SIZE,
+        'chunk_overlap': config.CHUNK_OVERLAP,
+        'embedding_model': EmbeddingModelRegistry.model_key(config.EMBEDDING_MODEL),
+        'index_spec': config.index_spec(),
+        'rubric_hash': hashlib.sha256(rubric_json.encode('utf-8')).hexdigest()[:16],
+        'llm_model': config.MODEL,
+        'temperature': config.TEMPERATURE,
+        'grading_mode': config.GRADING_MODE,
+        'top_k': GradingEngine.EVIDENCE_K,
+        'similarity_threshold': config.SIMILARITY_THRESHOLD,
+        'retrieval': config.retrieval_spec(),
+        'evidence_token_budget': config.EVIDENCE_TOKEN_BUDGET,
+    }
+
+
+class RunJournal:
+    """
+    Journal append-only (JSONL) berisi hasil grading per dokumen.
+
+    Setiap baris ditulis (dan di-fsync) begitu satu dokumen selesai dinilai,
+    sehingga run yang crash atau dihentikan bisa dilanjutkan. Satu file per
+    run key: hash rubrik + konfigurasi yang memengaruhi hasil grading.
+    """
+
+    def __init__(self, journal_dir: str, run_key: str):
+        self.path = Path(journal_dir) / f"journal_{run_key}.jsonl"
+        self.run_key = run_key
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_run_key(rubric_data: Dict, config: Config) -> str:
+        raw = json.dumps(run_settings(rubric_data, config), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+
+    def load(self) -> Dict[str, Dict]:
+        """Hasil yang sudah tercatat, per hash file PDF (entry terakhir menang)"""
+        completed = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Baris terakhir bisa terpotong jika proses dihentikan saat menulis
+                        continue
+                    if entry.get('run_key') == self.run_key:
+                        completed[entry['file_hash']] = entry['result']
+        except FileNotFoundError:
+            pass
+        return completed
+
+    def append(self, file_hash: str, result: Dict):
+        entry = {
+            'run_key': self.run_key,
+            'file_hash': file_hash,
+            'filename': result.get('document_info', {}).get('filename'),
+            'completed_at': datetime.now().isoformat(),
+            'result': result,
+        }
+        line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+
+class RunManifest:
+    """
+    Fingerprint input per dokumen dari run terakhir, untuk re-grading inkremental.
+
+    Fingerprint dibuat berantai per tahap (ekstraksi -> index -> grading),
+    jadi perubahan input suatu tahap otomatis membatalkan tahap sesudahnya.
+    Hasil grading terakhir ikut disimpan sehingga dokumen yang seluruh
+    inputnya tidak berubah tidak perlu diproses lagi.
+    """
+
+    STAGE_INPUTS = {
+        'extraction': ('content_hash', 'extractor'),
+        'index': ('chunk_size', 'chunk_overlap', 'embedding_model', 'index_spec'),
+        'grading': ('rubric_hash', 'llm_model', 'temperature', 'grading_mode', 'top_k',
+                    'similarity_threshold', 'retrieval', 'evidence_token_budget'),
+    }
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning(f"Corrupt run manifest {self.path}, starting fresh: {e}")
+
+    @staticmethod
+    def compute_inputs(content_hash: str, rubric_data: Dict, config: Config) -> Dict:
+        return {'content_hash': content_hash, **run_settings(rubric_data, config)}
+
+    @classmethod
+    def compute_fingerprints(cls, inputs: Dict) -> Dict[str, str]:
+        fingerprints = {}
+        previous = ""
+        for stage, keys in cls.STAGE_INPUTS.items():
+            raw = json.dumps([previous] + [inputs[key] for key in keys], ensure_ascii=False)
+            previous = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:16]
+            fingerprints[stage] = previous
+        return fingerprints
+
+    def reusable_result(self, doc_key: str, inputs: Dict) -> Optional[Dict]:
+        """Hasil grading terakhir jika seluruh fingerprint dokumen ini tidak berubah"""
+        entry = self.entries.get(doc_key)
+        if not entry or not entry.get('result'):
+            return None
+        if entry.get('fingerprints', {}).get('grading') != self.compute_fingerprints(inputs)['grading']:
+            return None
+        return entry['result']
+
+    def changed_inputs(self, doc_key: str, inputs: Dict) -> List[str]:
+        """Input yang berbeda dari run terakhir (['new'] untuk dokumen baru)"""
+        entry = self.entries.get(doc_key)
+        if not entry:
+            return ['new']
+        previous = entry.get('inputs', {})
+        return [key for key, value in inputs.items() if previous.get(key) != value]
+
+    def update(self, doc_key: str, inputs: Dict, result: Dict):
+        with self._lock:
+            self.entries[doc_key] = {
+                'inputs': inputs,
+                'fingerprints': self.compute_fingerprints(inputs),
+                'result': result,
+                'updated_at': datetime.now().isoformat(),
+            }
+
+    def save(self):
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.entries, f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.path)
+
+
 class BatchProcessor:
     """Batch processing untuk multiple PDFs"""
 
@@ -474,18 +2795,29 @@ class BatchProcessor:
         self.config = config
         self.pdf_extractor = PDFExtractor()
         self.grading_engine = GradingEngine(config)
+        self.journal: Optional[RunJournal] = None
+        self.manifest: Optional[RunManifest] = None
+        self._rubric_data: Dict = {}
+        self._doc_keys: Dict[str, str] = {}
 
-    def process_folder(self, folder_path: str, rubric_path: str) -> List[Dict]:
+    def process_folder(self, folder_path: str, rubric_path: str, resume: bool = False,
+                       incremental: bool = True) -> List[Dict]:
         """
         Process semua PDF di folder
 
+        Args:
+            resume: Lewati dokumen yang sudah tercatat di journal dengan
+                rubrik dan konfigurasi yang sama
+            incremental: Pakai ulang hasil run terakhir untuk dokumen yang
+                seluruh inputnya (file, chunking, model, rubrik) tidak berubah
+
         Returns:
             List of grading results
         """
         with open(rubric_path, 'r', encoding='utf-8') as f:
             rubric_data = json.load(f)
 
-        pdf_files = list(Path(folder_path).glob("*.pdf"))
+        pdf_files = sorted(Path(folder_path).glob("*.pdf"))
 
         if not pdf_files:
             print(f"⚠️ Tidak ada PDF ditemukan di {folder_path}")
@@ -493,6 +2825,74 @@ class BatchProcessor:
 
         print(f"\n📂 Ditemukan {len(pdf_files)} PDF untuk diproses")
 
+        self.journal = None
+        if self.config.JOURNAL_ENABLED:
+            run_key = RunJournal.compute_run_key(rubric_data, self.config)
+            self.journal = RunJournal(self.config.JOURNAL_FOLDER, run_key)
+            logging.info(f"Run journal: {self.journal.path}")
+
+        self._rubric_data = rubric_data
+        self._doc_keys = {pdf_file.stem: str(pdf_file.resolve()) for pdf_file in pdf_files}
+        self.manifest = None
+        if self.config.INCREMENTAL_ENABLED:
+            self.manifest = RunManifest(Path(self.config.CACHE_FOLDER) / "manifest.json")
+
+        use_journal = resume and self.journal is not None
+        if resume and self.journal is None:
+            print("⚠️ --resume diabaikan karena JOURNAL_ENABLED=false")
+        completed = self.journal.load() if use_journal else {}
+        # Hasil lama tidak dipakai jika LLM_CACHE_BYPASS (grading ulang dipaksa)
+        reuse_unchanged = incremental and self.manifest is not None and not self.config.LLM_CACHE_BYPASS
+
+        resumed = {}
+        n_unchanged = 0
+        for idx, pdf_file in enumerate(pdf_files):
+            if not use_journal and not reuse_unchanged:
+                break
+            content_hash = file_sha256(str(pdf_file))
+            result = completed.get(content_hash)
+            if result is None and reuse_unchanged:
+                inputs = RunManifest.compute_inputs(content_hash, rubric_data, self.config)
+                result = self.manifest.reusable_result(self._doc_keys[pdf_file.stem], inputs)
+                if result is not None:
+                    n_unchanged += 1
+                    result = {**result, 'incremental': {
+                        'extraction': 'reused', 'index': 'reused', 'grading': 'reused', 'changed': []
+                    }}
+            if result is not None:
+                document_info = {**result.get('document_info', {}), 'filename': pdf_file.stem}
+                resumed[idx] = {**result, 'document_info': document_info}
+
+        if use_journal:
+            print(f"⏭️ {len(resumed) - n_unchanged} dokumen dilewati (sudah dinilai di run sebelumnya)")
+        if n_unchanged:
+            print(f"♻️ {n_unchanged} dokumen tidak berubah sejak run terakhir, hasil dipakai ulang")
+
+        pending_files = [pdf_file for idx, pdf_file in enumerate(pdf_files) if idx not in resumed]
+        results = self._process_files(pending_files, rubric_data) if pending_files else []
+        if self.manifest is not None:
+            self.manifest.save()
+
+        if not resumed:
+            return results
+
+        # Gabungkan hasil lama dan baru sesuai urutan file
+        by_name = {result['document_info']['filename']: result for result in results}
+        merged = []
+        for idx, pdf_file in enumerate(pdf_files):
+            result = resumed.get(idx) or by_name.get(pdf_file.stem)
+            if result is not None:
+                merged.append(result)
+        return merged
+
+    def _process_files(self, pdf_files: List[Path], rubric_data: Dict) -> List[Dict]:
+        from tqdm import tqdm
+
+        self.grading_engine.compile_rubric(rubric_data)
+
+        if self.config.PIPELINE_BATCH and len(pdf_files) > 1:
+            return self._process_pipelined(pdf_files, rubric_data)
+
         results = []
 
         for pdf_file in tqdm(pdf_files, desc="Processing PDFs"):
@@ -500,7 +2900,10 @@ class BatchProcessor:
             print(f"📄 Processing: {pdf_file.name}")
             print(f"{'='*60}")
 
-            extracted = self.pdf_extractor.extract_text_with_metadata(str(pdf_file))
+            chunker = StreamingChunker(self.config.CHUNK_SIZE, self.config.CHUNK_OVERLAP)
+            extracted = self.pdf_extractor.extract_text_with_metadata(
+                str(pdf_file), page_consumer=chunker.feed
+            )
 
             if not extracted or not extracted['text']:
                 print(f"⚠️ Gagal ekstrak atau PDF kosong: {pdf_file.name}")
@@ -508,25 +2911,159 @@ class BatchProcessor:
 
             print(f"✅ Ekstraksi berhasil: {extracted['page_count']} halaman")
 
-            rag_engine = RAGEngine()
-            rag_engine.build_index(extracted['text'])
+            rag_engine = RAGEngine(self.config.EMBEDDING_MODEL)
+            rag_engine.build_index(
+                extracted['text'],
+                chunk_size=self.config.CHUNK_SIZE,
+                chunk_overlap=self.config.CHUNK_OVERLAP,
+                content_hash=extracted.get('content_hash'),
+                chunks=chunker.finish(),
+                pages=extracted['pages']
+            )
 
             grading_result = self.grading_engine.grade_document(rag_engine, rubric_data)
+            results.append(self._record_result(grading_result, extracted, rag_engine.loaded_from_store))
 
-            grading_result['document_info'] = {
-                'filename': extracted['filename'],
-                'page_count': extracted['page_count'],
-                'metadata': extracted['metadata'],
-                'processed_at': datetime.now().isoformat()
-            }
+        return results
+
+    def _process_pipelined(self, pdf_files: List[Path], rubric_data: Dict) -> List[Dict]:
+        """
+        Batch processing dengan pipeline bertahap:
+        ekstraksi PDF di process pool, embedding per batch dokumen,
+        dan panggilan LLM paralel dengan jumlah maksimum LLM_CONCURRENCY.
+
+        Urutan hasil selalu mengikuti urutan file, bukan urutan selesai.
+        """
+        from tqdm import tqdm
+
+        logging.info(
+            f"Pipelined batch: extraction_workers={self.config.EXTRACTION_WORKERS}, "
+            f"embedding_batch_docs={self.config.EMBEDDING_BATCH_DOCS}, "
+            f"llm_concurrency={self.config.LLM_CONCURRENCY}"
+        )
 
-            results.append(grading_result)
+        llm_futures = {}
+        cohort_batch = []
 
-            print(f"✅ Score: {grading_result.get('final_score', 0):.1f}")
-            print(f"   Confidence: {grading_result.get('overall_confidence', 0):.2f}")
+        with ProcessPoolExecutor(max_workers=self.config.EXTRACTION_WORKERS) as extract_pool, \
+                ThreadPoolExecutor(max_workers=self.config.LLM_CONCURRENCY) as llm_pool:
+            extract_futures = [
+                extract_pool.submit(PDFExtractor.extract_text_with_metadata, str(pdf_file), False)
+                for pdf_file in pdf_files
+            ]
+
+            batch = []
+            for idx, future in enumerate(tqdm(extract_futures, desc="Extracting PDFs")):
+                extracted = future.result()
+
+                if not extracted or not extracted['text']:
+                    print(f"⚠️ Gagal ekstrak atau PDF kosong: {pdf_files[idx].name}")
+                    continue
+
+                batch.append((idx, extracted))
+                if len(batch) >= self.config.EMBEDDING_BATCH_DOCS:
+                    self._embed_and_submit(batch, rubric_data, llm_pool, llm_futures, cohort_batch)
+                    batch = []
+
+            if batch:
+                self._embed_and_submit(batch, rubric_data, llm_pool, llm_futures, cohort_batch)
+
+            if cohort_batch:
+                self._search_cohort_and_submit(cohort_batch, rubric_data, llm_pool, llm_futures)
+
+            results = []
+            for idx in tqdm(sorted(llm_futures), desc="Grading PDFs"):
+                results.append(llm_futures[idx].result())
 
         return results
 
+    def _embed_and_submit(self, batch: List[Tuple[int, Dict]], rubric_data: Dict,
+                          llm_pool: ThreadPoolExecutor, llm_futures: Dict,
+                          cohort_batch: List[Tuple[int, Dict, RAGEngine]]):
+        """
+        Embed satu batch dokumen, retrieval evidence, lalu antrekan grading ke LLM pool.
+        Pada mode COHORT_RETRIEVAL, retrieval ditunda sampai semua dokumen ter-embed.
+        """
+        engines = RAGEngine.build_indexes(
+            [extracted['text'] for _, extracted in batch],
+            model_name=self.config.EMBEDDING_MODEL,
+            content_hashes=[extracted.get('content_hash') for _, extracted in batch],
+            pages_list=[extracted['pages'] for _, extracted in batch]
+        )
+
+        for (idx, extracted), rag_engine in zip(batch, engines):
+            if self.config.COHORT_RETRIEVAL:
+                cohort_batch.append((idx, extracted, rag_engine))
+                continue
+            prompt = self.grading_engine.prepare_prompt(rag_engine, rubric_data)
+            llm_futures[idx] = llm_pool.submit(
+                self._grade_extracted, prompt, rubric_data, extracted, rag_engine.loaded_from_store
+            )
+
+    def _search_cohort_and_submit(self, cohort_batch: List[Tuple[int, Dict, RAGEngine]],
+                                  rubric_data: Dict, llm_pool: ThreadPoolExecutor, llm_futures: Dict):
+        """Retrieval untuk semua dokumen sekaligus lewat satu CohortRAGEngine"""
+        cohort = CohortRAGEngine.from_engines([rag_engine for _, _, rag_engine in cohort_batch])
+        compiled = self.grading_engine.compile_rubric(rubric_data, cohort.model_name)
+        hits_per_doc = cohort.search_embeddings_grouped_hits(
+            compiled.query_embeddings, compiled.group_sizes, k=self.grading_engine.EVIDENCE_K,
+            queries=compiled.flat_queries
+        )
+
+        for (idx, extracted, rag_engine), hit_groups in zip(cohort_batch, hits_per_doc):
+            prompt = self.grading_engine.prepare_prompt_from_hits(rag_engine, hit_groups, rubric_data)
+            llm_futures[idx] = llm_pool.submit(
+                self._grade_extracted, prompt, rubric_data, extracted, rag_engine.loaded_from_store
+            )
+
+    def _grade_extracted(self, prompt: Union[str, List[str]], rubric_data: Dict, extracted: Dict,
+                         index_reused: bool = False) -> Dict:
+        grading_result = self.grading_engine.grade_prompt(prompt, rubric_data)
+        return self._record_result(grading_result, extracted, index_reused)
+
+    def _record_result(self, grading_result: Dict, extracted: Dict, index_reused: bool = False) -> Dict:
+        """
+        Lengkapi document_info dan status tahap (dipakai ulang / dihitung ulang),
+        lalu catat ke journal & manifest (hanya hasil yang berhasil penuh)
+        """
+        result = self._attach_document_info(grading_result, extracted)
+        content_hash = extracted.get('content_hash')
+
+        result['incremental'] = {
+            'extraction': 'reused' if extracted.get('extraction', {}).get('cached') else 'recomputed',
+            'index': 'reused' if index_reused else 'recomputed',
+            'grading': 'reused' if result.pop('llm_cached', False) else 'recomputed',
+        }
+
+        doc_key = self._doc_keys.get(extracted['filename'])
+        inputs = None
+        if self.manifest is not None and doc_key and content_hash:
+            inputs = RunManifest.compute_inputs(content_hash, self._rubric_data, self.config)
+            result['incremental']['changed'] = self.manifest.changed_inputs(doc_key, inputs)
+
+        succeeded = 'error' not in result and not result.get('failed_sub_rubrics')
+        if succeeded and content_hash:
+            if self.journal is not None:
+                self.journal.append(content_hash, result)
+            if inputs is not None:
+                self.manifest.update(doc_key, inputs, result)
+        return result
+
+    @staticmethod
+    def _attach_document_info(grading_result: Dict, extracted: Dict) -> Dict:
+        grading_result['document_info'] = {
+            'filename': extracted['filename'],
+            'page_count': extracted['page_count'],
+            'metadata': extracted['metadata'],
+            'extraction': extracted.get('extraction', {}),
+            'processed_at': datetime.now().isoformat()
+        }
+
+        print(f"✅ {extracted['filename']} - Score: {grading_result.get('final_score', 0):.1f}")
+        print(f"   Confidence: {grading_result.get('overall_confidence', 0):.2f}")
+
+        return grading_result
+
 
 class ReportGenerator:
     """Generate various report formats"""
@@ -534,6 +3071,8 @@ class ReportGenerator:
     @staticmethod
     def generate_excel_report(results: List[Dict], output_path: str):
         """Generate Excel report dengan multiple sheets"""
+        import pandas as pd
+
         print(f"\n📊 Generating Excel report...")
         logging.info(f"Generating Excel report to: {output_path}")
 
@@ -565,7 +3104,8 @@ class ReportGenerator:
                     'Weight': grade.get('weight', 0),
                     'Confidence': grade.get('confidence', 0),
                     'Reason': grade.get('reason', ''),
-                    'Evidence Quote': grade.get('evidence_quote', '')[:100] + '...'
+                    'Evidence Quote': grade.get('evidence_quote', '')[:100] + '...',
+                    'Evidence Page': grade.get('evidence_page', '')
                 })
 
         df_detailed = pd.DataFrame(detailed_data)
@@ -576,6 +3116,18 @@ class ReportGenerator:
 
         print(f"✅ Excel report saved: {output_path}")
 
+    @staticmethod
+    def find_latest_json_report(output_folder: str) -> Optional[Path]:
+        """File grading_results_*.json terbaru (nama file memuat timestamp run)"""
+        reports = sorted(Path(output_folder).glob("grading_results_*.json"))
+        return reports[-1] if reports else None
+
+    @staticmethod
+    def load_json_report(path: str) -> List[Dict]:
+        """Load hasil grading dari JSON report run sebelumnya"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
     @staticmethod
     def generate_json_report(results: List[Dict], output_path: str):
         """Generate JSON report"""
@@ -586,6 +3138,85 @@ class ReportGenerator:
 
         print(f"✅ JSON report saved: {output_path}")
 
+    @staticmethod
+    def print_incremental_summary(results: List[Dict]):
+        """Print tahap mana yang dipakai ulang vs dihitung ulang, dan input apa yang berubah"""
+        stages = {'extraction': 'Ekstraksi PDF', 'index': 'Embedding & index', 'grading': 'Grading LLM'}
+        counts = {stage: {'reused': 0, 'recomputed': 0} for stage in stages}
+        changes = {}
+        tracked = 0
+
+        for result in results:
+            incremental = result.get('incremental')
+            if not incremental:
+                continue
+            tracked += 1
+            for stage in stages:
+                status = incremental.get(stage)
+                if status in counts[stage]:
+                    counts[stage][status] += 1
+            for key in incremental.get('changed', []):
+                changes[key] = changes.get(key, 0) + 1
+
+        if not tracked:
+            return
+
+        print(f"\n{'='*60}")
+        print(f"♻️ INCREMENTAL SUMMARY")
+        print(f"{'='*60}")
+        for stage, label in stages.items():
+            print(f"  {label}: {counts[stage]['reused']} dipakai ulang, {counts[stage]['recomputed']} dihitung ulang")
+
+        if changes:
+            print(f"\nInput yang berubah sejak run terakhir:")
+            for key, count in sorted(changes.items(), key=lambda x: -x[1]):
+                print(f"  {key}: {count} dokumen")
+
+    @staticmethod
+    def print_extraction_statistics(results: List[Dict]):
+        """Print backend PDF yang dipakai dan rata-rata waktu ekstraksi per halaman"""
+        backend_usage = {}
+        backend_times = {}
+        probe_times = {}
+        probes_reused = 0
+
+        for result in results:
+            extraction = result.get('document_info', {}).get('extraction', {})
+            if not extraction or extraction.get('cached'):
+                continue
+
+            backend = extraction.get('backend', 'unknown')
+            backend_usage[backend] = backend_usage.get(backend, 0) + 1
+            probes_reused += bool(extraction.get('probe_reused'))
+
+            for name, timing in extraction.get('backends', {}).items():
+                total = backend_times.setdefault(name, {'pages': 0, 'seconds': 0.0})
+                total['pages'] += timing['pages']
+                total['seconds'] += timing['seconds']
+
+            for name, probe in extraction.get('probe', {}).items():
+                probe_times.setdefault(name, []).append(probe['ms_per_page'])
+
+        if not backend_usage:
+            return
+
+        print(f"\n{'='*60}")
+        print(f"📑 PDF EXTRACTION STATISTICS")
+        print(f"{'='*60}")
+        for name, count in sorted(backend_usage.items(), key=lambda x: -x[1]):
+            print(f"  {name}: dipilih untuk {count} dokumen")
+
+        print(f"\nWaktu ekstraksi per halaman:")
+        for name, total in backend_times.items():
+            print(f"  {name}: {total['seconds'] * 1000 / max(total['pages'], 1):.1f} ms/halaman ({total['pages']} halaman)")
+
+        if probe_times:
+            print(f"\nProbe (rata-rata ms/halaman):")
+            for name, times in sorted(probe_times.items(), key=lambda x: np.mean(x[1])):
+                print(f"  {name}: {np.mean(times):.1f} ms/halaman ({len(times)} dokumen)")
+            if probes_reused:
+                print(f"  (pilihan backend dipakai ulang dari producer yang sama: {probes_reused} dokumen)")
+
     @staticmethod
     def print_summary_statistics(results: List[Dict]):
         """Print summary statistics"""
@@ -618,8 +3249,8 @@ class ReportGenerator:
                 print(f"   - {doc_info.get('filename', 'Unknown')}: {r.get('overall_confidence', 0):.3f}")
 
 
-def main():
-    """Main execution function"""
+def run_grade(args):
+    """Subcommand grade: grading semua PDF di DATA_FOLDER lalu tulis report"""
     print(f"""
 ╔══════════════════════════════════════════════════════════╗
 ║     RAG AUTO-GRADING SYSTEM v2.0                        ║
@@ -627,8 +3258,6 @@ def main():
 ╚══════════════════════════════════════════════════════════╝
 """)
 
-    setup_logging()
-
     logging.info("Validating configuration from .env file...")
     errors = Config.validate()
 
@@ -652,7 +3281,9 @@ def main():
 
     print(f"\n🚀 Memulai batch processing...")
     logging.info("Starting batch processing...")
-    results = processor.process_folder(Config.DATA_FOLDER, Config.RUBRIC_FILE)
+    results = processor.process_folder(
+        Config.DATA_FOLDER, Config.RUBRIC_FILE, resume=args.resume, incremental=not args.full
+    )
 
     if not results:
         print("❌ Tidak ada hasil yang dihasilkan")
@@ -667,6 +3298,8 @@ def main():
     ReportGenerator.generate_json_report(results, str(json_path))
 
     ReportGenerator.print_summary_statistics(results)
+    ReportGenerator.print_extraction_statistics(results)
+    ReportGenerator.print_incremental_summary(results)
 
     print(f"\n{'='*60}")
     print(f"✅ SELESAI!")
@@ -677,5 +3310,75 @@ def main():
     print(f"\n💡 Tip: Buka Excel report untuk melihat detail lengkap penilaian")
 
 
+def _resolve_results_file(path: Optional[str]) -> Optional[Path]:
+    """Path JSON hasil grading dari argumen, atau report terbaru di OUTPUT_FOLDER"""
+    if path:
+        return Path(path)
+    latest = ReportGenerator.find_latest_json_report(Config.OUTPUT_FOLDER)
+    if latest is None:
+        print(f"❌ Tidak ada grading_results_*.json di {Config.OUTPUT_FOLDER}; jalankan grade dulu")
+    return latest
+
+
+def run_report(args):
+    """Subcommand report: buat ulang Excel report dari JSON hasil grading (tanpa model embedding)"""
+    results_path = _resolve_results_file(args.results)
+    if results_path is None:
+        return
+
+    results = ReportGenerator.load_json_report(str(results_path))
+    excel_path = Path(args.output) if args.output else results_path.with_suffix(".xlsx")
+    ReportGenerator.generate_excel_report(results, str(excel_path))
+    ReportGenerator.print_summary_statistics(results)
+
+
+def run_stats(args):
+    """Subcommand stats: statistik skor, ekstraksi PDF dan incremental dari JSON hasil grading"""
+    results_path = _resolve_results_file(args.results)
+    if results_path is None:
+        return
+
+    print(f"📄 {results_path}")
+    results = ReportGenerator.load_json_report(str(results_path))
+    ReportGenerator.print_summary_statistics(results)
+    ReportGenerator.print_extraction_statistics(results)
+    ReportGenerator.print_incremental_summary(results)
+
+
+def main(argv: Optional[List[str]] = None):
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description="RAG Auto-Grading System")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    grade = subparsers.add_parser("grade", help="Nilai semua PDF di DATA_FOLDER (default)")
+    grade.add_argument(
+        "--resume", action="store_true",
+        help="Lanjutkan run sebelumnya: lewati dokumen yang sudah dinilai dengan rubrik & konfigurasi yang sama"
+    )
+    grade.add_argument(
+        "--full", action="store_true",
+        help="Proses ulang semua dokumen walaupun input-nya tidak berubah sejak run terakhir"
+    )
+    grade.set_defaults(func=run_grade)
+
+    report = subparsers.add_parser("report", help="Buat ulang Excel report dari JSON hasil grading")
+    report.add_argument("results", nargs="?", help="File JSON hasil grading (default: terbaru di OUTPUT_FOLDER)")
+    report.add_argument("--output", help="Path file Excel (default: nama JSON dengan ekstensi .xlsx)")
+    report.set_defaults(func=run_report)
+
+    stats = subparsers.add_parser("stats", help="Statistik dari JSON hasil grading")
+    stats.add_argument("results", nargs="?", help="File JSON hasil grading (default: terbaru di OUTPUT_FOLDER)")
+    stats.set_defaults(func=run_stats)
+
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # Tanpa subcommand (pemanggilan lama, misalnya "--resume") berarti grade
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["grade"] + argv
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    args.func(args)
+
+
 if __name__ == "__main__":
     main()
@@ -9,8 +9,8 @@ from datetime import datetime
 import os
 import sys
 
-from rag_grading_improved import Config, BatchProcessor, PDFExtractor, RAGEngine, GradingEngine
-from evaluation_metrics import RAGEvaluationMetrics
+# Import rag_grading_improved ringan: faiss/torch baru di-load saat grading dijalankan
+from rag_grading_improved import Config, BatchProcessor, PDFExtractor, RAGEngine, GradingEngine, StreamingChunker
 
 st.set_page_config(
     page_title="RAG Auto-Grading System",
@@ -262,6 +262,12 @@ def process_uploaded_files(uploaded_files):
         with open(rubric_path, 'r', encoding='utf-8') as f:
             rubric_data = json.load(f)
 
+        pdf_extractor = PDFExtractor()
+        grading_engine = GradingEngine()
+
+        status_text.text("Preparing rubric queries...")
+        grading_engine.compile_rubric(rubric_data)
+
         results = []
 
         for idx, uploaded_file in enumerate(uploaded_files):
@@ -271,20 +277,42 @@ def process_uploaded_files(uploaded_files):
             with open(temp_path, 'wb') as f:
                 f.write(uploaded_file.getbuffer())
 
-            pdf_extractor = PDFExtractor()
-            extracted = pdf_extractor.extract_text_with_metadata(str(temp_path))
+            chunker = StreamingChunker(Config.CHUNK_SIZE, Config.CHUNK_OVERLAP)
+            extracted = pdf_extractor.extract_text_with_metadata(str(temp_path), page_consumer=chunker.feed)
 
             if extracted and extracted['text']:
-                rag_engine = RAGEngine()
-                rag_engine.build_index(extracted['text'])
+                rag_engine = RAGEngine(Config.EMBEDDING_MODEL)
+                rag_engine.build_index(
+                    extracted['text'],
+                    chunk_size=Config.CHUNK_SIZE,
+                    chunk_overlap=Config.CHUNK_OVERLAP,
+                    content_hash=extracted.get('content_hash'),
+                    chunks=chunker.finish(),
+                    pages=extracted['pages']
+                )
 
-                grading_engine = GradingEngine()
-                grading_result = grading_engine.grade_document(rag_engine, rubric_data)
+                status_text.text(f"Grading {uploaded_file.name}...")
+                prompt = grading_engine.prepare_prompt(rag_engine, rubric_data)
+
+                live_grades = st.empty()
+                received = []
+                grading_result = None
+                for event, payload in grading_engine.iter_grade_prompt(prompt, rubric_data):
+                    if event == "grade":
+                        received.append(
+                            f"- **{payload.get('sub_rubric', '?')}**: {payload.get('score_awarded', 0)} "
+                            f"({payload.get('selected_level', '-')})"
+                        )
+                        live_grades.markdown("\n".join(received))
+                    else:
+                        grading_result = payload
+                live_grades.empty()
 
                 grading_result['document_info'] = {
                     'filename': extracted['filename'],
                     'page_count': extracted['page_count'],
                     'metadata': extracted['metadata'],
+                    'extraction': extracted.get('extraction', {}),
                     'processed_at': datetime.now().isoformat()
                 }
 
@@ -478,7 +506,10 @@ def show_detailed_scores(results):
             st.info(grade.get('reason', 'No reason provided'))
 
             if 'evidence_quote' in grade and grade['evidence_quote']:
-                st.markdown("**Evidence:**")
+                if grade.get('evidence_page'):
+                    st.markdown(f"**Evidence (Halaman {grade['evidence_page']}):**")
+                else:
+                    st.markdown("**Evidence:**")
                 st.text_area(
                     "Evidence Quote",
                     value=grade['evidence_quote'],
@@ -672,6 +703,8 @@ def evaluation_page():
 
 def show_evaluation_metrics():
     """Show evaluation metrics comparing AI vs Human"""
+    from evaluation_metrics import RAGEvaluationMetrics
+
     st.subheader("🎯 Evaluation Metrics")
 
     ai_results = st.session_state.grading_results
@@ -0,0 +1,60 @@
+import hashlib
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Modul proyek ada di root repo (flat layout)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class HashEmbedder:
+    """
+    Model embedding palsu tanpa download: jumlah vektor acak per kata (seed dari
+    hash kata), jadi teks dengan kata yang sama punya embedding yang mirip.
+    """
+
+    dim = 64
+    max_seq_length = 256
+    tokenizer = None
+
+    def __init__(self):
+        self._words = {}
+
+    def _word_vector(self, word: str) -> np.ndarray:
+        vector = self._words.get(word)
+        if vector is None:
+            seed = int(hashlib.md5(word.encode("utf-8")).hexdigest()[:8], 16)
+            vector = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            self._words[word] = vector
+        return vector
+
+    def encode(self, sentences, batch_size=32, show_progress_bar=False, convert_to_numpy=True,
+               normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in re.findall(r"\w+", text.lower()):
+                embeddings[row] += self._word_vector(word)
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+
+@pytest.fixture
+def hash_embedder(tmp_path, monkeypatch):
+    """Daftarkan HashEmbedder sebagai EMBEDDING_MODEL; cache index ke tmp_path (dimatikan)"""
+    import rag_grading_improved as rag
+
+    model = HashEmbedder()
+    key = rag.EmbeddingModelRegistry.model_key(rag.Config.EMBEDDING_MODEL)
+    monkeypatch.setitem(rag.EmbeddingModelRegistry._models, key, model)
+    monkeypatch.setattr(rag.Config, "CACHE_FOLDER", str(tmp_path / "cache"))
+    monkeypatch.setattr(rag.Config, "INDEX_CACHE_ENABLED", False)
+    return model
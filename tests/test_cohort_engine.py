@@ -0,0 +1,106 @@
+import random
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from rag_grading_improved import CohortRAGEngine, Config, RAGEngine
+
+
+WORDS = ["flowchart", "algoritma", "pseudocode", "nilai", "data", "variabel", "for", "while", "hasil",
+         "input", "output", "loop", "kondisi", "array", "fungsi", "rekursi", "sorting", "tabel"]
+QUERY_GROUPS = [
+    ["flowchart algoritma", "pseudocode loop"],
+    ["hasil output tabel"],
+    ["fungsi rekursi", "sorting array", "kondisi while"],
+]
+
+
+def make_documents(seed: int, n_docs: int = 4):
+    rng = random.Random(seed)
+    documents = []
+    for doc_id in range(n_docs):
+        n_chunks = rng.randint(1, 12)
+        # Nomor chunk membuat teks unik sehingga dedupe per grup tidak menyamarkan perbedaan
+        documents.append([f"doc{doc_id} bagian{i} " + " ".join(rng.choices(WORDS, k=rng.randint(3, 12)))
+                          for i in range(n_chunks)])
+    return documents
+
+
+@pytest.fixture
+def engines_for(hash_embedder, monkeypatch):
+    monkeypatch.setattr(Config, "INDEX_TYPE", "flat")
+    monkeypatch.setattr(Config, "HYBRID_SEARCH", False)
+
+    def build(metric, quantization, documents):
+        monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", quantization)
+        engines = []
+        for chunks in documents:
+            engine = RAGEngine(metric=metric)
+            engine.build_index("\n".join(chunks), chunks=chunks)
+            engines.append(engine)
+        return engines
+
+    return build
+
+
+@pytest.mark.parametrize("seed", range(3))
+@pytest.mark.parametrize("quantization", ["none", "fp16", "int8"])
+@pytest.mark.parametrize("metric", ["l2", "cosine"])
+def test_cohort_matches_per_document_search(engines_for, hash_embedder, monkeypatch, metric, quantization, seed):
+    monkeypatch.setattr(Config, "SIMILARITY_THRESHOLD", 0.2)
+    engines = engines_for(metric, quantization, make_documents(seed))
+    cohort = CohortRAGEngine.from_engines(engines)
+
+    flat_queries = [query for group in QUERY_GROUPS for query in group]
+    group_sizes = [len(group) for group in QUERY_GROUPS]
+    q_embs = hash_embedder.encode(flat_queries)
+
+    for k in (1, 3, 20):
+        cohort_hits = cohort.search_embeddings_grouped_with_scores(q_embs, group_sizes, k)
+        assert len(cohort_hits) == len(engines)
+        for engine, doc_hits in zip(engines, cohort_hits):
+            assert [[chunk for chunk, _ in hits] for hits in doc_hits] == engine.search_batch(QUERY_GROUPS, k)
+            expected = engine.search_embeddings_grouped_with_scores(q_embs, group_sizes, k)
+            for hits, expected_hits in zip(doc_hits, expected):
+                np.testing.assert_allclose([score for _, score in hits],
+                                           [score for _, score in expected_hits], rtol=1e-4, atol=1e-3)
+
+
+def test_cohort_cosine_threshold_matches_per_document(engines_for, hash_embedder, monkeypatch):
+    engines = engines_for("cosine", "none", make_documents(7))
+    cohort = CohortRAGEngine.from_engines(engines)
+    q_embs = hash_embedder.encode(QUERY_GROUPS[0])
+
+    monkeypatch.setattr(Config, "SIMILARITY_THRESHOLD", 0.5)
+    cohort_chunks = cohort.search_embeddings_grouped(q_embs, [2], k=20)
+    for engine, doc_chunks in zip(engines, cohort_chunks):
+        assert doc_chunks == engine.search_batch(QUERY_GROUPS[:1], k=20)
+    assert sum(len(doc[0]) for doc in cohort_chunks) < sum(len(e.chunks) for e in engines)
+
+
+def test_cohort_with_empty_document(engines_for, hash_embedder):
+    documents = make_documents(3, n_docs=2)
+    engines = engines_for("l2", "none", documents)
+    engines.insert(1, RAGEngine(metric="l2"))
+    cohort = CohortRAGEngine.from_engines(engines)
+
+    hits = cohort.search_embeddings_grouped(hash_embedder.encode(QUERY_GROUPS[1]), [1], k=3)
+    assert hits[1] == [[]]
+    assert hits[0] == engines[0].search_batch(QUERY_GROUPS[1:2], k=3)
+    assert hits[2] == engines[2].search_batch(QUERY_GROUPS[1:2], k=3)
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_cohort_small_score_blocks(engines_for, hash_embedder, monkeypatch, quantization):
+    # Blok scoring kecil: satu blok berisi beberapa dokumen / satu dokumen per blok
+    engines = engines_for("l2", quantization, make_documents(11, n_docs=6))
+    cohort = CohortRAGEngine.from_engines(engines)
+    q_embs = hash_embedder.encode([query for group in QUERY_GROUPS for query in group])
+    group_sizes = [len(group) for group in QUERY_GROUPS]
+    expected = cohort.search_embeddings_grouped(q_embs, group_sizes, k=3)
+
+    monkeypatch.setattr(CohortRAGEngine, "SCORE_BLOCK_VECTORS", 8)
+    assert cohort.search_embeddings_grouped(q_embs, group_sizes, k=3) == expected
+    assert expected == [engine.search_batch(QUERY_GROUPS, k=3) for engine in engines]
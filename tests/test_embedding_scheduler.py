@@ -0,0 +1,137 @@
+import random
+
+import numpy as np
+import pytest
+
+from conftest import HashEmbedder
+from embedding_scheduler import (
+    CHARS_PER_TOKEN, encode_bucketed, encode_groups, padding_efficiency, plan_batches, token_lengths,
+)
+
+
+class RecordingEmbedder(HashEmbedder):
+    """HashEmbedder dengan panjang token = jumlah kata; setiap panggilan encode dicatat"""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def token_lengths(self, texts):
+        return [len(text.split()) for text in texts]
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        self.calls.append((list(sentences), batch_size))
+        return super().encode(sentences, batch_size=batch_size, **kwargs)
+
+
+def random_texts(rng: random.Random, n: int, max_words: int = 300):
+    return [" ".join(f"w{rng.randint(0, 50)}" for _ in range(rng.randint(1, max_words))) for _ in range(n)]
+
+
+def check_batches(lengths, batches, token_budget, max_batch_size):
+    flat = np.concatenate(batches) if batches else np.empty(0, dtype=np.int64)
+    # Setiap teks tepat satu kali
+    assert sorted(flat.tolist()) == list(range(len(lengths)))
+    for batch in batches:
+        assert 1 <= len(batch) <= max_batch_size
+        longest = int(lengths[batch].max())
+        # Satu teks yang sendirian melebihi budget tetap boleh (batch berisi 1 teks)
+        assert len(batch) * longest <= token_budget or len(batch) == 1
+    # Urut dari panjang ke pendek, jadi panjang padding tiap batch = teks pertamanya
+    assert all(a >= b for a, b in zip(lengths[flat], lengths[flat][1:]))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_plan_batches_respects_budget_and_max_batch(seed):
+    rng = random.Random(seed)
+    lengths = np.array([rng.randint(1, 512) for _ in range(rng.randint(0, 200))], dtype=np.int64)
+    token_budget = rng.choice([256, 1000, 4096, 16384])
+    max_batch_size = rng.choice([1, 4, 32, 128])
+
+    batches = plan_batches(lengths, token_budget, max_batch_size)
+
+    check_batches(lengths, batches, token_budget, max_batch_size)
+
+
+def test_plan_batches_is_greedy():
+    lengths = np.array([10, 100, 10, 50, 10, 10])
+    batches = plan_batches(lengths, token_budget=100, max_batch_size=3)
+    assert [batch.tolist() for batch in batches] == [[1], [3, 0], [2, 4, 5]]
+
+
+def test_plan_batches_max_batch_size_limits_short_texts():
+    batches = plan_batches(np.full(10, 2), token_budget=10 ** 6, max_batch_size=4)
+    assert [len(batch) for batch in batches] == [4, 4, 2]
+
+
+def test_plan_batches_text_over_budget_gets_own_batch():
+    batches = plan_batches(np.array([5, 600, 5]), token_budget=100, max_batch_size=8)
+    assert [batch.tolist() for batch in batches] == [[1], [0, 2]]
+
+
+def test_plan_batches_zero_length():
+    batches = plan_batches(np.array([0, 0, 0]), token_budget=2, max_batch_size=8)
+    assert [len(batch) for batch in batches] == [2, 1]
+
+
+def test_padding_efficiency():
+    lengths = np.array([4, 2, 2, 1])
+    assert padding_efficiency(lengths, [np.array([0, 1]), np.array([2, 3])]) == pytest.approx(9 / 12)
+    assert padding_efficiency(lengths, [np.array([i]) for i in range(4)]) == 1.0
+    assert padding_efficiency(np.array([], dtype=np.int64), []) == 1.0
+
+
+def test_token_lengths_truncates_to_max_seq_length():
+    model = RecordingEmbedder()
+    model.max_seq_length = 3
+    assert token_lengths(model, ["a b", "a b c d e"]).tolist() == [2, 3]
+
+
+def test_token_lengths_character_fallback():
+    model = HashEmbedder()
+    texts = ["x" * 40, "x" * 4000]
+    assert token_lengths(model, texts).tolist() == [40 // CHARS_PER_TOKEN + 2, model.max_seq_length]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_encode_bucketed_keeps_input_order(seed):
+    rng = random.Random(seed)
+    texts = random_texts(rng, 60)
+    model = RecordingEmbedder()
+
+    embeddings = encode_bucketed(model, texts, token_budget=1024, max_batch_size=16)
+
+    np.testing.assert_allclose(embeddings, HashEmbedder().encode(texts), rtol=1e-6, atol=1e-5)
+    lengths = token_lengths(model, texts)
+    for batch_texts, batch_size in model.calls:
+        assert batch_size == len(batch_texts) <= 16
+        longest = max(min(len(text.split()), model.max_seq_length) for text in batch_texts)
+        assert len(batch_texts) * longest <= 1024 or len(batch_texts) == 1
+    assert sum(len(batch_texts) for batch_texts, _ in model.calls) == len(texts)
+    assert len(model.calls) == len(plan_batches(lengths, 1024, 16))
+
+
+def test_encode_bucketed_empty():
+    model = RecordingEmbedder()
+    embeddings = encode_bucketed(model, [], token_budget=1024, max_batch_size=16)
+    assert embeddings.shape == (0, HashEmbedder.dim)
+    assert model.calls == []
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_encode_groups_splits_per_document(seed):
+    rng = random.Random(seed)
+    groups = [random_texts(rng, rng.randint(0, 15), max_words=120) for _ in range(6)]
+    model = RecordingEmbedder()
+
+    results = encode_groups(model, groups, token_budget=2048, max_batch_size=8)
+
+    assert len(results) == len(groups)
+    reference = HashEmbedder()
+    for texts, embeddings in zip(groups, results):
+        assert embeddings.shape == (len(texts), HashEmbedder.dim)
+        if texts:
+            np.testing.assert_allclose(embeddings, reference.encode(texts), rtol=1e-6, atol=1e-5)
+    # Semua dokumen dijadwalkan bersama, bukan satu jadwal per dokumen
+    flat = [text for texts in groups for text in texts]
+    assert len(model.calls) == len(plan_batches(token_lengths(model, flat), 2048, 8))
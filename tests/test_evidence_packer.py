@@ -0,0 +1,130 @@
+from types import SimpleNamespace
+
+import pytest
+
+from rag_grading_improved import ChunkMetadata, EvidencePacker
+from text_splitter import RecursiveTextSplitter
+
+
+def test_fair_share_round_robin():
+    packer = EvidencePacker(token_budget=40)
+    groups = [
+        [("a1", 0.9), ("a2", 0.8), ("a3", 0.7)],
+        [("b1", 0.3), ("b2", 0.2)],
+    ]
+    costs = {key: 10 for key in ("a1", "a2", "a3", "b1", "b2")}
+
+    # Jatah 20 token per sub-rubrik: a3 kalah dari b2 walaupun skornya lebih tinggi
+    assert packer.select(groups, costs) == ["a1", "b1", "a2", "b2"]
+
+
+def test_leftover_budget_goes_to_highest_scores():
+    packer = EvidencePacker(token_budget=60)
+    groups = [
+        [("a1", 0.9), ("a2", 0.8), ("a3", 0.7), ("a4", 0.6)],
+        [("b1", 0.3)],
+    ]
+    costs = {key: 10 for hits in groups for key, _ in hits}
+
+    # b tidak memakai seluruh jatahnya; sisa budget diisi a3 lalu a4 (skor tertinggi)
+    assert packer.select(groups, costs) == ["a1", "b1", "a2", "a3", "a4"]
+
+
+def test_top_hit_per_subrubric_is_guaranteed():
+    packer = EvidencePacker(token_budget=100)
+    groups = [
+        [("big", 0.2), ("a2", 0.9)],
+        [("b1", 0.8), ("b2", 0.7)],
+    ]
+    costs = {"big": 70, "a2": 5, "b1": 10, "b2": 10}
+
+    selected = packer.select(groups, costs)
+    # Hit teratas masuk walaupun melebihi jatah 50 token per sub-rubrik
+    assert selected[:2] == ["big", "b1"]
+    assert sum(costs[key] for key in selected) <= 100
+
+
+def test_budget_exhaustion():
+    packer = EvidencePacker(token_budget=25)
+    groups = [
+        [("a1", 0.9), ("a2", 0.8)],
+        [("huge", 0.95), ("b2", 0.5)],
+    ]
+    costs = {"a1": 10, "a2": 10, "huge": 30, "b2": 10}
+
+    selected = packer.select(groups, costs)
+    assert "huge" not in selected
+    assert selected == ["a1", "b2"]
+    assert sum(costs[key] for key in selected) <= 25
+    assert packer.select(groups, costs, token_budget=5) == []
+
+
+def test_shared_hit_counted_once():
+    packer = EvidencePacker(token_budget=100)
+    groups = [[("x", 0.9), ("a", 0.5)], [("x", 0.8), ("b", 0.4)]]
+    costs = {"x": 10, "a": 10, "b": 10}
+
+    selected = packer.select(groups, costs)
+    assert sorted(selected) == ["a", "b", "x"]
+    assert len(selected) == len(set(selected))
+
+
+def fake_engine(pages, chunk_size=60, chunk_overlap=20):
+    text = "\n".join(page["text"] for page in pages)
+    splitter = RecursiveTextSplitter(chunk_size, chunk_overlap)
+    spans = splitter.split_offsets(text)
+    return text, SimpleNamespace(
+        chunks=[text[start:end] for start, end in spans],
+        chunk_metadata=ChunkMetadata.from_spans(spans, pages),
+    )
+
+
+PAGES = [
+    {"page_num": 1, "text": " ".join(f"satu{i}" for i in range(40))},
+    {"page_num": 2, "text": " ".join(f"dua{i}" for i in range(40))},
+]
+
+
+def test_merge_overlapping_neighbours():
+    text, engine = fake_engine(PAGES)
+    meta = engine.chunk_metadata
+    assert meta.start[1] < meta.end[0], "chunk berurutan harus overlap"
+
+    blocks = EvidencePacker._merge_neighbours(engine, [0, 1, 2])
+    assert len(blocks) == 1
+    label, body = blocks[0].split("\n", 1)
+    assert label == f"[{meta.page_label(0, 2)}]"
+    # Teks overlap hanya muncul sekali
+    assert body == text[meta.start[0]:meta.end[2]]
+
+
+def test_non_adjacent_chunks_stay_separate():
+    text, engine = fake_engine(PAGES)
+    meta = engine.chunk_metadata
+    last = len(engine.chunks) - 1
+    assert meta.start[last] > meta.end[0]
+
+    blocks = EvidencePacker._merge_neighbours(engine, [0, last])
+    assert blocks == [
+        f"[{meta.page_label(0)}]\n{engine.chunks[0]}",
+        f"[{meta.page_label(last)}]\n{engine.chunks[last]}",
+    ]
+    assert meta.page_label(last) == "Halaman 2"
+
+
+def test_merge_without_offsets_keeps_chunks():
+    engine = SimpleNamespace(chunks=["a b", "b c"], chunk_metadata=ChunkMetadata.empty())
+    assert EvidencePacker._merge_neighbours(engine, [0, 1]) == ["a b", "b c"]
+
+
+@pytest.mark.parametrize("budget", [30, 80, 200])
+def test_pack_hits_respects_budget(budget):
+    _, engine = fake_engine(PAGES, chunk_size=40, chunk_overlap=0)
+    engine.format_evidence = lambda chunk_id: engine.chunks[chunk_id]
+    packer = EvidencePacker(token_budget=budget, chars_per_token=1.0)
+    n = len(engine.chunks)
+    hit_groups = [[(i, 1.0 - i / n) for i in range(0, n, 2)], [(i, 1.0 - i / n) for i in range(1, n, 2)]]
+
+    blocks = packer.pack_hits(engine, hit_groups)
+    body_chars = sum(len(block.split("\n", 1)[1]) for block in blocks)
+    assert 0 < body_chars <= budget
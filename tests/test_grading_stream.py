@@ -0,0 +1,105 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rag_grading_improved import Config, GradingEngine
+
+
+RUBRIC = {
+    "sub_rubrics": [{"id": 1, "name": "Dasar Teori"}, {"id": 2, "name": "Kode"}, {"id": 3, "name": "Kesimpulan"}],
+    "assignment_sub_rubrics": [
+        {"sub_rubric_id": 1, "weight": 20}, {"sub_rubric_id": 2, "weight": 50}, {"sub_rubric_id": 3, "weight": 30},
+    ],
+}
+SCORES = {"Dasar Teori": 80, "Kode": 60, "Kesimpulan": 90}
+
+
+def grade(name: str) -> dict:
+    return {"sub_rubric": name, "selected_level": "B", "score_awarded": SCORES[name],
+            "reason": "ok {}", "evidence_quote": "\"x\"", "confidence": 0.8}
+
+
+class SSEHandler(BaseHTTPRequestHandler):
+    """Stream jawaban server.respond(prompt) -> (content, cut); cut=None berarti stream lengkap"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        content, cut = self.server.respond(body["messages"][-1]["content"])
+        if cut is not None:
+            content = content[:cut]
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        for i in range(0, len(content), 5):
+            delta = {"choices": [{"delta": {"content": content[i:i + 5]}}]}
+            self.wfile.write(f"data: {json.dumps(delta)}\n\n".encode("utf-8"))
+        if cut is None:
+            self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SSEHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(Config, "OPENROUTER_URL", f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    monkeypatch.setattr(Config, "OPENROUTER_KEY", "test-key")
+    monkeypatch.setattr(Config, "LLM_STREAMING", True)
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", False)
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(Config, "SUBRUBRIC_MAX_ATTEMPTS", 1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_interrupted_stream_marks_missing_criteria_failed(stub):
+    content = json.dumps({"grading_result": [grade(n) for n in SCORES], "final_score": 0})
+    # Putus di tengah object ketiga
+    stub.respond = lambda prompt: (content, content.index('"Kesimpulan"') + 3)
+    streamed = []
+
+    result = GradingEngine(Config()).grade_prompt("prompt", RUBRIC, on_grade=streamed.append)
+
+    assert result["partial"] is True
+    assert "Stream ended" in result["error"]
+    assert [g["sub_rubric"] for g in streamed] == ["Dasar Teori", "Kode"]
+    by_name = {g["sub_rubric"]: g for g in result["grading_result"]}
+    assert [g["sub_rubric"] for g in result["grading_result"]] == list(SCORES)
+    assert "error" not in by_name["Dasar Teori"] and "error" not in by_name["Kode"]
+    assert by_name["Kode"]["weight"] == 50
+    assert by_name["Kesimpulan"]["error"] and by_name["Kesimpulan"]["score_awarded"] == 0
+    assert result["failed_sub_rubrics"] == ["Kesimpulan"]
+    assert result["final_score"] == pytest.approx((80 * 20 + 60 * 50) / 100)
+
+
+def test_per_subrubric_stream_interruptions(stub, monkeypatch):
+    monkeypatch.setattr(Config, "GRADING_MODE", "per_subrubric")
+
+    def respond(prompt):
+        name = prompt.split(":", 1)[1]
+        content = json.dumps({"grading_result": [grade(name)]})
+        if name == "Kode":
+            # Entry sudah lengkap sebelum putus: tetap dipakai
+            return content, len(content) - 1
+        if name == "Kesimpulan":
+            return content, content.index('"reason"')
+        return content, None
+
+    stub.respond = respond
+    prompts = [f"prompt:{sub_rubric['name']}" for sub_rubric in RUBRIC["sub_rubrics"]]
+
+    result = GradingEngine(Config()).grade_prompt(prompts, RUBRIC)
+
+    by_name = {g["sub_rubric"]: g for g in result["grading_result"]}
+    assert by_name["Dasar Teori"]["score_awarded"] == 80
+    assert by_name["Kode"]["score_awarded"] == 60 and "error" not in by_name["Kode"]
+    assert "Stream ended" in by_name["Kesimpulan"]["error"]
+    assert result["failed_sub_rubrics"] == ["Kesimpulan"]
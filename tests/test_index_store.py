@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from rag_grading_improved import ChunkMetadata, Config, IndexStore, build_faiss_index, quantize_vectors
+
+
+def make_entry(n=64, dim=16, quantization="none"):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((n, dim)).astype(np.float32)
+    chunks = [f"chunk {i} teks" for i in range(n)]
+    spans = [(i * 10, i * 10 + 12) for i in range(n)]
+    pages = [{"page_num": 1, "text": "x" * (n * 5)}, {"page_num": 2, "text": "y" * (n * 6)}]
+    index = build_faiss_index(vectors, "l2", "flat", quantization)
+    return vectors, chunks, ChunkMetadata.from_spans(spans, pages), quantize_vectors(vectors, quantization, index), index
+
+
+@pytest.mark.parametrize("quantization", ["none", "int8"])
+def test_save_load_round_trip(tmp_path, quantization):
+    vectors, chunks, meta, stored, index = make_entry(quantization=quantization)
+    store = IndexStore(str(tmp_path))
+    store.save("k1", chunks, meta, stored, index)
+
+    loaded_chunks, loaded_meta, loaded_vectors, loaded_index = store.load("k1")
+
+    assert loaded_chunks == chunks
+    for field in ChunkMetadata.FIELDS:
+        np.testing.assert_array_equal(getattr(loaded_meta, field), getattr(meta, field))
+    assert loaded_vectors.mode == quantization
+    assert isinstance(loaded_vectors.codes, np.memmap)
+    np.testing.assert_array_equal(np.asarray(loaded_vectors.codes), stored.codes)
+    np.testing.assert_allclose(loaded_vectors.decode(), stored.decode())
+
+    assert loaded_index.ntotal == index.ntotal
+    expected = index.search(vectors[:5], 3)
+    actual = loaded_index.search(vectors[:5], 3)
+    np.testing.assert_array_equal(actual[1], expected[1])
+    np.testing.assert_allclose(actual[0], expected[0], rtol=1e-5)
+
+
+def test_missing_entry_returns_none(tmp_path):
+    assert IndexStore(str(tmp_path)).load("nope") is None
+
+
+@pytest.mark.parametrize("damage", ["truncate_index", "delete_chunks", "garbage_embeddings"])
+def test_corrupt_entry_is_ignored(tmp_path, damage):
+    _, chunks, meta, stored, index = make_entry()
+    store = IndexStore(str(tmp_path))
+    store.save("k1", chunks, meta, stored, index)
+    entry_dir = tmp_path / "k1"
+
+    if damage == "truncate_index":
+        data = (entry_dir / "index.faiss").read_bytes()
+        (entry_dir / "index.faiss").write_bytes(data[:len(data) // 3])
+    elif damage == "delete_chunks":
+        (entry_dir / "chunks.json").unlink()
+    else:
+        (entry_dir / "embeddings.npy").write_bytes(b"not a numpy file")
+
+    assert store.load("k1") is None
+
+
+def test_save_does_not_overwrite_existing_entry(tmp_path):
+    _, chunks, meta, stored, index = make_entry()
+    store = IndexStore(str(tmp_path))
+    store.save("k1", chunks, meta, stored, index)
+    store.save("k1", ["lain"], meta, stored, index)
+
+    assert store.load("k1")[0] == chunks
+    assert not [path for path in tmp_path.iterdir() if path.name.startswith(".")]
+
+
+@pytest.mark.parametrize("name, value", [
+    ("HNSW_M", 16),
+    ("HNSW_EF_CONSTRUCTION", 200),
+    ("IVF_NLIST", 64),
+    ("PQ_M", 8),
+    ("INDEX_TYPE", "hnsw"),
+    ("VECTOR_QUANTIZATION", "int8"),
+])
+def test_build_parameters_change_store_key(monkeypatch, name, value):
+    monkeypatch.setattr(Config, "INDEX_TYPE", "auto")
+    before = IndexStore.make_key("hash", 1000, 200, "model", Config.index_spec())
+    monkeypatch.setattr(Config, name, value)
+    assert IndexStore.make_key("hash", 1000, 200, "model", Config.index_spec()) != before
+
+
+def test_irrelevant_build_parameters_keep_flat_key(monkeypatch):
+    monkeypatch.setattr(Config, "INDEX_TYPE", "flat")
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", "none")
+    spec = Config.index_spec()
+    monkeypatch.setattr(Config, "HNSW_M", 8)
+    monkeypatch.setattr(Config, "IVF_NLIST", 12)
+    monkeypatch.setattr(Config, "PQ_M", 4)
+    assert Config.index_spec() == spec
@@ -0,0 +1,155 @@
+import math
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from lexical_index import BM25Index, reciprocal_rank_fusion, tokenize
+from rag_grading_improved import Config, RAGEngine
+
+
+WORDS = ["flowchart", "algoritma", "pseudocode", "nilai", "data", "x", "for", "hasil", "input", "output", "loop"]
+
+
+def reference_bm25(texts, query, k1=1.2, b=0.75):
+    """BM25 langsung dari definisinya (idf Lucene), satu dokumen per iterasi"""
+    docs = [Counter(tokenize(text)) for text in texts]
+    lengths = [sum(doc.values()) for doc in docs]
+    avg_length = sum(lengths) / len(docs)
+    scores = []
+    for doc, length in zip(docs, lengths):
+        score = 0.0
+        for term in set(tokenize(query)):
+            df = sum(1 for other in docs if term in other)
+            if not df or term not in doc:
+                continue
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            tf = doc[term]
+            score += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * length / avg_length))
+        scores.append(score)
+    return np.array(scores)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_bm25_matches_reference(seed):
+    rng = random.Random(seed)
+    texts = [" ".join(rng.choices(WORDS, k=rng.randint(0, 30))) for _ in range(rng.randint(1, 25))]
+    queries = [" ".join(rng.choices(WORDS + ["tidak_ada"], k=rng.randint(1, 4))) for _ in range(6)]
+    k1, b = rng.choice([(1.2, 0.75), (1.5, 0.0), (0.9, 1.0)])
+    index = BM25Index(texts, k1, b)
+
+    scores = index.score_batch(queries)
+    for row, query in enumerate(queries):
+        np.testing.assert_allclose(scores[row], reference_bm25(texts, query, k1, b), rtol=1e-4, atol=1e-5)
+        np.testing.assert_allclose(index.score(query), scores[row])
+
+    k = min(5, len(texts))
+    S, I = index.search_batch(queries, k)
+    for row, query in enumerate(queries):
+        expected = reference_bm25(texts, query, k1, b)
+        for score, doc_id in zip(S[row], I[row]):
+            if doc_id < 0:
+                assert score <= 0
+            else:
+                assert score == pytest.approx(expected[doc_id], rel=1e-4)
+        found = [doc_id for doc_id in I[row] if doc_id >= 0]
+        found_scores = [expected[i] for i in found]
+        assert all(a >= b - 1e-6 for a, b in zip(found_scores, found_scores[1:]))
+        assert len(found) == min(k, int(np.sum(expected > 0)))
+        others = np.delete(expected, found)
+        if found and len(others):
+            assert found_scores[-1] >= others.max() - 1e-6
+
+
+def test_bm25_tokenizer_keeps_identifiers():
+    index = BM25Index(["total_nilai = x1 + y", "nilai total"])
+    assert index.score("total_nilai")[0] > 0
+    assert index.score("total_nilai")[1] == 0
+
+
+def test_rrf_ordering():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1, 4]], k=60)
+    expected = {
+        1: 1 / 61 + 1 / 62,
+        2: 1 / 62,
+        3: 1 / 63 + 1 / 61,
+        4: 1 / 63,
+    }
+    assert [item for item, _ in fused] == [1, 3, 2, 4]
+    for item, score in fused:
+        assert score == pytest.approx(expected[item])
+
+
+def test_rrf_ties_keep_first_appearance():
+    # 7 dan 8 sama-sama rank 1 di satu ranking; 7 muncul duluan
+    assert [item for item, _ in reciprocal_rank_fusion([[7, 5], [8, 6]])] == [7, 8, 5, 6]
+    assert [item for item, _ in reciprocal_rank_fusion([[8, 6], [7, 5]])] == [8, 7, 6, 5]
+
+
+def test_rrf_limit_and_empty():
+    assert len(reciprocal_rank_fusion([[1, 2, 3], [4]], limit=2)) == 2
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+def test_fuse_hits_thresholds_lexical_hits():
+    chunks = ["c0", "c1", "c2", "c3", "c1"]
+    dense_I = np.array([[0, 1, 2]])
+    dense_S = np.array([[0.9, 0.7, 0.4]])
+    lexical_I = np.array([[3, 4, -1]])
+    lexical_dense_S = np.array([[0.3, 0.8, -np.inf]])
+
+    fused = RAGEngine._fuse_hits(dense_I, dense_S, lexical_I, chunks, [1], 3, 0.5, lexical_dense_S)[0]
+    ids = [i for i, _ in fused]
+    # c2 (dense di bawah threshold) dan c3 (hanya BM25, di bawah threshold) dibuang.
+    # id 4 (BM25 rank 1, teks sama dengan c1) seri dengan c0 dan mengalahkan id 1
+    # (dense rank 2), jadi teks "c1" hanya muncul sekali lewat id 4
+    assert ids == [0, 4]
+    assert fused[0][1] == pytest.approx(1 / (Config.RRF_K + 1))
+
+    unfiltered = RAGEngine._fuse_hits(dense_I, dense_S, lexical_I, chunks, [1], 5)[0]
+    assert {i for i, _ in unfiltered} == {0, 1, 2, 3}
+
+
+def test_fuse_hits_groups_and_limit():
+    chunks = [f"c{i}" for i in range(6)]
+    dense_I = np.array([[0, 1], [2, 3], [4, 5]])
+    dense_S = np.ones((3, 2))
+    lexical_I = np.array([[5, -1], [4, -1], [0, -1]])
+
+    groups = RAGEngine._fuse_hits(dense_I, dense_S, lexical_I, chunks, [2, 1], 1)
+    assert len(groups) == 2
+    assert len(groups[0]) == 2 and len(groups[1]) == 1
+    assert groups[1][0][0] in (4, 0)
+
+
+@pytest.fixture
+def hybrid_engine(hash_embedder, monkeypatch):
+    monkeypatch.setattr(Config, "HYBRID_SEARCH", True)
+    monkeypatch.setattr(Config, "INDEX_TYPE", "flat")
+    monkeypatch.setattr(Config, "VECTOR_QUANTIZATION", "none")
+    filler = " ".join(f"kata{i}" for i in range(40))
+    chunks = [
+        "flowchart algoritma",
+        f"{filler} flowchart",
+        "pseudocode nilai data",
+        "hasil output loop",
+    ]
+    engine = RAGEngine(metric="cosine")
+    engine.build_index("\n".join(chunks), chunks=chunks)
+    return engine
+
+
+def test_bm25_only_hit_below_threshold_dropped(hybrid_engine, hash_embedder, monkeypatch):
+    query = "flowchart"
+    q_emb = hash_embedder.encode([query])
+    diluted = 1
+
+    monkeypatch.setattr(Config, "SIMILARITY_THRESHOLD", 0.0)
+    hits = hybrid_engine.search_embeddings_grouped_hits(q_emb, [1], k=4, queries=[query])[0]
+    assert diluted in [i for i, _ in hits]
+
+    monkeypatch.setattr(Config, "SIMILARITY_THRESHOLD", 0.5)
+    hits = hybrid_engine.search_embeddings_grouped_hits(q_emb, [1], k=4, queries=[query])[0]
+    assert [i for i, _ in hits] == [0]
+    assert [chunk for chunk, _ in hybrid_engine.search_with_scores(query, k=4)] == ["flowchart algoritma"]
@@ -0,0 +1,225 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import llm_client
+from llm_client import LLMResponseCache
+from rag_grading_improved import Config, GradingEngine
+
+
+class Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_client.time, "time", clock)
+    return clock
+
+
+def test_make_key_depends_on_model_temperature_and_messages():
+    messages = [{"role": "user", "content": "nilai"}]
+    key = LLMResponseCache.make_key("m", 0.0, messages)
+
+    assert key == LLMResponseCache.make_key("m", 0.0, [{"content": "nilai", "role": "user"}])
+    assert key != LLMResponseCache.make_key("m2", 0.0, messages)
+    assert key != LLMResponseCache.make_key("m", 0.2, messages)
+    assert key != LLMResponseCache.make_key("m", 0.0, [{"role": "user", "content": "nilai!"}])
+
+
+def test_put_get_persists_across_instances(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    assert cache.get("k") is None
+    cache.put("k", "m", "jawaban ✓")
+
+    assert cache.get("k") == "jawaban ✓"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert LLMResponseCache(str(tmp_path / "llm.sqlite3")).get("k") == "jawaban ✓"
+
+
+def test_ttl_expiry(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    cache.put("k", "m", "x")
+
+    clock.now += 59
+    assert cache.get("k") == "x"
+    # Umur dihitung dari created_at, bukan last_used
+    clock.now += 2
+    assert cache.get("k") is None
+    clock.now -= 61
+    assert cache.get("k") is None
+
+
+def test_ttl_zero_never_expires(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=0)
+    cache.put("k", "m", "x")
+    clock.now += 10 ** 9
+    assert cache.get("k") == "x"
+
+
+def test_put_evicts_expired_entries(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=60)
+    cache.put("old", "m", "x")
+    clock.now += 61
+    cache.put("new", "m", "y")
+
+    count = cache._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+    assert count == 1
+
+
+def test_lru_eviction_under_max_bytes(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=250)
+    for key in ("a", "b"):
+        cache.put(key, "m", key * 100)
+        clock.now += 1
+    # "a" dipakai lagi sehingga "b" menjadi yang paling lama tidak dipakai
+    assert cache.get("a") == "a" * 100
+    clock.now += 1
+
+    cache.put("c", "m", "c" * 100)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 100
+    assert cache.get("c") == "c" * 100
+
+
+def test_entry_larger_than_max_bytes_is_not_kept(tmp_path, clock):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=50)
+    cache.put("big", "m", "x" * 100)
+    assert cache.get("big") is None
+
+
+def test_clear(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+    cache.put("k", "m", "x")
+    cache.clear()
+    assert cache.get("k") is None
+
+
+RUBRIC = {
+    "sub_rubrics": [{"id": 1, "name": "Dasar Teori"}, {"id": 2, "name": "Kode"}],
+    "assignment_sub_rubrics": [{"sub_rubric_id": 1, "weight": 40}, {"sub_rubric_id": 2, "weight": 60}],
+}
+
+
+def grade(name: str, score: float) -> dict:
+    return {"sub_rubric": name, "selected_level": "B", "score_awarded": score,
+            "reason": "ok", "evidence_quote": "\"x\"", "confidence": 0.8}
+
+
+def scores(result: dict) -> dict:
+    return {g["sub_rubric"]: g["score_awarded"] for g in result["grading_result"]}
+
+
+def answer(by_name: dict) -> str:
+    return json.dumps({"grading_result": [grade(name, score) for name, score in by_name.items()]})
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """Jawab dengan server.respond(prompt) (non-streaming) dan catat prompt yang diterima"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = body["messages"][-1]["content"]
+        self.server.prompts.append(prompt)
+        payload = json.dumps({"choices": [{"message": {"content": self.server.respond(prompt)}}]}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub(tmp_path, monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+    server.daemon_threads = True
+    server.prompts = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    monkeypatch.setattr(Config, "OPENROUTER_URL", f"http://127.0.0.1:{server.server_port}/v1/chat/completions")
+    monkeypatch.setattr(Config, "OPENROUTER_KEY", "test-key")
+    monkeypatch.setattr(Config, "LLM_STREAMING", False)
+    monkeypatch.setattr(Config, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "LLM_CACHE_BYPASS", False)
+    monkeypatch.setattr(Config, "CACHE_FOLDER", str(tmp_path / "cache"))
+    monkeypatch.setattr(Config, "LLM_MAX_RETRIES", 0)
+    monkeypatch.setattr(Config, "SUBRUBRIC_MAX_ATTEMPTS", 1)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_valid_response_is_cached(stub):
+    stub.respond = lambda prompt: answer({"Dasar Teori": 80, "Kode": 60})
+
+    first = GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+    second = GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+
+    assert len(stub.prompts) == 1
+    assert "llm_cached" not in first and second["llm_cached"] is True
+    assert scores(second) == scores(first) == {"Dasar Teori": 80, "Kode": 60}
+
+
+def test_bypass_skips_cache_but_refreshes_it(stub, monkeypatch):
+    stub.respond = lambda prompt: answer({"Dasar Teori": 80, "Kode": 60})
+    GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+
+    monkeypatch.setattr(Config, "LLM_CACHE_BYPASS", True)
+    stub.respond = lambda prompt: answer({"Dasar Teori": 100, "Kode": 100})
+    bypassed = GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+    assert len(stub.prompts) == 2
+    assert "llm_cached" not in bypassed and scores(bypassed) == {"Dasar Teori": 100, "Kode": 100}
+
+    monkeypatch.setattr(Config, "LLM_CACHE_BYPASS", False)
+    cached = GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+    assert len(stub.prompts) == 2
+    assert cached["llm_cached"] is True and scores(cached) == {"Dasar Teori": 100, "Kode": 100}
+
+
+def test_invalid_response_is_never_stored(stub):
+    stub.respond = lambda prompt: "maaf, saya tidak bisa menilai"
+
+    failed = GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+    assert "error" in failed
+
+    stub.respond = lambda prompt: answer({"Dasar Teori": 80, "Kode": 60})
+    result = GradingEngine(Config()).grade_prompt("prompt", RUBRIC)
+    assert len(stub.prompts) == 2
+    assert "error" not in result and "llm_cached" not in result
+
+
+def test_per_subrubric_caches_only_valid_answers(stub, monkeypatch):
+    monkeypatch.setattr(Config, "GRADING_MODE", "per_subrubric")
+    prompts = [f"prompt:{sub_rubric['name']}" for sub_rubric in RUBRIC["sub_rubrics"]]
+
+    def respond(prompt):
+        name = prompt.split(":", 1)[1]
+        return "bukan json" if name == "Kode" else answer({name: 80})
+
+    stub.respond = respond
+    first = GradingEngine(Config()).grade_prompt(prompts, RUBRIC)
+    assert first["failed_sub_rubrics"] == ["Kode"]
+
+    stub.prompts.clear()
+    stub.respond = lambda prompt: answer({prompt.split(":", 1)[1]: 70})
+    second = GradingEngine(Config()).grade_prompt(prompts, RUBRIC)
+
+    # Hanya sub-rubrik yang jawabannya tidak valid yang dikirim ulang
+    assert stub.prompts == ["prompt:Kode"]
+    assert scores(second) == {"Dasar Teori": 80, "Kode": 70}
+    assert "llm_cached" not in second
+
+    third = GradingEngine(Config()).grade_prompt(prompts, RUBRIC)
+    assert stub.prompts == ["prompt:Kode"]
+    assert third["llm_cached"] is True
@@ -0,0 +1,283 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from llm_client import IncrementalJSONArrayParser, LLMRequestError, OpenRouterClient
+
+
+def completion(content: str) -> bytes:
+    return json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+
+
+def sse_event(content: str) -> bytes:
+    return f"data: {json.dumps({'choices': [{'delta': {'content': content}}]})}\n\n".encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Menjalankan respons dari server.script secara berurutan (respons terakhir dipakai ulang)"""
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.request_times.append(time.monotonic())
+            index = len(server.request_times) - 1
+            server.inflight += 1
+            server.max_inflight = max(server.max_inflight, server.inflight)
+        try:
+            time.sleep(server.delay)
+            server.script[min(index, len(server.script) - 1)](self)
+        finally:
+            with server.lock:
+                server.inflight -= 1
+
+    def send_body(self, status: int, body: bytes, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def reply(status: int, body: bytes = b"{}", headers=None):
+    return lambda handler: handler.send_body(status, body, headers)
+
+
+def stream_then_eof(handler):
+    """Beberapa delta SSE lalu koneksi ditutup normal tanpa [DONE]"""
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream")
+    handler.end_headers()
+    handler.wfile.write(sse_event("Hello") + sse_event(" world"))
+
+
+def stream_then_drop(handler):
+    """Beberapa delta SSE dengan chunked encoding lalu koneksi putus sebelum chunk penutup"""
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream")
+    handler.send_header("Transfer-Encoding", "chunked")
+    handler.end_headers()
+    for event in (sse_event("Hello"), sse_event(" world")):
+        handler.wfile.write(f"{len(event):x}\r\n".encode("ascii") + event + b"\r\n")
+    handler.wfile.flush()
+    handler.close_connection = True
+
+
+def stream_ok(handler):
+    handler.send_response(200)
+    handler.send_header("Content-Type", "text/event-stream")
+    handler.end_headers()
+    handler.wfile.write(sse_event("Hello") + sse_event(" world") + b"data: [DONE]\n\n")
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.request_times = []
+    server.inflight = 0
+    server.max_inflight = 0
+    server.delay = 0.0
+    server.script = [reply(200, completion("ok"))]
+    server.url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def run(client: OpenRouterClient, coro_fn):
+    async def main():
+        try:
+            return await coro_fn()
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def make_client(url: str, **kwargs) -> OpenRouterClient:
+    options = {"rate_limit_rps": 0, "max_retries": 3, "backoff_base": 0.01, "backoff_max": 5.0, "timeout": 10.0}
+    options.update(kwargs)
+    return OpenRouterClient(url, "test-key", **options)
+
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_retries_429_then_5xx_then_succeeds(stub):
+    stub.script = [
+        reply(429, b'{"error": "rate limited"}', {"Retry-After": "1"}),
+        reply(503, b'{"error": "unavailable"}'),
+        reply(200, completion("graded")),
+    ]
+    client = make_client(stub.url)
+
+    assert run(client, lambda: client.chat(MESSAGES, model="m")) == "graded"
+
+    times = stub.request_times
+    assert len(times) == 3
+    # Retry-After: 1 dihormati, retry 5xx memakai backoff (maks backoff_base * 2)
+    assert times[1] - times[0] >= 0.95
+    assert times[2] - times[1] < 0.5
+
+
+def test_stream_retries_before_content(stub):
+    stub.script = [reply(429, b"{}", {"Retry-After": "0.2"}), stream_ok]
+    client = make_client(stub.url)
+    deltas = []
+
+    result = run(client, lambda: client.chat_stream(MESSAGES, model="m", on_delta=deltas.append))
+
+    assert result == "Hello world"
+    assert deltas == ["Hello", " world"]
+    assert len(stub.request_times) == 2
+    assert stub.request_times[1] - stub.request_times[0] >= 0.15
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.script = [reply(502, b"bad gateway")]
+    client = make_client(stub.url, max_retries=2)
+
+    with pytest.raises(LLMRequestError) as excinfo:
+        run(client, lambda: client.chat(MESSAGES, model="m"))
+
+    assert excinfo.value.status_code == 502
+    assert len(stub.request_times) == 3
+
+
+def test_non_retryable_status_fails_immediately(stub):
+    stub.script = [reply(400, b"bad request")]
+    client = make_client(stub.url)
+
+    with pytest.raises(LLMRequestError) as excinfo:
+        run(client, lambda: client.chat(MESSAGES, model="m"))
+
+    assert excinfo.value.status_code == 400
+    assert len(stub.request_times) == 1
+
+
+def test_concurrency_cap(stub):
+    stub.delay = 0.2
+    client = make_client(stub.url, max_concurrency=2)
+
+    async def fan_out():
+        return await asyncio.gather(*(client.chat(MESSAGES, model="m") for _ in range(6)))
+
+    assert run(client, fan_out) == ["ok"] * 6
+    assert stub.max_inflight == 2
+
+
+def test_token_bucket_limits_request_rate(stub):
+    client = make_client(stub.url, rate_limit_rps=10, rate_limit_burst=1)
+
+    async def sequential():
+        for _ in range(5):
+            await client.chat(MESSAGES, model="m")
+
+    run(client, sequential)
+
+    times = stub.request_times
+    assert len(times) == 5
+    assert times[-1] - times[0] >= 0.35
+
+
+@pytest.mark.parametrize("script", [stream_then_eof, stream_then_drop], ids=["eof", "dropped"])
+def test_stream_failure_keeps_partial_content(stub, script):
+    stub.script = [script]
+    client = make_client(stub.url)
+    deltas = []
+
+    with pytest.raises(LLMRequestError) as excinfo:
+        run(client, lambda: client.chat_stream(MESSAGES, model="m", on_delta=deltas.append))
+
+    assert excinfo.value.partial_content == "Hello world"
+    assert deltas == ["Hello", " world"]
+    # Tidak ada retry setelah konten diterima
+    assert len(stub.request_times) == 1
+
+
+def test_parse_retry_after():
+    client = make_client("http://unused", backoff_max=30.0)
+
+    assert client._parse_retry_after(None) is None
+    assert client._parse_retry_after("2.5") == 2.5
+    assert client._parse_retry_after("3600") == 30.0
+    assert client._parse_retry_after("-1") == 0.0
+    assert client._parse_retry_after("not a date") is None
+    http_date = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 10))
+    assert 5.0 <= client._parse_retry_after(http_date) <= 10.0
+
+
+GRADES = [
+    {"sub_rubric": "Dasar Teori", "score_awarded": 80, "reason": "kutipan \"x}\" dan {kurung}", "confidence": 0.9},
+    {"sub_rubric": "Kode", "score_awarded": 70, "detail": {"nested": {"depth": [1, {"x": "]"}]}}, "confidence": 0.8},
+    {"sub_rubric": "Kesimpulan", "score_awarded": 60, "reason": "backslash \\ lalu \\\"quote", "confidence": 0.7},
+]
+DOCUMENT = "```json\n" + json.dumps(
+    {"note": "{\"grading_result\" disebut dulu}", "grading_result": GRADES, "final_score": 70}, indent=1
+) + "\n```"
+
+
+def object_ends(document: str):
+    """Offset setelah '}' penutup tiap object grading_result"""
+    array_start = document.index("[", document.index('"grading_result":'))
+    decoder = json.JSONDecoder()
+    ends = []
+    pos = array_start + 1
+    for _ in GRADES:
+        pos = document.index("{", pos)
+        _, pos = decoder.raw_decode(document, pos)
+        ends.append(pos)
+    return ends
+
+
+def test_parser_fixture_is_valid_json():
+    assert json.loads(DOCUMENT[8:-4])["grading_result"] == GRADES
+
+
+@pytest.mark.parametrize("cut", range(len(DOCUMENT) + 1))
+def test_parser_split_at_every_boundary(cut):
+    parser = IncrementalJSONArrayParser("grading_result")
+    first = parser.feed(DOCUMENT[:cut])
+    second = parser.feed(DOCUMENT[cut:])
+
+    assert first + second == GRADES
+    assert parser.items == GRADES
+    # Object di-emit begitu '}' penutupnya diterima, tidak lebih awal
+    assert len(first) == sum(end <= cut for end in object_ends(DOCUMENT))
+
+
+def test_parser_char_by_char():
+    parser = IncrementalJSONArrayParser("grading_result")
+    emitted = []
+    for ch in DOCUMENT:
+        emitted.extend(parser.feed(ch))
+    assert emitted == GRADES
+
+
+@pytest.mark.parametrize("n_complete", range(len(GRADES)))
+def test_parser_truncated_mid_object(n_complete):
+    ends = object_ends(DOCUMENT)
+    start = ends[n_complete - 1] if n_complete else DOCUMENT.index("[")
+    for cut in range(start + 1, ends[n_complete]):
+        parser = IncrementalJSONArrayParser("grading_result")
+        parser.feed(DOCUMENT[:cut])
+        assert parser.items == GRADES[:n_complete]
+
+
+def test_parser_ignores_text_after_array():
+    parser = IncrementalJSONArrayParser("grading_result")
+    parser.feed('{"grading_result": [{"a": 1}], "other": [{"b": 2}]}')
+    assert parser.items == [{"a": 1}]
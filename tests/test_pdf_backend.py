@@ -0,0 +1,137 @@
+from pathlib import Path
+
+import pytest
+
+import rag_grading_improved as rag
+from rag_grading_improved import PDFBackend, PDFExtractor
+
+
+SAMPLE_PDFS = sorted((Path(__file__).resolve().parent.parent / "data").glob("*.pdf"))
+
+
+class EmptyBackend(PDFBackend):
+    """Backend yang selalu gagal quality check (tidak ada teks)"""
+
+    name = "empty"
+
+    def page_count(self) -> int:
+        return 1
+
+    def extract_page(self, index: int) -> str:
+        return ""
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Catat setiap backend yang dibuka; cache pilihan backend dikosongkan"""
+    names = []
+    original_init = PDFBackend.__init__
+
+    def init(self, pdf_path):
+        names.append(self.name)
+        original_init(self, pdf_path)
+
+    monkeypatch.setattr(PDFBackend, "__init__", init)
+    monkeypatch.setattr(PDFExtractor, "_backend_choices", {})
+    monkeypatch.setattr(rag.Config, "PDF_BACKEND", "auto")
+    return names
+
+
+def available_backends():
+    return [name for name, cls in rag.PDF_BACKENDS.items() if cls.is_available()]
+
+
+@pytest.mark.skipif(not SAMPLE_PDFS, reason="no sample PDFs in data/")
+def test_backend_choice_reused_for_same_producer(opened):
+    pdf = str(SAMPLE_PDFS[0])
+
+    first, n_pages = PDFExtractor.select_backend(pdf)
+    assert opened == available_backends()
+
+    opened.clear()
+    stats = {}
+    assert PDFExtractor.select_backend(pdf, stats) == (first, n_pages)
+    assert opened == [first]
+    assert stats['probe_reused'] is True
+    assert stats['probe'][first]['chars'] > 0
+
+
+@pytest.mark.skipif(not SAMPLE_PDFS, reason="no sample PDFs in data/")
+def test_pdf_without_producer_is_always_probed(opened, monkeypatch):
+    monkeypatch.setattr(PDFExtractor, "_producer_key", staticmethod(lambda pdf_path: ""))
+    pdf = str(SAMPLE_PDFS[0])
+
+    for _ in range(2):
+        opened.clear()
+        stats = {}
+        PDFExtractor.select_backend(pdf, stats)
+        assert opened == available_backends()
+        assert 'probe_reused' not in stats
+    assert PDFExtractor._backend_choices == {}
+
+
+@pytest.mark.skipif(len(SAMPLE_PDFS) < 2, reason="need two sample PDFs")
+def test_different_producers_probe_separately(opened):
+    keys = {PDFExtractor._producer_key(str(pdf)) for pdf in SAMPLE_PDFS[:2]}
+    if len(keys) < 2:
+        pytest.skip("sample PDFs share a producer")
+
+    for pdf in SAMPLE_PDFS[:2]:
+        opened.clear()
+        stats = {}
+        PDFExtractor.select_backend(str(pdf), stats)
+        assert opened == available_backends()
+        assert 'probe_reused' not in stats
+
+
+@pytest.mark.skipif(not SAMPLE_PDFS, reason="no sample PDFs in data/")
+def test_reprobe_when_cached_backend_yields_no_text(opened, monkeypatch):
+    pdf = str(SAMPLE_PDFS[0])
+    monkeypatch.setitem(rag.PDF_BACKENDS, EmptyBackend.name, EmptyBackend)
+    producer = PDFExtractor._producer_key(pdf)
+    PDFExtractor._backend_choices[producer] = EmptyBackend.name
+
+    stats = {}
+    selected, _ = PDFExtractor.select_backend(pdf, stats)
+
+    assert selected != EmptyBackend.name
+    assert opened[0] == EmptyBackend.name
+    assert 'probe_reused' not in stats
+    assert PDFExtractor._backend_choices[producer] == selected
+
+
+@pytest.mark.parametrize("name, value", [
+    ("PDF_BACKEND", "pdfplumber"),
+    ("OCR_ENABLED", False),
+    ("OCR_LANG", "eng"),
+])
+def test_extraction_settings_change_cache_key_and_manifest(monkeypatch, name, value):
+    monkeypatch.setattr(rag.Config, "PDF_BACKEND", "auto")
+    monkeypatch.setattr(rag.Config, "OCR_ENABLED", True)
+    monkeypatch.setattr(rag.Config, "OCR_LANG", "ind+eng")
+    spec = PDFExtractor.extractor_spec()
+    inputs = rag.RunManifest.compute_inputs("abc", {}, rag.Config())
+
+    monkeypatch.setattr(rag.Config, name, value)
+    assert PDFExtractor.extractor_spec() != spec
+    changed = rag.RunManifest.compute_inputs("abc", {}, rag.Config())
+    assert changed['extractor'] != inputs['extractor']
+    fingerprints = rag.RunManifest.compute_fingerprints(changed)
+    assert fingerprints['extraction'] != rag.RunManifest.compute_fingerprints(inputs)['extraction']
+
+
+@pytest.mark.skipif(not SAMPLE_PDFS, reason="no sample PDFs in data/")
+def test_pdf_cache_miss_after_backend_change(tmp_path, monkeypatch):
+    pytest.importorskip("pdfplumber")
+    monkeypatch.setattr(rag.Config, "CACHE_FOLDER", str(tmp_path))
+    monkeypatch.setattr(rag.Config, "PDF_CACHE_ENABLED", True)
+    monkeypatch.setattr(rag.Config, "PDF_BACKEND", "pypdf2")
+    pdf = str(SAMPLE_PDFS[0])
+
+    assert not PDFExtractor.extract_text_with_metadata(pdf, parallel=False)['extraction'].get('cached')
+    assert PDFExtractor.extract_text_with_metadata(pdf, parallel=False)['extraction'].get('cached')
+
+    monkeypatch.setattr(rag.Config, "PDF_BACKEND", "pdfplumber")
+    extracted = PDFExtractor.extract_text_with_metadata(pdf, parallel=False)
+    assert not extracted['extraction'].get('cached')
+    assert extracted['extraction']['backend'] == "pdfplumber"
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+import rag_grading_improved as rag
+from rag_grading_improved import BatchProcessor, Config, RunJournal, RunManifest, file_sha256
+
+
+RUBRIC = {"sub_rubrics": [{"id": 1, "name": "Dasar Teori"}], "assignment_sub_rubrics": []}
+
+
+def graded(filename: str, score: float = 80.0, **extra):
+    return {"grading_result": [], "final_score": score, "document_info": {"filename": filename}, **extra}
+
+
+@pytest.fixture
+def journal_config(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "JOURNAL_ENABLED", True)
+    monkeypatch.setattr(Config, "JOURNAL_FOLDER", str(tmp_path / "journal"))
+    monkeypatch.setattr(Config, "INCREMENTAL_ENABLED", False)
+    return Config()
+
+
+def test_run_key_and_manifest_use_same_settings():
+    inputs = RunManifest.compute_inputs("abc", RUBRIC, Config())
+    staged = [key for keys in RunManifest.STAGE_INPUTS.values() for key in keys]
+    assert sorted(staged) == sorted(inputs)
+    assert {key: value for key, value in inputs.items() if key != 'content_hash'} == rag.run_settings(RUBRIC, Config())
+
+
+@pytest.mark.parametrize("name, value", [
+    ("INDEX_TYPE", "hnsw"),
+    ("VECTOR_QUANTIZATION", "pq"),
+    ("INDEX_METRIC", "cosine"),
+    ("HYBRID_SEARCH", True),
+])
+def test_run_key_changes_with_retrieval_settings(monkeypatch, name, value):
+    before = RunJournal.compute_run_key(RUBRIC, Config())
+    monkeypatch.setattr(Config, name, value)
+    assert RunJournal.compute_run_key(RUBRIC, Config()) != before
+
+
+def test_load_skips_truncated_last_line(tmp_path):
+    journal = RunJournal(str(tmp_path), "key1")
+    journal.append("h1", graded("a"))
+    journal.append("h2", graded("b"))
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"run_key": "key1", "file_hash": "h3", "result": graded("c")})[:40])
+
+    completed = journal.load()
+    assert set(completed) == {"h1", "h2"}
+    assert completed["h2"]["document_info"]["filename"] == "b"
+
+
+def test_load_ignores_other_run_key_and_last_entry_wins(tmp_path):
+    journal = RunJournal(str(tmp_path), "key1")
+    journal.append("h1", graded("a", 10.0))
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"run_key": "other", "file_hash": "h2", "result": graded("b")}) + "\n")
+    journal.append("h1", graded("a", 20.0))
+
+    completed = journal.load()
+    assert set(completed) == {"h1"}
+    assert completed["h1"]["final_score"] == 20.0
+    assert RunJournal(str(tmp_path), "missing").load() == {}
+
+
+@pytest.mark.parametrize("extra", [
+    {"error": "LLM request failed"},
+    {"failed_sub_rubrics": ["Dasar Teori"]},
+    {"partial": True, "error": "Stream interrupted"},
+])
+def test_failed_or_partial_results_not_journaled(journal_config, tmp_path, extra):
+    processor = BatchProcessor(journal_config)
+    processor.journal = RunJournal(journal_config.JOURNAL_FOLDER, "key1")
+    extracted = {"filename": "a", "page_count": 1, "metadata": {}, "content_hash": "h1"}
+
+    processor._record_result(graded("a", **extra), extracted)
+    assert processor.journal.load() == {}
+
+    processor._record_result(graded("a"), extracted)
+    assert set(processor.journal.load()) == {"h1"}
+
+
+def test_resume_returns_results_in_folder_order(journal_config, tmp_path, monkeypatch):
+    folder = tmp_path / "pdfs"
+    folder.mkdir()
+    names = ["a", "b", "c", "d"]
+    for name in names:
+        (folder / f"{name}.pdf").write_bytes(f"%PDF fake {name}".encode())
+    rubric_path = tmp_path / "rubric.json"
+    rubric_path.write_text(json.dumps(RUBRIC), encoding="utf-8")
+
+    journal = RunJournal(journal_config.JOURNAL_FOLDER, RunJournal.compute_run_key(RUBRIC, journal_config))
+    for name in ("b", "d"):
+        journal.append(file_sha256(str(folder / f"{name}.pdf")), graded(name, 50.0))
+
+    processed = []
+
+    def fake_process_files(self, pdf_files, rubric_data):
+        processed.extend(pdf_file.stem for pdf_file in pdf_files)
+        # Urutan selesai berbeda dari urutan folder (misalnya pipeline paralel)
+        return [graded(pdf_file.stem, 90.0) for pdf_file in reversed(pdf_files)]
+
+    monkeypatch.setattr(BatchProcessor, "_process_files", fake_process_files)
+    results = BatchProcessor(journal_config).process_folder(str(folder), str(rubric_path), resume=True)
+
+    assert processed == ["a", "c"]
+    assert [r["document_info"]["filename"] for r in results] == names
+    assert [r["final_score"] for r in results] == [90.0, 50.0, 90.0, 50.0]
@@ -0,0 +1,112 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from rag_grading_improved import PDFExtractor, RAGEngine, StreamingChunker
+from text_splitter import IncrementalSplitter, RecursiveTextSplitter
+
+
+SAMPLE_PDFS = sorted((Path(__file__).resolve().parent.parent / "data").glob("*.pdf"))
+WORDS = ["algoritma", "flowchart", "pseudocode", "nilai", "data", "x", "=", "for", "i++", "hasil"]
+SEPARATORS = [" ", "\n", "\n\n", "  ", "\n\n\n", "\t"]
+
+
+def random_pages(rng: random.Random):
+    """Halaman mirip hasil ekstraksi PDF: kata, baris, paragraf, token panjang tanpa spasi, halaman kosong"""
+    pages = []
+    for _ in range(rng.randint(1, 12)):
+        parts = []
+        newline_weight = rng.choice([0, 5, 15])
+        for _ in range(rng.randint(0, 600)):
+            if rng.random() < 0.01:
+                parts.append("".join(rng.choice("abc_/.") for _ in range(rng.randint(50, 2500))))
+            else:
+                parts.append(rng.choice(WORDS))
+            parts.append(rng.choices(SEPARATORS, weights=[80, 12, newline_weight, 2, 1, 1])[0])
+        pages.append("".join(parts))
+    return pages
+
+
+def random_config(rng: random.Random):
+    chunk_size = rng.choice([50, 100, 300, 1000])
+    return chunk_size, rng.choice([0, chunk_size // 10, chunk_size // 5, chunk_size // 2])
+
+
+@pytest.mark.parametrize("seed", range(400))
+def test_streaming_chunker_matches_full_text(seed):
+    rng = random.Random(seed)
+    pages = random_pages(rng)
+    chunk_size, chunk_overlap = random_config(rng)
+
+    chunker = StreamingChunker(chunk_size, chunk_overlap)
+    for page in pages:
+        chunker.feed({'text': page})
+
+    assert chunker.finish() == RAGEngine._chunk_text("\n".join(pages), chunk_size, chunk_overlap)
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_incremental_splitter_matches_split_offsets(seed):
+    """Teks dipotong di posisi acak (termasuk di tengah separator) tetap menghasilkan offset yang sama"""
+    rng = random.Random(seed)
+    text = "\n".join(random_pages(rng))
+    chunk_size, chunk_overlap = random_config(rng)
+    splitter = RecursiveTextSplitter(chunk_size, chunk_overlap)
+
+    incremental = IncrementalSplitter(splitter)
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 30))))
+    for start, end in zip([0] + cuts, cuts + [len(text)]):
+        incremental.feed(text[start:end])
+
+    assert incremental.finish() == splitter.split_offsets(text)
+    assert incremental.chunks == splitter.split_text(text)
+
+
+def fuzz_texts(n: int, seed: int = 0):
+    """Teks acak pendek untuk edge case (whitespace berturut-turut, separator di awal/akhir)"""
+    rng = random.Random(seed)
+    alphabet = ["a", "b", " ", "  ", "\n", "\n\n", "\n\n\n", "\t", "xyz" * 20]
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 300))) for _ in range(n)]
+
+
+@pytest.mark.parametrize("chunk_size,chunk_overlap", [(1000, 200), (50, 10), (20, 0), (30, 30), (7, 3)])
+def test_matches_langchain_on_fuzz_texts(chunk_size, chunk_overlap):
+    langchain = pytest.importorskip("langchain_text_splitters")
+    expected_splitter = langchain.RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    splitter = RecursiveTextSplitter(chunk_size, chunk_overlap)
+
+    for text in fuzz_texts(500):
+        assert splitter.split_text(text) == expected_splitter.split_text(text)
+
+
+@pytest.mark.parametrize("seed", range(60))
+def test_matches_langchain_on_pages(seed):
+    """Split teks penuh dan StreamingChunker per halaman sama dengan LangChain pada teks gabungan"""
+    langchain = pytest.importorskip("langchain_text_splitters")
+    rng = random.Random(seed)
+    pages = random_pages(rng)
+    chunk_size, chunk_overlap = random_config(rng)
+    text = "\n".join(pages)
+    expected = langchain.RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    ).split_text(text)
+
+    assert RAGEngine._chunk_text(text, chunk_size, chunk_overlap) == expected
+
+    chunker = StreamingChunker(chunk_size, chunk_overlap)
+    for page in pages:
+        chunker.feed({'text': page})
+    assert chunker.finish() == expected
+
+
+@pytest.mark.parametrize("pdf_path", SAMPLE_PDFS, ids=lambda path: path.stem)
+def test_sample_reports_streamed_like_langchain(pdf_path, tmp_path, monkeypatch):
+    """Jalur ekstraksi per halaman (page_consumer) pada laporan contoh"""
+    langchain = pytest.importorskip("langchain_text_splitters")
+    monkeypatch.setattr("rag_grading_improved.Config.CACHE_FOLDER", str(tmp_path))
+    chunker = StreamingChunker(1000, 200)
+    extracted = PDFExtractor().extract_text_with_metadata(str(pdf_path), page_consumer=chunker.feed)
+
+    expected = langchain.RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200).split_text(extracted['text'])
+    assert chunker.finish() == expected
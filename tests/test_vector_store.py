@@ -0,0 +1,121 @@
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from vector_store import QuantizedVectors
+
+
+DIM = 32
+N_VECTORS = QuantizedVectors.PQ_MIN_TRAIN
+PQ_M = 4
+# Batas rata-rata error rekonstruksi relatif (norm error / norm vektor) per mode;
+# PQ dengan 4 sub-vektor atas data gaussian memang kasar, 1.0 setara vektor nol
+MAX_ERROR = {"none": 0.0, "fp16": 1e-3, "int8": 0.02, "pq": 0.6}
+
+
+def make_vectors(n: int, dim: int = DIM, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def relative_error(decoded: np.ndarray, vectors: np.ndarray) -> float:
+    return float(np.mean(np.linalg.norm(decoded - vectors, axis=1) / np.linalg.norm(vectors, axis=1)))
+
+
+@pytest.fixture(scope="module")
+def encoded():
+    """QuantizedVectors per mode atas make_vectors(N_VECTORS), di-encode sekali (training PQ lambat)"""
+    cache = {}
+
+    def get(mode):
+        if mode not in cache:
+            cache[mode] = QuantizedVectors.encode(make_vectors(N_VECTORS), mode, pq_m=PQ_M)
+        return cache[mode]
+
+    return get
+
+
+@pytest.mark.parametrize("mode", QuantizedVectors.MODES)
+def test_encode_decode(encoded, mode):
+    vectors = make_vectors(N_VECTORS)
+    stored = encoded(mode)
+
+    assert stored.mode == mode
+    assert len(stored) == len(vectors)
+    assert stored.dim == DIM
+    decoded = stored.decode()
+    assert decoded.dtype == np.float32 and decoded.shape == vectors.shape
+    assert relative_error(decoded, vectors) <= MAX_ERROR[mode]
+
+    bytes_per_vector = {"none": 4 * DIM, "fp16": 2 * DIM, "int8": DIM, "pq": PQ_M}
+    assert stored.nbytes == bytes_per_vector[mode] * len(vectors)
+
+
+@pytest.mark.parametrize("mode", QuantizedVectors.MODES)
+def test_decode_range_and_rows_match_full_decode(encoded, mode):
+    stored = encoded(mode)
+    full = stored.decode()
+
+    np.testing.assert_array_equal(stored.decode(100, 250), full[100:250])
+    assert stored.decode(10, 10).shape == (0, DIM)
+
+    ids = np.array([7, 0, N_VECTORS - 1, 7, 42])
+    np.testing.assert_array_equal(stored.decode_rows(ids), full[ids])
+
+
+def test_none_decode_is_view():
+    vectors = make_vectors(10)
+    stored = QuantizedVectors.encode(vectors, "none")
+    assert np.shares_memory(stored.decode(2, 5), stored.codes)
+
+
+@pytest.mark.parametrize("mode", QuantizedVectors.MODES)
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, encoded, mode, mmap):
+    stored = encoded(mode)
+    stored.save(tmp_path, "vecs")
+
+    loaded = QuantizedVectors.load(tmp_path, "vecs", mmap=mmap)
+
+    assert loaded.mode == mode
+    assert isinstance(loaded.codes, np.memmap) == mmap
+    np.testing.assert_array_equal(np.asarray(loaded.codes), stored.codes)
+    np.testing.assert_array_equal(loaded.decode(), stored.decode())
+    np.testing.assert_array_equal(loaded.decode_rows([3, 1]), stored.decode_rows([3, 1]))
+    assert (tmp_path / "vecs_codec.npy").exists() == (mode != "none")
+
+
+def test_pq_falls_back_to_int8_below_min_train(tmp_path, encoded):
+    assert QuantizedVectors.effective_mode("pq", N_VECTORS - 1) == "int8"
+    assert QuantizedVectors.effective_mode("pq", N_VECTORS) == "pq"
+    assert encoded("pq").mode == "pq"
+
+    stored = QuantizedVectors.encode(make_vectors(N_VECTORS - 1), "pq", pq_m=PQ_M)
+    assert stored.mode == "int8"
+    assert stored.nbytes == DIM * (N_VECTORS - 1)
+    stored.save(tmp_path)
+    assert QuantizedVectors.load(tmp_path).mode == "int8"
+
+
+@pytest.mark.parametrize("mode", ["none", "fp16", "int8"])
+def test_effective_mode_keeps_other_modes(mode):
+    assert QuantizedVectors.effective_mode(mode, 1) == mode
+
+
+@pytest.mark.parametrize("mode", ["fp16", "int8", "pq"])
+def test_from_trained_codec_reuses_index_codec(tmp_path, encoded, mode):
+    vectors = make_vectors(N_VECTORS, seed=1)
+    # Flat SQ/PQ index yang sudah di-training (codec PQ dipinjam dari fixture)
+    index = faiss.clone_index(encoded(mode).codec)
+    index.add(vectors)
+
+    stored = QuantizedVectors.from_trained_codec(vectors, index)
+
+    assert stored.mode == mode
+    assert stored.codec.ntotal == 0
+    np.testing.assert_array_equal(stored.decode(), index.reconstruct_n(0, index.ntotal))
+
+    stored.save(tmp_path)
+    loaded = QuantizedVectors.load(tmp_path)
+    assert loaded.mode == mode
+    assert QuantizedVectors._codec_mode(loaded.codec) == mode
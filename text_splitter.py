@@ -0,0 +1,248 @@
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+
+DEFAULT_SEPARATORS = ("\n\n", "\n", " ", "")
+
+
+class RecursiveTextSplitter:
+    """
+    Recursive character splitter tanpa dependency LangChain.
+
+    Hierarki separator, aturan overlap dan strip whitespace sama dengan
+    RecursiveCharacterTextSplitter (keep_separator=True, length_function=len),
+    tetapi semua potongan direpresentasikan sebagai offset (start, end) ke teks
+    sumber sehingga tidak ada substring/concatenation sampai chunk final dibuat.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int,
+                 separators: Sequence[str] = DEFAULT_SEPARATORS):
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be > 0, got {chunk_size}")
+        if chunk_overlap < 0 or chunk_overlap > chunk_size:
+            raise ValueError(
+                f"chunk_overlap ({chunk_overlap}) must be between 0 and chunk_size ({chunk_size})"
+            )
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = tuple(separators)
+
+    def split_text(self, text: str) -> List[str]:
+        """Split teks menjadi list chunk (sudah di-strip, tanpa chunk kosong)"""
+        return [text[start:end] for start, end in self.split_offsets(text)]
+
+    def split_offsets(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Split teks dan kembalikan offset (start, end) setiap chunk di teks sumber.
+        Untuk teks yang datang bertahap, pakai IncrementalSplitter.
+        """
+        spans = []
+        if text:
+            self._split(text, 0, len(text), 0, spans)
+        return spans
+
+    def _split(self, text: str, start: int, end: int, sep_level: int, out: List[Tuple[int, int]]):
+        # Pilih separator pertama (dari sep_level) yang muncul di rentang ini
+        separator = self.separators[-1]
+        next_level = len(self.separators)
+        for level in range(sep_level, len(self.separators)):
+            sep = self.separators[level]
+            if not sep:
+                separator = sep
+                break
+            if text.find(sep, start, end) != -1:
+                separator = sep
+                next_level = level + 1
+                break
+
+        good = []
+        for piece_start, piece_end in self._pieces(text, start, end, separator):
+            if piece_end - piece_start < self.chunk_size:
+                good.append((piece_start, piece_end))
+                continue
+
+            # State merge di-reset pada potongan panjang
+            if good:
+                self._merge(text, good, out)
+                good = []
+            if next_level >= len(self.separators):
+                self._emit(text, piece_start, piece_end, out)
+            else:
+                self._split(text, piece_start, piece_end, next_level, out)
+
+        if good:
+            self._merge(text, good, out)
+
+    @staticmethod
+    def _pieces(text: str, start: int, end: int, separator: str):
+        """
+        Potongan yang berdekatan; separator ikut di awal potongan berikutnya
+        (setara keep_separator=True). Separator kosong memecah per karakter.
+        """
+        if not separator:
+            for i in range(start, end):
+                yield i, i + 1
+            return
+
+        piece_start = start
+        sep_len = len(separator)
+        pos = text.find(separator, start, end)
+        while pos != -1:
+            if pos > piece_start:
+                yield piece_start, pos
+            piece_start = pos
+            pos = text.find(separator, pos + sep_len, end)
+        if end > piece_start:
+            yield piece_start, end
+
+    def _merge(self, text: str, pieces: List[Tuple[int, int]], out: List[Tuple[int, int]]):
+        """Gabungkan potongan kecil yang berdekatan menjadi chunk <= chunk_size dengan overlap"""
+        merger = _Merger(self.chunk_size, self.chunk_overlap)
+        for piece_start, piece_end in pieces:
+            span = merger.add(piece_start, piece_end)
+            if span:
+                self._emit(text, span[0], span[1], out)
+        span = merger.flush()
+        if span:
+            self._emit(text, span[0], span[1], out)
+
+    @staticmethod
+    def _emit(text: str, start: int, end: int, out: List[Tuple[int, int]]):
+        """Tambahkan rentang setelah whitespace di kedua sisi dibuang"""
+        while start < end and text[start].isspace():
+            start += 1
+        while end > start and text[end - 1].isspace():
+            end -= 1
+        if end > start:
+            out.append((start, end))
+
+
+class _Merger:
+    """
+    State merge greedy potongan berdekatan (deque potongan + total panjang).
+    add mengembalikan rentang chunk yang selesai (atau None); flush menutup
+    chunk terakhir. Dipakai bersama oleh split biasa dan IncrementalSplitter.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.current = deque()
+        self.total = 0
+
+    def add(self, piece_start: int, piece_end: int) -> Optional[Tuple[int, int]]:
+        length = piece_end - piece_start
+        span = None
+        if self.total + length > self.chunk_size and self.current:
+            span = (self.current[0][0], self.current[-1][1])
+            while self.total > self.chunk_overlap or (self.total + length > self.chunk_size and self.total > 0):
+                first_start, first_end = self.current.popleft()
+                self.total -= first_end - first_start
+        self.current.append((piece_start, piece_end))
+        self.total += length
+        return span
+
+    def flush(self) -> Optional[Tuple[int, int]]:
+        span = (self.current[0][0], self.current[-1][1]) if self.current else None
+        self.current.clear()
+        self.total = 0
+        return span
+
+    @property
+    def start(self) -> Optional[int]:
+        """Offset awal potongan tertua yang masih di deque (belum tentu sudah di-emit)"""
+        return self.current[0][0] if self.current else None
+
+
+class IncrementalSplitter:
+    """
+    Split teks yang datang bertahap (misalnya per halaman) dengan hasil yang
+    identik dengan RecursiveTextSplitter.split_offsets pada teks gabungan.
+
+    Separator tingkat teratas split teks penuh adalah separator pertama yang
+    muncul di mana pun di teks, jadi sebelum separators[0] muncul tidak ada
+    yang bisa difinalisasi dan teks hanya di-buffer. Setelah muncul, setiap
+    potongan tingkat teratas yang sudah lengkap (sudah diikuti separator
+    berikutnya) langsung diproses: potongan < chunk_size masuk merge greedy
+    yang state-nya dibawa antar feed, potongan yang lebih panjang di-split
+    rekursif sendiri (hasilnya hanya bergantung pada isi potongan itu).
+    Buffer hanya menyimpan teks mulai dari potongan tertua yang belum di-emit.
+
+    Offset di spans adalah offset ke teks gabungan semua feed.
+    """
+
+    def __init__(self, splitter: RecursiveTextSplitter):
+        self.splitter = splitter
+        self.separator = splitter.separators[0]
+        self.spans: List[Tuple[int, int]] = []
+        self.chunks: List[str] = []
+        self._merger = _Merger(splitter.chunk_size, splitter.chunk_overlap)
+        self._buffer = ""
+        self._base = 0          # offset teks gabungan untuk _buffer[0]
+        self._piece_start = 0   # awal potongan tingkat teratas yang belum lengkap
+        self._search_from = 0   # posisi pencarian separator berikutnya (seperti _pieces)
+        self._committed = False
+
+    def feed(self, text: str):
+        self._buffer += text
+        if not self._committed:
+            if not self.separator or self._buffer.find(self.separator) == -1:
+                return
+            self._committed = True
+
+        sep_len = len(self.separator)
+        pos = self._buffer.find(self.separator, self._search_from - self._base)
+        while pos != -1:
+            sep_pos = self._base + pos
+            if sep_pos > self._piece_start:
+                self._add_piece(self._piece_start, sep_pos)
+            self._piece_start = sep_pos
+            self._search_from = sep_pos + sep_len
+            pos = self._buffer.find(self.separator, self._search_from - self._base)
+
+        keep_from = self._merger.start if self._merger.start is not None else self._piece_start
+        self._buffer = self._buffer[keep_from - self._base:]
+        self._base = keep_from
+
+    def finish(self) -> List[Tuple[int, int]]:
+        """Proses sisa buffer (potongan terakhir) dan kembalikan offset semua chunk"""
+        if not self._committed:
+            for start, end in self.splitter.split_offsets(self._buffer):
+                self._append(start, end)
+        else:
+            end = self._base + len(self._buffer)
+            if end > self._piece_start:
+                self._add_piece(self._piece_start, end)
+            self._emit(self._merger.flush())
+
+        self._base += len(self._buffer)
+        self._piece_start = self._search_from = self._base
+        self._buffer = ""
+        return self.spans
+
+    def _add_piece(self, start: int, end: int):
+        if end - start < self.splitter.chunk_size:
+            self._emit(self._merger.add(start, end))
+            return
+
+        # Seperti _split: potongan panjang menutup merge lalu di-split rekursif dari separator berikutnya
+        self._emit(self._merger.flush())
+        out = []
+        if len(self.splitter.separators) > 1:
+            self.splitter._split(self._buffer, start - self._base, end - self._base, 1, out)
+        else:
+            self.splitter._emit(self._buffer, start - self._base, end - self._base, out)
+        for span_start, span_end in out:
+            self._append(self._base + span_start, self._base + span_end)
+
+    def _emit(self, span: Optional[Tuple[int, int]]):
+        if span is None:
+            return
+        out = []
+        self.splitter._emit(self._buffer, span[0] - self._base, span[1] - self._base, out)
+        for span_start, span_end in out:
+            self._append(self._base + span_start, self._base + span_end)
+
+    def _append(self, start: int, end: int):
+        self.spans.append((start, end))
+        self.chunks.append(self._buffer[start - self._base:end - self._base])
@@ -0,0 +1,125 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import faiss
+
+
+class QuantizedVectors:
+    """
+    Penyimpanan embedding chunk dengan kuantisasi opsional.
+
+    Mode:
+        none - float32 apa adanya (baseline, 4 byte/dimensi)
+        fp16 - scalar quantization float16 (2 byte/dimensi)
+        int8 - scalar quantization 8-bit, range per dimensi dari training (1 byte/dimensi)
+        pq   - product quantization, pq_m byte/vektor (codebook 256 centroid per sub-vektor)
+
+    Kode disimpan sebagai satu array .npy yang bisa di-memory-map; codec FAISS
+    (hasil training, ukurannya kecil) diserialisasi ke file .npy terpisah.
+    """
+
+    MODES = ("none", "fp16", "int8", "pq")
+    FAISS_CODECS = {"fp16": "SQfp16", "int8": "SQ8"}
+    PQ_NBITS = 8
+    # k-means 256 centroid per sub-quantizer butuh cukup titik; di bawah ini pakai int8
+    PQ_MIN_TRAIN = 1024
+
+    def __init__(self, mode: str, codes: np.ndarray, codec: Optional["faiss.Index"] = None):
+        self.mode = mode
+        self.codes = codes
+        self.codec = codec
+
+    @classmethod
+    def effective_mode(cls, mode: str, n_vectors: int) -> str:
+        """Mode yang benar-benar dipakai: PQ jatuh ke int8 jika data terlalu sedikit untuk training"""
+        if mode == "pq" and n_vectors < cls.PQ_MIN_TRAIN:
+            return "int8"
+        return mode
+
+    @classmethod
+    def encode(cls, vectors: np.ndarray, mode: str = "none", pq_m: int = 16,
+               train_sample: int = 100_000) -> "QuantizedVectors":
+        import faiss
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        mode = cls.effective_mode(mode, len(vectors))
+        if mode == "none":
+            return cls(mode, vectors)
+
+        dim = vectors.shape[1]
+        description = cls.FAISS_CODECS.get(mode) or f"PQ{pq_m}x{cls.PQ_NBITS}"
+        codec = faiss.index_factory(dim, description)
+        if not codec.is_trained:
+            sample = vectors
+            if len(vectors) > train_sample:
+                rng = np.random.default_rng(0)
+                sample = vectors[np.sort(rng.choice(len(vectors), train_sample, replace=False))]
+            codec.train(sample)
+        return cls(mode, codec.sa_encode(vectors), codec)
+
+    @classmethod
+    def from_trained_codec(cls, vectors: np.ndarray, index: "faiss.Index") -> "QuantizedVectors":
+        """Encode dengan codec dari flat SQ/PQ index yang sudah di-training (tanpa training ulang)"""
+        import faiss
+
+        codec = faiss.clone_index(index)
+        codec.reset()
+        return cls(cls._codec_mode(codec), codec.sa_encode(np.ascontiguousarray(vectors, dtype=np.float32)), codec)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1] if self.codec is None else self.codec.d
+
+    @property
+    def nbytes(self) -> int:
+        """Ukuran kode vektor (tanpa codec, yang ukurannya konstan)"""
+        return int(self.codes.nbytes)
+
+    def decode(self, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Rekonstruksi float32 untuk baris [start, end); mode none mengembalikan view tanpa copy"""
+        codes = self.codes[start:end]
+        if self.codec is None:
+            return codes
+        return self.codec.sa_decode(np.ascontiguousarray(codes))
+
+    def decode_rows(self, ids: np.ndarray) -> np.ndarray:
+        """Rekonstruksi float32 untuk baris tertentu (ids boleh acak / berulang)"""
+        codes = np.ascontiguousarray(self.codes[np.asarray(ids, dtype=np.int64)])
+        if self.codec is None:
+            return codes
+        return self.codec.sa_decode(codes)
+
+    def save(self, directory: Path, name: str = "embeddings"):
+        directory = Path(directory)
+        np.save(directory / f"{name}.npy", self.codes)
+        if self.codec is not None:
+            import faiss
+            codec_bytes = faiss.serialize_index(self.codec)
+            np.save(directory / f"{name}_codec.npy", np.asarray(codec_bytes, dtype=np.uint8))
+
+    @classmethod
+    def load(cls, directory: Path, name: str = "embeddings", mmap: bool = True) -> "QuantizedVectors":
+        directory = Path(directory)
+        codes = np.load(directory / f"{name}.npy", mmap_mode='r' if mmap else None)
+        codec_path = directory / f"{name}_codec.npy"
+        if not codec_path.exists():
+            return cls("none", codes)
+
+        import faiss
+
+        codec = faiss.deserialize_index(np.load(codec_path))
+        return cls(cls._codec_mode(codec), codes, codec)
+
+    @staticmethod
+    def _codec_mode(codec: "faiss.Index") -> str:
+        import faiss
+
+        if isinstance(codec, faiss.IndexScalarQuantizer):
+            return "fp16" if codec.sq.qtype == faiss.ScalarQuantizer.QT_fp16 else "int8"
+        return "pq"